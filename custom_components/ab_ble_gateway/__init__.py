@@ -3,13 +3,20 @@
 from __future__ import annotations
 
 import asyncio
+from collections import OrderedDict
+import contextlib
 import datetime
+from functools import partial
 import json
 import logging
 import logging.handlers
 import os
 from pathlib import Path
 import re
+import secrets
+import shutil
+import tempfile
+import time
 
 from homeassistant.components import mqtt
 from homeassistant.components.bluetooth import (
@@ -27,7 +34,11 @@ from homeassistant.const import (
     ATTR_ENTITY_ID,
     CONF_CLIENT_SECRET,
     CONF_HOST,
+    CONF_HOSTS,
     CONF_NAME,
+    CONF_PASSWORD,
+    CONF_PORT,
+    CONF_USERNAME,
     EVENT_HOMEASSISTANT_STOP,
     Platform,
 )
@@ -37,6 +48,8 @@ from homeassistant.helpers.dispatcher import (
     async_dispatcher_connect,
     async_dispatcher_send,
 )
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.network import NoURLAvailableError, get_url
 from homeassistant.helpers.service import async_register_admin_service
 from homeassistant.helpers.typing import ConfigType
 from homeassistant.helpers import issue_registry as ir
@@ -46,25 +59,144 @@ import voluptuous as vol
 
 from .const import (
     ATTR_DRY_RUN,
+    ATTR_DURATION,
+    ATTR_ENTRY_ID,
+    ATTR_TRACEMALLOC,
+    ADVISOR_INTERVAL,
+    AGGREGATION_MAX,
+    CONF_ADV_FILTER,
+    CONF_AGGREGATION_RSSI,
+    CONF_AGGREGATION_WINDOW,
+    CONF_CIDR,
+    CONF_COLLAPSE_RANDOM,
+    CONF_CONNECTION,
+    CONF_DUP_FILTER,
+    CONF_FANOUT,
+    CONF_FANOUT_MULTICAST,
+    CONF_FANOUT_QUEUE,
+    CONF_FANOUT_SOCKET,
+    CONF_FILTER_MFG,
+    CONF_FILTER_UUID,
+    CONF_HTTP_TOKEN,
+    CONF_IGNORE_NRPA,
+    CONF_INCLUDE_DISCOVERED,
+    CONF_LOCALIZATION_INTERVAL,
+    CONF_MAX_DEVICES,
+    CONF_MIN_RSSI,
+    CONF_PATH_LOSS,
+    CONF_POSITION,
+    CONF_REQ_INT,
+    CONF_ROOM,
+    CONF_RULES,
+    CONF_RSSI_THRESHOLD,
+    CONF_SMOOTHING,
+    CONF_SUMMARY_WINDOW,
+    CONF_TRACKED_DEVICES,
+    CONF_TX_POWER,
+    CONF_USEFUL_RSSI,
+    CONF_WRITE_INTERVAL,
+    CONNECTION_HTTP,
+    CONNECTION_MQTT,
+    DEFAULT_FANOUT_QUEUE,
+    DEFAULT_LOCALIZATION_INTERVAL,
     DEFAULT_LOG_LEVEL,
+    DEFAULT_MAX_DEVICES,
+    DEFAULT_PATH_LOSS,
+    DEFAULT_RSSI_THRESHOLD,
+    DEFAULT_SUMMARY_WINDOW,
+    DEFAULT_TX_POWER,
+    DEFAULT_USEFUL_RSSI,
+    DEFAULT_WRITE_INTERVAL,
+    DEFAULT_AGGREGATION_WINDOW,
     DOMAIN,
+    GATEWAY_FILTER_KEYS,
+    INGEST_URL,
     LOGGER_NAME,
+    SERVICE_BULK_IMPORT,
     SERVICE_CLEAN_FAILED_ENTRIES,
+    SERVICE_PROFILE,
+    SERVICE_PUSH_GATEWAY_CONFIG,
     SERVICE_RECONNECT,
+    SMOOTHING_NONE,
+    TRACKING_TICK,
+    WARM_START_SAVE_INTERVAL,
+    WATCHDOG_INTERVAL,
 )
-from .util import parse_ap_ble_devices_data, parse_raw_data
+from .advisor import TrafficStats, async_run_advisor
+from .aggregation import Aggregator
+from .aliases import AliasTable
+from .codec import dumps as json_dumps, loads as json_loads
+from .fanout import create_fanout
+from .frame_log import FrameLog
+from .gateway import async_apply_profile, format_diff
+from .localization import Localizer, np, parse_position
+from .onboarding import async_bulk_import
+from .profiler import async_profile_handler
+from .rules import RULE_SCHEMA, RuleEngine
+from .smoothing import RssiSmoother
+from .summary import DeviceSummary
+from .tracking import TrackedDevices, parse_addresses
+from .util import (
+    is_non_resolvable_random,
+    parse_ap_ble_devices_data,
+    parse_raw_data,
+    rotating_fingerprint,
+)
+from .view import AbBleGatewayIngestView
+from .warm_start import LastSeenStore
+from .watchdog import async_watchdog_tick
 
 TWO_CHAR = re.compile("..")
 
 
-# TODO List the platforms that you want to support.
-# For your initial PR, limit it to 1 platform.
-# No platform entities for this integration - it just registers BLE scanners
-PLATFORMS: list[Platform] = []
+# Summary sensors plus the opt-in per-device entities
+PLATFORMS: list[Platform] = [Platform.DEVICE_TRACKER, Platform.SENSOR]
 
 # Use Home Assistant's built-in logging
 _LOGGER = logging.getLogger(LOGGER_NAME)
 
+BULK_IMPORT_SCHEMA = {
+    vol.Optional(CONF_HOSTS, default=[]): vol.All(cv.ensure_list, [cv.string]),
+    vol.Optional(CONF_CIDR, default=[]): vol.All(cv.ensure_list, [cv.string]),
+    vol.Optional(CONF_PORT, default=80): cv.port,
+    vol.Optional(CONF_USERNAME): cv.string,
+    vol.Optional(CONF_PASSWORD): cv.string,
+    vol.Optional(CONF_INCLUDE_DISCOVERED, default=False): cv.boolean,
+}
+
+FANOUT_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Exclusive(CONF_FANOUT_SOCKET, CONF_FANOUT): cv.string,
+            vol.Exclusive(CONF_FANOUT_MULTICAST, CONF_FANOUT): vol.Match(
+                r"^\d{1,3}(\.\d{1,3}){3}:\d{1,5}$"
+            ),
+            vol.Optional(CONF_FANOUT_QUEUE, default=DEFAULT_FANOUT_QUEUE): vol.All(
+                vol.Coerce(int), vol.Range(min=1)
+            ),
+        }
+    ),
+    cv.has_at_least_one_key(CONF_FANOUT_SOCKET, CONF_FANOUT_MULTICAST),
+)
+
+# Optional YAML block to onboard a batch of gateways at startup and tune
+# integration-wide settings
+CONFIG_SCHEMA = vol.Schema(
+    {
+        vol.Optional(DOMAIN): vol.Schema(
+            {
+                **BULK_IMPORT_SCHEMA,
+                vol.Optional(
+                    CONF_LOCALIZATION_INTERVAL, default=DEFAULT_LOCALIZATION_INTERVAL
+                ): vol.All(vol.Coerce(float), vol.Range(min=1)),
+                vol.Optional(CONF_RULES, default=[]): [RULE_SCHEMA],
+                vol.Optional(CONF_FANOUT): FANOUT_SCHEMA,
+            }
+        )
+    },
+    extra=vol.ALLOW_EXTRA,
+)
+
 
 def set_log_level():
     """Set the log level for this integration's logger."""
@@ -101,16 +233,300 @@ def set_log_level():
 class AbBleScanner(BaseHaRemoteScanner):
     """Scanner for esphome."""
 
+    def __init__(
+        self,
+        *args,
+        useful_rssi=DEFAULT_USEFUL_RSSI,
+        max_devices=DEFAULT_MAX_DEVICES,
+        ignore_nrpa=False,
+        collapse_random=False,
+        summary_window=DEFAULT_SUMMARY_WINDOW,
+        smoothing=SMOOTHING_NONE,
+        **kwargs,
+    ):
+        """Initialize the scanner and its traffic counters."""
+        super().__init__(*args, **kwargs)
+        self.traffic = TrafficStats(useful_rssi)
+        self.last_frame = time.monotonic()
+        # {address: [raw record, rssi, wall-clock time]}, least recently seen
+        # first; capped at max_devices so rotating random addresses can't
+        # grow it forever
+        self.last_seen = OrderedDict()
+        self.max_devices = max_devices
+        self.ignore_nrpa = ignore_nrpa
+        self.evictions = 0
+        self.ignored_nrpa = 0
+        # Rotating random addresses merged by payload fingerprint, if enabled
+        self.aliases = None
+        self.async_set_collapse_random(collapse_random)
+        self.frame_log = FrameLog()
+        self.summary = DeviceSummary(summary_window * 60)
+        # Devices selected for their own entities, if any
+        self.tracked = None
+        self.smoother = None
+        self.async_set_smoothing(smoothing)
+        self.entry_id = None
+        # Set when records are aggregated per window instead of dispatched
+        self.aggregator = None
+        # _async_on_advertisement caller for this HA version, once known
+        self._dispatch = None
+        # Shared Localizer, RuleEngine and fan-out publisher, if configured
+        self.localizer = None
+        self.rules = None
+        self.fanout = None
+        # Devices replayed from the warm-start cache aren't new arrivals; the
+        # seconds since the record being replayed was heard
+        self._replaying = False
+        self._replay_age = 0.0
+        # This entry's hass.data dict, set once the entry is set up
+        self.entry_data = None
+        self.metadata = None
+        # {"AA:BB:CC:DD:EE:FF": name} built from metadata["device_map"]
+        self.device_names = {}
+
+    @callback
+    def _async_update_metadata(self, metadata: dict) -> None:
+        """Store this gateway's metadata, rebuilding indexes only on change."""
+        # Every frame carries the metadata; comparing the decoded dicts is
+        # cheaper than serializing them and stops at the first difference
+        if metadata == self.metadata:
+            return
+
+        device_map = metadata.get("device_map")
+        if not isinstance(device_map, dict):
+            device_map = {}
+        device_names = {}
+        for mac, name in device_map.items():
+            mac = str(mac).upper()
+            if ":" not in mac:
+                mac = ":".join(TWO_CHAR.findall(mac))
+            device_names[mac] = name
+        _LOGGER.debug(f"Gateway metadata changed, {len(device_names)} named devices")
+
+        self.metadata = metadata
+        self.device_names = device_names
+        if self.entry_data is not None:
+            self.entry_data["metadata"] = metadata
+            self.entry_data["device_map"] = device_map
+
+    @callback
+    def async_set_collapse_random(self, enabled: bool) -> None:
+        """Enable or disable merging of rotating random addresses."""
+        if not enabled:
+            self.aliases = None
+        elif self.aliases is None:
+            self.aliases = AliasTable(self.max_devices)
+        else:
+            self.aliases.max_aliases = self.max_devices
+
+    @callback
+    def async_set_smoothing(self, method: str) -> None:
+        """Switch RSSI smoothing method; smoothing state starts over."""
+        if method == SMOOTHING_NONE:
+            self.smoother = None
+        else:
+            self.smoother = RssiSmoother(method, self.max_devices + 1)
+
+    @callback
+    def _async_track_device(
+        self, address: str, record, rssi: int, manufacturer_data: dict
+    ) -> None:
+        """Mark a device as most recently seen, evicting the oldest if full.
+
+        Also feeds the record to the summary, tracked-device, localization
+        and rule consumers.
+        """
+        last_seen = self.last_seen
+        new = address not in last_seen
+        if not new:
+            last_seen.move_to_end(address)
+        # A replayed record keeps the time it was heard, so it still expires
+        age = self._replay_age
+        last_seen[address] = [record, rssi, time.time() - age]
+        while len(last_seen) > self.max_devices:
+            evicted, _ = last_seen.popitem(last=False)
+            self.evictions += 1
+            if self.smoother is not None:
+                self.smoother.release(evicted)
+
+        self.summary.add(
+            address, rssi, new and not self._replaying, time.monotonic() - age
+        )
+        if self._replaying:
+            return
+        tracked = self.tracked
+        if tracked is not None and address in tracked.devices:
+            tracked.async_update(address, rssi)
+        if self.localizer is not None:
+            self.localizer.add(address, self.entry_id, rssi)
+        if self.rules is not None:
+            self.rules.async_process(
+                address, (self.entry_id, self.name), rssi, manufacturer_data
+            )
+
+    def _dispatch_variants(self) -> tuple:
+        """Return callers for each _async_on_advertisement signature we know.
+
+        Older Home Assistant takes 7 arguments, later ones add details and
+        then the advertisement's monotonic time, at first wrapped in a list.
+        """
+        on_advertisement = self._async_on_advertisement
+        scanner = self
+
+        def without_details(address, rssi, name, uuids, service, mfr, details):
+            on_advertisement(address, rssi, name, uuids, service, mfr, None)
+
+        def with_details(address, rssi, name, uuids, service, mfr, details):
+            on_advertisement(address, rssi, name, uuids, service, mfr, None, details)
+
+        def with_time(address, rssi, name, uuids, service, mfr, details):
+            on_advertisement(
+                address,
+                rssi,
+                name,
+                uuids,
+                service,
+                mfr,
+                None,
+                details,
+                MONOTONIC_TIME() - scanner._replay_age,
+            )
+
+        def with_time_list(address, rssi, name, uuids, service, mfr, details):
+            on_advertisement(
+                address,
+                rssi,
+                name,
+                uuids,
+                service,
+                mfr,
+                None,
+                details,
+                [MONOTONIC_TIME() - scanner._replay_age],
+            )
+
+        return without_details, with_details, with_time, with_time_list
+
+    @callback
+    def _async_dispatch(
+        self,
+        address,
+        rssi,
+        local_name,
+        service_uuids,
+        service_data,
+        manufacturer_data,
+        details=None,
+    ) -> None:
+        """Pass an advertisement to the bluetooth manager.
+
+        The first call finds out which signature this Home Assistant version
+        has; later calls go straight to it.
+        """
+        if details is None:
+            details = {}
+        args = (
+            address,
+            rssi,
+            local_name,
+            service_uuids,
+            service_data,
+            manufacturer_data,
+            details,
+        )
+        if self._dispatch is not None:
+            self._dispatch(*args)
+            return
+
+        for variant in self._dispatch_variants():
+            try:
+                variant(*args)
+            except TypeError as type_err:
+                error = type_err
+                _LOGGER.debug(f"{variant.__name__} dispatch failed: {type_err}")
+                continue
+            _LOGGER.debug(f"Dispatching advertisements {variant.__name__}")
+            self._dispatch = variant
+            return
+        raise error
+
+    @callback
+    def _async_dispatch_batch(self, batch) -> None:
+        """Dispatch a frame's advertisements, at most one per address.
+
+        `batch` holds _async_dispatch argument tuples. Once the signature is
+        known this is a plain loop over the pre-bound caller.
+        """
+        batch = iter(batch)
+        dispatch = self._dispatch
+        if dispatch is None:
+            for args in batch:
+                self._async_dispatch(*args)
+                dispatch = self._dispatch
+                break
+        for args in batch:
+            dispatch(*args)
+
+    @callback
+    def async_flush_aggregated(self, *_) -> None:
+        """Dispatch one advertisement per address for the closed window."""
+        self._async_dispatch_batch(
+            (address, rssi, *advertisement, {"samples": samples})
+            for address, rssi, samples, advertisement in self.aggregator.swap()
+        )
+
     @callback
     def async_on_mqtt_message(self, msg: ReceiveMessage) -> None:
         """Call the registered callback."""
+        self.async_on_payload(msg.payload)
+
+    @callback
+    def async_replay(self, records: list) -> None:
+        """Feed records saved before a restart through the decoder.
+
+        `records` holds (raw record, wall-clock time seen) pairs. Replayed
+        frames aren't live traffic: they skip the frame log, traffic stats,
+        fan-out and the watchdog's last-frame time. Each record is dispatched
+        and kept with the time it was heard, not the replay time.
+        """
+        _LOGGER.debug(f"Replaying {len(records)} last-seen devices")
+        now = time.time()
+        self._replaying = True
+        try:
+            for record, seen in records:
+                self._replay_age = max(now - seen, 0.0)
+                # Records keep the shape they arrived in; JSON records must not
+                # come back as bytes, which is what msgpack would produce
+                if isinstance(record, (bytes, bytearray)):
+                    self._async_decode_payload(msgpack.packb({"devices": [record]}))
+                else:
+                    self._async_decode_payload(json_dumps({"devices": [record]}))
+        finally:
+            self._replaying = False
+            self._replay_age = 0.0
+
+    @callback
+    def async_on_payload(self, payload: bytes) -> None:
+        """Decode a gateway frame received over MQTT or HTTP."""
+        start = time.perf_counter()
+        records, processed = self._async_decode_payload(payload)
+        self.frame_log.add(payload, time.perf_counter() - start, records, processed)
+
+    @callback
+    def _async_decode_payload(self, payload: bytes) -> tuple[int, int]:
+        """Decode a frame; return (records in the frame, records dispatched)."""
+        # Counter to track successful device processing
+        processed_count = 0
+        devices = None
+        # Decoded records for local fan-out readers, if publishing
+        batch = [] if self.fanout is not None and not self._replaying else None
+        # {address: _async_dispatch arguments}, dispatched after the frame
+        pending = {}
         try:
-            # Counter to track successful device processing
-            processed_count = 0
 
             # Log receipt of message (debug level to avoid spamming logs)
             _LOGGER.debug(
-                f"Received MQTT message with payload length: {len(msg.payload) if msg.payload else 0}"
+                f"Received gateway frame with payload length: {len(payload) if payload else 0}"
             )
 
             # ULTRA-DEFENSIVE APPROACH: We're going to handle each step with extensive error checking
@@ -120,16 +536,20 @@ class AbBleScanner(BaseHaRemoteScanner):
             devices = None
 
             # Skip processing if the payload is empty or None
-            if not msg.payload:
-                _LOGGER.debug("Empty MQTT payload received, skipping processing")
-                return
+            if not payload:
+                _LOGGER.debug("Empty payload received, skipping processing")
+                return 0, 0
+
+            replaying = self._replaying
+            if not replaying:
+                self.last_frame = time.monotonic()
+                self.traffic.add_frame(len(payload))
 
             # First try to parse as JSON since the enhanced discovery addon uses JSON
             try:
-                # Try to decode as JSON first
-                payload_str = msg.payload.decode("utf-8")
-                _LOGGER.debug(f"Attempting to parse as JSON: {payload_str[:100]}...")
-                unpacked_data = json.loads(payload_str)
+                # Try to decode as JSON first, straight from the bytes
+                _LOGGER.debug("Attempting to parse as JSON: %s...", payload[:100])
+                unpacked_data = json_loads(payload)
 
                 # Immediately check and sanitize the data structure
                 if not isinstance(unpacked_data, dict):
@@ -152,7 +572,7 @@ class AbBleScanner(BaseHaRemoteScanner):
                 # Fallback to msgpack for backward compatibility
                 try:
                     # Use msgpack directly but be ready to handle the extra data error
-                    unpacked_data = msgpack.unpackb(msg.payload, raw=True)
+                    unpacked_data = msgpack.unpackb(payload, raw=True)
 
                     # Immediately check and sanitize the data structure
                     if not isinstance(unpacked_data, dict):
@@ -173,7 +593,7 @@ class AbBleScanner(BaseHaRemoteScanner):
                         try:
                             # Use the Unpacker to just get the first object
                             unpacker = msgpack.Unpacker(raw=True)
-                            unpacker.feed(msg.payload)
+                            unpacker.feed(payload)
                             unpacked_data = next(unpacker)
                             _LOGGER.info(
                                 "Successfully extracted partial data from msgpack payload"
@@ -253,44 +673,12 @@ class AbBleScanner(BaseHaRemoteScanner):
                         # It's already a list, we're good
                         devices = devices_raw
 
-                # Check for additional metadata that might be useful
-                metadata = None
-                device_map = {}
-
-                # Try to get metadata from JSON payload
+                # Gateway metadata (JSON payloads only) belongs to this entry;
+                # it only changes when the add-on's device map does
                 if "metadata" in unpacked_data and isinstance(
                     unpacked_data["metadata"], dict
                 ):
-                    metadata = unpacked_data["metadata"]
-                    _LOGGER.debug(f"Found metadata in payload: {metadata}")
-
-                    # Extract device_map if available
-                    if "device_map" in metadata and isinstance(
-                        metadata["device_map"], dict
-                    ):
-                        device_map = metadata["device_map"]
-                        _LOGGER.debug(f"Found device map: {device_map}")
-
-                # Store metadata as part of domain data for use by services
-                if (
-                    metadata
-                    and hasattr(self, "_async_on_advertisement")
-                    and hasattr(self, "hass")
-                    and self.hass
-                    and DOMAIN in self.hass.data
-                ):
-                    # Ensure DOMAIN data is a dictionary
-                    domain_data = self.hass.data[DOMAIN]
-                    if not isinstance(domain_data, dict):
-                        _LOGGER.warning(
-                            f"DOMAIN data is not a dictionary: {type(domain_data)}"
-                        )
-                    else:
-                        # Safe iteration through domain entries
-                        for entry_id, entry_data in domain_data.items():
-                            if isinstance(entry_data, dict):
-                                entry_data["metadata"] = metadata
-                                entry_data["device_map"] = device_map
+                    self._async_update_metadata(unpacked_data["metadata"])
             except Exception as devices_err:
                 _LOGGER.warning(f"Error extracting devices data: {devices_err}")
                 # Ensure we have a list
@@ -306,7 +694,7 @@ class AbBleScanner(BaseHaRemoteScanner):
             # Skip processing if no devices
             if not devices:
                 _LOGGER.debug("No devices to process")
-                return
+                return 0, 0
 
             # Log the number of devices found
             _LOGGER.info(f"Processing BLE gateway data with {len(devices)} devices")
@@ -320,7 +708,7 @@ class AbBleScanner(BaseHaRemoteScanner):
                         continue
 
                     # Check that we have a valid device entry
-                    if not isinstance(d, (list, tuple)):
+                    if not isinstance(d, (list, tuple, bytes, bytearray)):
                         _LOGGER.debug(f"Skipping non-list device entry: {d}")
                         continue
 
@@ -328,6 +716,9 @@ class AbBleScanner(BaseHaRemoteScanner):
                         _LOGGER.debug(f"Skipping too-short device entry: {d}")
                         continue
 
+                    # Set for rotating addresses when those are merged
+                    fingerprint = None
+
                     # Parse the raw data with error handling
                     try:
                         # Handle various device data formats
@@ -370,6 +761,17 @@ class AbBleScanner(BaseHaRemoteScanner):
                                     )
                                     continue
 
+                            if self.ignore_nrpa:
+                                try:
+                                    mac_bytes = bytes.fromhex(
+                                        mac_address.replace(":", "")
+                                    )
+                                except ValueError:
+                                    mac_bytes = b""
+                                if is_non_resolvable_random(index, mac_bytes):
+                                    self.ignored_nrpa += 1
+                                    continue
+
                             # Get RSSI - could be int or string
                             if isinstance(d[2], (int, float)):
                                 rssi = int(d[2])
@@ -384,39 +786,19 @@ class AbBleScanner(BaseHaRemoteScanner):
 
                             # Get advertisement data if present
                             adv_data = d[3] if len(d) > 3 else ""
-
-                            # Check for device name in metadata if available
-                            device_name = ""
-                            if hasattr(self, "hass") and DOMAIN in self.hass.data:
-                                domain_data = self.hass.data[DOMAIN]
-                                # Ensure domain data is a dictionary
-                                if not isinstance(domain_data, dict):
-                                    _LOGGER.debug(
-                                        f"DOMAIN data is not a dictionary when looking up device name: {type(domain_data)}"
+                            payload_key = (mac_address, str(adv_data))
+                            if self.aliases is not None and isinstance(adv_data, str):
+                                try:
+                                    fingerprint = rotating_fingerprint(
+                                        index,
+                                        bytes.fromhex(mac_address.replace(":", "")),
+                                        bytes.fromhex(adv_data),
                                     )
-                                else:
-                                    # Safely iterate through domain entries
-                                    for entry_id, entry_data in domain_data.items():
-                                        if not isinstance(entry_data, dict):
-                                            continue
-
-                                        if "device_map" in entry_data:
-                                            device_map = entry_data["device_map"]
-                                            if not isinstance(device_map, dict):
-                                                continue
-
-                                            # Check with and without colons
-                                            if mac_address in device_map:
-                                                device_name = device_map[mac_address]
-                                                break
-                                            elif (
-                                                mac_address.replace(":", "")
-                                                in device_map
-                                            ):
-                                                device_name = device_map[
-                                                    mac_address.replace(":", "")
-                                                ]
-                                                break
+                                except ValueError:
+                                    pass
+
+                            # Name from this gateway's metadata, if it has any
+                            device_name = self.device_names.get(mac_address, "")
 
                             # Create direct advertisement data
                             adv = {
@@ -441,6 +823,17 @@ class AbBleScanner(BaseHaRemoteScanner):
 
                         # Process as original binary data (legacy support)
                         elif isinstance(d, (bytes, bytearray)):
+                            if self.ignore_nrpa and is_non_resolvable_random(
+                                d[0], d[1:7]
+                            ):
+                                self.ignored_nrpa += 1
+                                continue
+                            # Everything but the RSSI byte identifies the payload
+                            payload_key = bytes(d[:7]) + bytes(d[8:])
+                            if self.aliases is not None:
+                                fingerprint = rotating_fingerprint(
+                                    d[0], d[1:7], bytes(d[8:])
+                                )
                             raw_data = parse_ap_ble_devices_data(d)
                             if raw_data is None:
                                 _LOGGER.debug(f"Could not parse device data: {d}")
@@ -473,6 +866,13 @@ class AbBleScanner(BaseHaRemoteScanner):
                             rssi = int(rssi_val)  # Ensure it's an integer
                     except Exception:
                         pass  # Keep default
+                    if fingerprint is not None:
+                        address = self.aliases.resolve(address, fingerprint, rssi)
+
+                    if not replaying:
+                        self.traffic.add_record(payload_key, rssi)
+                    if self.smoother is not None:
+                        rssi = round(self.smoother.update(address, rssi))
 
                     # Get string values with safe defaults
                     local_name = ""
@@ -518,86 +918,44 @@ class AbBleScanner(BaseHaRemoteScanner):
                     except Exception:
                         pass  # Keep default
 
-                    # Ultra-defensive direct call to _async_on_advertisement with all required parameters
+                    # Dispatch after the frame, or once per window when aggregating
                     try:
-                        # Get current monotonic time for the advertisement timestamp
-                        current_time = MONOTONIC_TIME()
-
-                        _LOGGER.debug(
-                            f"Calling _async_on_advertisement for device {address}"
-                        )
-                        # Based on the error messages, it appears there might be a type issue
-                        # with the timestamp format (list vs. float)
-                        try:
-                            # First try with just 7 arguments (older API)
-                            self._async_on_advertisement(
+                        if self.aggregator is not None and not replaying:
+                            self.aggregator.add(
+                                address,
+                                rssi,
+                                (
+                                    local_name,
+                                    service_uuids,
+                                    service_data,
+                                    manufacturer_data,
+                                ),
+                            )
+                        else:
+                            # Only the latest record per address is dispatched
+                            pending[address] = (
                                 address,
                                 rssi,
                                 local_name,
                                 service_uuids,
                                 service_data,
                                 manufacturer_data,
-                                None,  # tx_power
-                            )
-                            _LOGGER.debug("Successfully used older 7-argument format")
-                        except TypeError as type_err:
-                            _LOGGER.debug(
-                                f"Older format failed, trying with 8 arguments: {type_err}"
+                                {},
                             )
-                            try:
-                                # Then try with 8 arguments (middle API)
-                                self._async_on_advertisement(
+                        # Success - increment processed count
+                        processed_count += 1
+                        self._async_track_device(address, d, rssi, manufacturer_data)
+                        if batch is not None:
+                            batch.append(
+                                (
                                     address,
                                     rssi,
                                     local_name,
                                     service_uuids,
                                     service_data,
                                     manufacturer_data,
-                                    None,  # tx_power
-                                    {},  # details parameter
-                                )
-                                _LOGGER.debug("Successfully used 8-argument format")
-                            except TypeError as type_err2:
-                                _LOGGER.debug(
-                                    f"8-argument format failed, trying with 9 arguments and direct timestamp: {type_err2}"
                                 )
-                                try:
-                                    # Finally try with 9 arguments, but using the timestamp directly
-                                    self._async_on_advertisement(
-                                        address,
-                                        rssi,
-                                        local_name,
-                                        service_uuids,
-                                        service_data,
-                                        manufacturer_data,
-                                        None,  # tx_power
-                                        {},  # details parameter
-                                        current_time,  # timestamp as direct float value, not in a list
-                                    )
-                                    _LOGGER.debug(
-                                        "Successfully used 9-argument format with direct timestamp"
-                                    )
-                                except TypeError as type_err3:
-                                    # As a last resort, try with the list format
-                                    _LOGGER.debug(
-                                        f"Direct timestamp failed, using list format: {type_err3}"
-                                    )
-                                    self._async_on_advertisement(
-                                        address,
-                                        rssi,
-                                        local_name,
-                                        service_uuids,
-                                        service_data,
-                                        manufacturer_data,
-                                        None,  # tx_power
-                                        {},  # details parameter
-                                        [current_time],  # timestamp as list
-                                    )
-                                    _LOGGER.debug(
-                                        "Successfully used 9-argument format with list timestamp"
-                                    )
-                        # Success - increment processed count
-                        processed_count += 1
+                            )
                         _LOGGER.debug(
                             f"Successfully processed advertisement for {address}"
                         )
@@ -612,6 +970,11 @@ class AbBleScanner(BaseHaRemoteScanner):
                     _LOGGER.error(f"Error in device processing loop: {device_err}")
                     continue
 
+            if pending:
+                self._async_dispatch_batch(pending.values())
+            if batch:
+                self.fanout.publish(self.source, batch)
+
             # Log the results
             if processed_count > 0:
                 _LOGGER.info(f"Successfully processed {processed_count} devices")
@@ -623,62 +986,86 @@ class AbBleScanner(BaseHaRemoteScanner):
             _LOGGER.error(f"Outer error in MQTT message handler: {outer_err}")
 
         # Always return to avoid any potential exceptions bubbling up
-        return
+        return len(devices or ()), processed_count
 
 
 def _clean_failed_entries(config_dir, domain=None, dry_run=False):
-    """Clean up failed integration config entries."""
-    # Path to the storage file
-    storage_file = os.path.join(config_dir, ".storage/core.config_entries")
+    """Remove failed config entries, or all entries of `domain`.
+
+    Returns {"removed": [{entry_id, domain, title}], "kept": count} or None if
+    there is no storage file. The file is written compactly to a temp file
+    next to it and swapped in with os.replace, so an interrupted run can't
+    leave it truncated; the original is kept as .bak. A dry run only reports
+    the entries that would be removed.
+    """
+    storage_file = os.path.join(config_dir, ".storage", "core.config_entries")
 
     if not os.path.exists(storage_file):
         _LOGGER.error("Error: Config entries file not found at %s", storage_file)
-        return 1
+        return None
 
-    # Load current config entries
-    with open(storage_file, "r") as f:
+    with open(storage_file, "rb") as f:
         config_data = json.load(f)
 
-    entries = config_data.get("data", {}).get("entries", [])
-    original_count = len(entries)
+    kept = []
+    removed = []
+    for entry in config_data.get("data", {}).get("entries", []):
+        if (
+            entry.get("domain") == domain
+            if domain
+            else entry.get("state") == "failed_unload"
+        ):
+            removed.append(
+                {
+                    "entry_id": entry.get("entry_id"),
+                    "domain": entry.get("domain"),
+                    "title": entry.get("title"),
+                }
+            )
+        else:
+            kept.append(entry)
+    result = {"removed": removed, "kept": len(kept)}
 
-    # Create backup
-    backup_file = f"{storage_file}.bak"
-    if not dry_run:
-        with open(backup_file, "w") as f:
-            json.dump(config_data, f, indent=4)
-        _LOGGER.info("Created backup at %s", backup_file)
-
-    # Filter entries
-    if domain:
-        filtered_entries = [entry for entry in entries if entry.get("domain") != domain]
-        removed = original_count - len(filtered_entries)
-        _LOGGER.info("Would remove %d entries for domain '%s'", removed, domain)
-    else:
-        # Keep only entries that are not in a failed state
-        filtered_entries = [
-            entry for entry in entries if entry.get("state") != "failed_unload"
-        ]
-        removed = original_count - len(filtered_entries)
-        _LOGGER.info("Would remove %d failed entries", removed)
-
-    if removed == 0:
+    if not removed:
         _LOGGER.info("No entries to remove.")
-        return 0
-
-    # Update the data
-    if not dry_run:
-        config_data["data"]["entries"] = filtered_entries
-        with open(storage_file, "w") as f:
-            json.dump(config_data, f, indent=4)
+        return result
+    for item in removed:
         _LOGGER.info(
-            "Removed %d entries. Original file backed up at %s", removed, backup_file
+            "%s %s entry %s (%s)",
+            "Would remove" if dry_run else "Removing",
+            item["domain"],
+            item["entry_id"],
+            item["title"],
         )
-        _LOGGER.warning("You should restart Home Assistant to apply these changes.")
-    else:
+    if dry_run:
         _LOGGER.info("Dry run complete. No changes were made.")
+        return result
 
-    return 0
+    backup_file = f"{storage_file}.bak"
+    shutil.copyfile(storage_file, backup_file)
+    config_data["data"]["entries"] = kept
+    fd, temp_file = tempfile.mkstemp(
+        dir=os.path.dirname(storage_file), prefix=".core.config_entries."
+    )
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            encoder = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False)
+            for chunk in encoder.iterencode(config_data):
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        shutil.copymode(storage_file, temp_file)
+        os.replace(temp_file, storage_file)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(temp_file)
+        raise
+
+    _LOGGER.info(
+        "Removed %d entries. Original file backed up at %s", len(removed), backup_file
+    )
+    _LOGGER.warning("You should restart Home Assistant to apply these changes.")
+    return result
 
 
 async def async_clean_failed_entries(hass, dry_run=False):
@@ -686,9 +1073,126 @@ async def async_clean_failed_entries(hass, dry_run=False):
     config_dir = hass.config.config_dir
 
     # This must be run in the executor since it involves file operations
-    return await hass.async_add_executor_job(
+    result = await hass.async_add_executor_job(
         _clean_failed_entries, config_dir, DOMAIN, dry_run
     )
+    if result is None:
+        return None
+
+    lines = [
+        f"{item['title']} ({item['entry_id']})" for item in result["removed"]
+    ] or ["No entries to remove"]
+    try:
+        await hass.services.async_call(
+            "persistent_notification",
+            "create",
+            {
+                "title": "BLE Gateway Cleanup" + (" (dry run)" if dry_run else ""),
+                "message": "\n".join(lines),
+                "notification_id": "ble_gateway_clean_failed_entries",
+            },
+        )
+    except Exception:
+        pass  # Silently ignore notification errors
+    return result
+
+
+async def async_push_gateway_config(hass: HomeAssistant, call) -> dict:
+    """Service call to push a filtering profile to one or all gateways."""
+    dry_run = call.data.get(ATTR_DRY_RUN, False)
+    profile = {key: call.data[key] for key in GATEWAY_FILTER_KEYS if key in call.data}
+    entries = [
+        entry
+        for entry in hass.config_entries.async_entries(DOMAIN)
+        if ATTR_ENTRY_ID not in call.data or entry.entry_id == call.data[ATTR_ENTRY_ID]
+    ]
+    if not entries:
+        _LOGGER.warning("No gateways matched the push_gateway_config call")
+        return {}
+
+    results = await async_apply_profile(hass, entries, profile, dry_run=dry_run)
+
+    lines = []
+    for entry in entries:
+        result = results[entry.entry_id]
+        if isinstance(result, Exception):
+            _LOGGER.error("Failed to push config to %s: %s", entry.title, result)
+            lines.append(f"{entry.title}: error ({result})")
+            continue
+        lines.append(f"{entry.title}: {format_diff(result)}")
+        if not dry_run:
+            hass.config_entries.async_update_entry(
+                entry, options={**entry.options, **profile}
+            )
+
+    try:
+        await hass.services.async_call(
+            "persistent_notification",
+            "create",
+            {
+                "title": "BLE Gateway Config"
+                + (" (dry run)" if dry_run else ""),
+                "message": "\n".join(lines),
+                "notification_id": "ble_gateway_push_config",
+            },
+        )
+    except Exception:
+        pass  # Silently ignore notification errors
+    return results
+
+
+async def async_bulk_import_service(hass: HomeAssistant, data: dict) -> dict:
+    """Run a bulk import and report the outcome per host."""
+    try:
+        outcomes = await async_bulk_import(
+            hass,
+            hosts=data[CONF_HOSTS],
+            cidrs=data[CONF_CIDR],
+            port=data[CONF_PORT],
+            username=data.get(CONF_USERNAME),
+            password=data.get(CONF_PASSWORD),
+            include_discovered=data[CONF_INCLUDE_DISCOVERED],
+        )
+    except ValueError as err:
+        _LOGGER.error("Bulk import failed: %s", err)
+        return {}
+
+    try:
+        await hass.services.async_call(
+            "persistent_notification",
+            "create",
+            {
+                "title": "BLE Gateway Bulk Import",
+                "message": "\n".join(
+                    f"{host}: {outcome}" for host, outcome in sorted(outcomes.items())
+                )
+                or "No gateways found.",
+                "notification_id": "ble_gateway_bulk_import",
+            },
+        )
+    except Exception:
+        pass  # Silently ignore notification errors
+    return outcomes
+
+
+async def async_profile_service(hass: HomeAssistant, call) -> None:
+    """Profile the frame handler and tell the user where the report is."""
+    stats_path, report_path = await async_profile_handler(
+        hass, call.data[ATTR_DURATION], call.data[ATTR_TRACEMALLOC]
+    )
+    _LOGGER.info(f"Wrote profile to {stats_path} and {report_path}")
+    try:
+        await hass.services.async_call(
+            "persistent_notification",
+            "create",
+            {
+                "title": "BLE Gateway Profile",
+                "message": f"Report: {report_path}\nStats: {stats_path}",
+                "notification_id": "ble_gateway_profile",
+            },
+        )
+    except Exception:
+        pass  # Silently ignore notification errors
 
 
 async def async_reconnect_gateway(hass: HomeAssistant, entity_id=None):
@@ -737,19 +1241,21 @@ async def async_reconnect_gateway(hass: HomeAssistant, entity_id=None):
         # If no specific entry ID was provided or found, try to reconnect all gateways
         if entry_id is None:
             _LOGGER.debug("Reconnecting all gateways")
-            any_success = False
-            for domain_entry_id, entry_data in hass.data[DOMAIN].items():
-                try:
-                    if "scanner" in entry_data:
-                        reconnect_result = await _reconnect_single_gateway(
-                            hass, domain_entry_id
-                        )
-                        any_success = any_success or reconnect_result
-                except Exception as reconnect_err:
+            entry_ids = [
+                domain_entry_id
+                for domain_entry_id, entry_data in hass.data[DOMAIN].items()
+                if isinstance(entry_data, dict) and "scanner" in entry_data
+            ]
+            results = await asyncio.gather(
+                *(_reconnect_single_gateway(hass, e) for e in entry_ids),
+                return_exceptions=True,
+            )
+            for domain_entry_id, reconnect_result in zip(entry_ids, results):
+                if isinstance(reconnect_result, Exception):
                     _LOGGER.error(
-                        f"Error reconnecting gateway {domain_entry_id}: {reconnect_err}"
+                        f"Error reconnecting gateway {domain_entry_id}: {reconnect_result}"
                     )
-            result = any_success
+            result = any(r is True for r in results)
         else:
             # Reconnect only the specified entry
             if entry_id in hass.data[DOMAIN]:
@@ -764,6 +1270,67 @@ async def async_reconnect_gateway(hass: HomeAssistant, entity_id=None):
         return False
 
 
+def _entry_mqtt_topic(hass: HomeAssistant, entry_id):
+    """Return the MQTT topic of a config entry, if it uses MQTT."""
+    entry = hass.config_entries.async_get_entry(entry_id)
+    return entry.data.get("mqtt_topic") if entry else None
+
+
+def _format_latencies(latencies: dict) -> str:
+    """Render {topic: seconds or None} for logs and notifications."""
+    return ", ".join(
+        f"{topic} ({latency * 1000:.0f} ms)" if latency is not None else f"{topic} (failed)"
+        for topic, latency in latencies.items()
+    )
+
+
+async def _async_resubscribe_entry(hass: HomeAssistant, entry_id):
+    """Replace a gateway's MQTT subscription.
+
+    Uses the unsubscribe callable returned by mqtt.async_subscribe, so there is
+    nothing to wait for before subscribing again. Returns (topic, seconds taken),
+    with None as the latency if subscribing failed.
+
+    The watchdog and the reconnect services may resubscribe the same entry at
+    once; the per-entry lock makes each replacement finish before the next
+    unsubscribes, so no subscription is left without its unsubscribe callable.
+    """
+    entry_data = hass.data[DOMAIN][entry_id]
+    topic = _entry_mqtt_topic(hass, entry_id)
+    started = time.monotonic()
+
+    async with entry_data.setdefault("resubscribe_lock", asyncio.Lock()):
+        unsubscribe = entry_data.pop("unsubscribe", None)
+        if unsubscribe is not None:
+            try:
+                unsubscribe()
+            except Exception as unsub_err:
+                _LOGGER.debug(f"Error unsubscribing from {topic}: {unsub_err}")
+
+        try:
+            entry_data["unsubscribe"] = await mqtt.async_subscribe(
+                hass, topic, entry_data["scanner"].async_on_mqtt_message, encoding=None
+            )
+        except Exception as mqtt_err:
+            _LOGGER.error(f"MQTT subscription error for {topic}: {mqtt_err}")
+            return topic, None
+
+    latency = time.monotonic() - started
+    entry_data["resubscribe_latency"] = latency
+    entry_data["last_reconnect"] = datetime.datetime.now().isoformat()
+    _LOGGER.debug(f"Resubscribed to {topic} in {latency * 1000:.1f} ms")
+    return topic, latency
+
+
+async def _async_resubscribe_entries(hass: HomeAssistant, entry_ids) -> dict:
+    """Resubscribe several gateways concurrently; return {topic: latency}."""
+    return dict(
+        await asyncio.gather(
+            *(_async_resubscribe_entry(hass, entry_id) for entry_id in entry_ids)
+        )
+    )
+
+
 async def _reconnect_single_gateway(hass: HomeAssistant, entry_id):
     """Safely reconnect a single gateway by entry_id."""
 
@@ -842,30 +1409,8 @@ async def _reconnect_single_gateway(hass: HomeAssistant, entry_id):
             _LOGGER.error("MQTT client not available")
             return False
 
-        # Try to unsubscribe first to clean up any existing subscriptions
-        try:
-            # We'll try unsubscribing but don't fail if it doesn't work
-            await mqtt.async_unsubscribe(
-                hass, mqtt_topic, scanner.async_on_mqtt_message
-            )
-            _LOGGER.debug(f"Successfully unsubscribed from {mqtt_topic}")
-        except Exception as unsub_err:
-            _LOGGER.debug(f"No active subscription to unsubscribe from: {unsub_err}")
-
-        # Now resubscribe
-        subscription = None
-        try:
-            subscription = await mqtt.async_subscribe(
-                hass, mqtt_topic, scanner.async_on_mqtt_message, encoding=None
-            )
-
-            if subscription is None:
-                _LOGGER.error(f"Failed to subscribe to MQTT topic {mqtt_topic}")
-                return False
-
-            _LOGGER.debug(f"Successfully subscribed to MQTT topic {mqtt_topic}")
-        except Exception as mqtt_err:
-            _LOGGER.error(f"MQTT subscription error: {mqtt_err}")
+        _, latency = await _async_resubscribe_entry(hass, entry_id)
+        if latency is None:
             return False
 
         # Update gateway sensor to show connected again
@@ -914,19 +1459,156 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     hass.data[DOMAIN]["reconnect_in_progress"] = False
     hass.data[DOMAIN]["last_reconnect_time"] = datetime.datetime.now().isoformat()
 
+    # One background analyzer for all gateways' traffic
+    hass.data[DOMAIN]["advisor_unsub"] = async_track_time_interval(
+        hass,
+        partial(async_run_advisor, hass),
+        datetime.timedelta(seconds=ADVISOR_INTERVAL),
+    )
+
+    # One watchdog timer for all gateways rather than one per entry
+    hass.data[DOMAIN]["watchdog_unsub"] = async_track_time_interval(
+        hass,
+        partial(async_watchdog_tick, hass, _async_resubscribe_entry),
+        datetime.timedelta(seconds=WATCHDOG_INTERVAL),
+    )
+
+    @callback
+    def snapshot_last_seen(*_):
+        """Snapshot every scanner's last-seen table for the next startup."""
+        for entry_data in hass.data[DOMAIN].values():
+            if isinstance(entry_data, dict) and "last_seen_store" in entry_data:
+                entry_data["last_seen_store"].async_schedule_save(
+                    dict(entry_data["scanner"].last_seen)
+                )
+
+    hass.data[DOMAIN]["warm_start_unsub"] = async_track_time_interval(
+        hass, snapshot_last_seen, datetime.timedelta(seconds=WARM_START_SAVE_INTERVAL)
+    )
+
+    # Threshold-crossing rules from YAML, shared by all gateways
+    if rules := config.get(DOMAIN, {}).get(CONF_RULES):
+        hass.data[DOMAIN]["rules"] = RuleEngine(hass, rules)
+        hass.data[DOMAIN]["rules_unsub"] = async_track_time_interval(
+            hass, hass.data[DOMAIN]["rules"].async_tick, datetime.timedelta(seconds=1)
+        )
+
+    # Decoded advertisements for other processes on this host
+    if fanout_config := config.get(DOMAIN, {}).get(CONF_FANOUT):
+        fanout = create_fanout(fanout_config)
+        try:
+            await fanout.async_start()
+        except OSError as err:
+            _LOGGER.error(f"Could not start advertisement fan-out: {err}")
+        else:
+            hass.data[DOMAIN]["fanout"] = fanout
+
+            async def stop_fanout(_event):
+                await fanout.async_stop()
+
+            hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, stop_fanout)
+
+    # Room localization across gateways (needs numpy)
+    if np is not None:
+        hass.data[DOMAIN]["localizer"] = Localizer()
+        hass.data[DOMAIN]["localization_unsub"] = async_track_time_interval(
+            hass,
+            partial(_async_localization_tick, hass),
+            datetime.timedelta(
+                seconds=config.get(DOMAIN, {}).get(
+                    CONF_LOCALIZATION_INTERVAL, DEFAULT_LOCALIZATION_INTERVAL
+                )
+            ),
+        )
+
+    # Endpoint for gateways configured to deliver frames over HTTP
+    hass.http.register_view(AbBleGatewayIngestView(hass))
+
     # We're going to skip file copying for now and register our services directly
     # This avoids file operations which can cause blocking issues
     _LOGGER.info("Setting up services and helpers directly")
 
+    async def clean_failed_entries_service(call):
+        """Remove failed entries from the config entry storage."""
+        await async_clean_failed_entries(hass, call.data[ATTR_DRY_RUN])
+
     # Register services
     async_register_admin_service(
         hass,
         DOMAIN,
         SERVICE_CLEAN_FAILED_ENTRIES,
-        async_clean_failed_entries,
+        clean_failed_entries_service,
+        schema=vol.Schema(
+            {
+                vol.Optional(ATTR_DRY_RUN, default=False): cv.boolean,
+            }
+        ),
+    )
+
+    async def push_gateway_config_service(call):
+        """Push source-side filtering settings to the gateways."""
+        await async_push_gateway_config(hass, call)
+
+    async_register_admin_service(
+        hass,
+        DOMAIN,
+        SERVICE_PUSH_GATEWAY_CONFIG,
+        push_gateway_config_service,
         schema=vol.Schema(
             {
+                vol.Optional(ATTR_ENTRY_ID): cv.string,
                 vol.Optional(ATTR_DRY_RUN, default=False): cv.boolean,
+                vol.Optional(CONF_REQ_INT): vol.All(
+                    vol.Coerce(int), vol.Range(min=0, max=3600)
+                ),
+                vol.Optional(CONF_MIN_RSSI): vol.All(
+                    vol.Coerce(int), vol.Range(min=-127, max=0)
+                ),
+                vol.Optional(CONF_ADV_FILTER): vol.Coerce(int),
+                vol.Optional(CONF_DUP_FILTER): vol.All(
+                    vol.Coerce(int), vol.Range(min=0, max=1)
+                ),
+                vol.Optional(CONF_FILTER_MFG): vol.Coerce(int),
+                vol.Optional(CONF_FILTER_UUID): cv.string,
+            }
+        ),
+    )
+
+    async def bulk_import_service(call):
+        """Onboard many gateways at once."""
+        await async_bulk_import_service(hass, dict(call.data))
+
+    async_register_admin_service(
+        hass,
+        DOMAIN,
+        SERVICE_BULK_IMPORT,
+        bulk_import_service,
+        schema=vol.Schema(BULK_IMPORT_SCHEMA),
+    )
+
+    yaml_config = config.get(DOMAIN, {})
+    if (
+        yaml_config.get(CONF_HOSTS)
+        or yaml_config.get(CONF_CIDR)
+        or yaml_config.get(CONF_INCLUDE_DISCOVERED)
+    ):
+        hass.async_create_task(async_bulk_import_service(hass, yaml_config))
+
+    async def profile_service(call):
+        """Profile the frame handler for a while."""
+        await async_profile_service(hass, call)
+
+    async_register_admin_service(
+        hass,
+        DOMAIN,
+        SERVICE_PROFILE,
+        profile_service,
+        schema=vol.Schema(
+            {
+                vol.Optional(ATTR_DURATION, default=60): vol.All(
+                    vol.Coerce(float), vol.Range(min=1, max=3600)
+                ),
+                vol.Optional(ATTR_TRACEMALLOC, default=False): cv.boolean,
             }
         ),
     )
@@ -1063,6 +1745,7 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     # Register a simpler direct MQTT reconnect service
     async def simple_mqtt_reconnect(call):
         """Simple service to reconnect MQTT topic."""
+        holds_flag = False
         try:
             _LOGGER.info("Simple MQTT reconnect called")
 
@@ -1089,6 +1772,8 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
 
             # Only proceed if we can acquire the lock
             async with simple_mqtt_reconnect.lock:
+                # Keep the watchdog from resubscribing alongside this reconnect
+                hass.data[DOMAIN]["reconnect_in_progress"] = holds_flag = True
                 # Create a notification
                 try:
                     await hass.services.async_call(
@@ -1104,52 +1789,14 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
                     _LOGGER.warning(f"Failed to create notification: {notify_err}")
                     # Continue anyway
 
-                # Find all gateway entries and get their MQTT topics
-                mqtt_topics = []
-                try:
-                    # First try to get topics from domain data
-                    if DOMAIN in hass.data and isinstance(hass.data[DOMAIN], dict):
-                        for entry_id, entry_data in hass.data[DOMAIN].items():
-                            # Skip if entry_data is not a dictionary or doesn't have scanner
-                            if (
-                                not isinstance(entry_data, dict)
-                                or "scanner" not in entry_data
-                            ):
-                                continue
-
-                            # Get the entry to access its data
-                            config_entries = hass.config_entries
-                            entry = next(
-                                (
-                                    e
-                                    for e in config_entries.async_entries(DOMAIN)
-                                    if e.entry_id == entry_id
-                                ),
-                                None,
-                            )
-
-                            if not entry:
-                                continue
-
-                            config = entry.as_dict()
-                            mqtt_topic = config.get("data", {}).get("mqtt_topic")
-
-                            if mqtt_topic:
-                                mqtt_topics.append(mqtt_topic)
-                except Exception as topics_err:
-                    _LOGGER.warning(
-                        f"Error getting MQTT topics from domain data: {topics_err}"
-                    )
-                    # Continue with default topic
-
-                # If no topics found, use a default
-                if not mqtt_topics:
-                    _LOGGER.info(
-                        "No MQTT topics found in config entries, using default topic"
-                    )
-                    mqtt_topics = ["gw/#"]
-
-                _LOGGER.info(f"MQTT topics to reconnect: {mqtt_topics}")
+                # Find all gateway entries that have an MQTT subscription
+                entry_ids = [
+                    entry_id
+                    for entry_id, entry_data in hass.data.get(DOMAIN, {}).items()
+                    if isinstance(entry_data, dict)
+                    and "scanner" in entry_data
+                    and _entry_mqtt_topic(hass, entry_id)
+                ]
 
                 # Check MQTT component availability
                 if not hass.data.get("mqtt"):
@@ -1188,7 +1835,7 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
                             # For direct processing without scanners, create a fallback handler
                             # that processes the message and calls _async_on_advertisement directly
                             if DOMAIN not in hass.data or not any(
-                                "scanner" in entry_data
+                                isinstance(entry_data, dict) and "scanner" in entry_data
                                 for entry_data in hass.data.get(DOMAIN, {}).values()
                             ):
                                 _LOGGER.warning(
@@ -1244,7 +1891,7 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
                                 scanner = entry_data["scanner"]
                                 scanner_count += 1
                                 try:
-                                    await scanner.async_on_mqtt_message(msg)
+                                    scanner.async_on_mqtt_message(msg)
                                 except Exception as handler_err:
                                     _LOGGER.error(
                                         f"Error in scanner MQTT message handler: {handler_err}"
@@ -1278,59 +1925,32 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
 
                     simple_mqtt_reconnect.handler = global_safe_mqtt_handler
 
-                # Subscribe to all topics
-                success = False
-
-                # Safely access our persistent handler
-                global_handler = simple_mqtt_reconnect.handler
-
-                for topic in mqtt_topics:
+                if entry_ids:
+                    # Resubscribe every gateway at once instead of topic by topic
+                    latencies = await _async_resubscribe_entries(hass, entry_ids)
+                else:
+                    # If no gateways are set up, listen on a default topic
+                    _LOGGER.info(
+                        "No MQTT topics found in config entries, using default topic"
+                    )
+                    topic = "gw/#"
+                    started = time.monotonic()
+                    latencies = {topic: None}
                     try:
-                        _LOGGER.info(f"Subscribing to MQTT topic: {topic}")
-
-                        # Try to unsubscribe first to clean up any existing subscriptions
-                        try:
-                            # Unsubscribe using wildcard to catch any existing handlers
-                            # This is a defensive measure to ensure we don't have multiple handlers
-                            # We don't pass a callback to unsubscribe from all handlers on this topic
-                            await mqtt.async_unsubscribe(hass, topic)
-                            _LOGGER.debug(f"Unsubscribed from {topic}")
-                        except Exception as unsub_err:
-                            _LOGGER.debug(
-                                f"Error unsubscribing from {topic}: {unsub_err}"
-                            )
-                            # Continue anyway
-
-                        # Add a small delay to ensure unsubscribe completes
-                        await asyncio.sleep(0.5)
-
-                        # Try to subscribe with our global safe handler
-                        subscription = await mqtt.async_subscribe(
-                            hass, topic, global_handler, encoding=None
+                        if hasattr(simple_mqtt_reconnect, "unsubscribe"):
+                            simple_mqtt_reconnect.unsubscribe()
+                        simple_mqtt_reconnect.unsubscribe = await mqtt.async_subscribe(
+                            hass, topic, simple_mqtt_reconnect.handler, encoding=None
                         )
-
-                        if subscription:
-                            _LOGGER.info(
-                                f"Successfully subscribed to {topic} with global handler"
-                            )
-                            success = True
-                        else:
-                            _LOGGER.error(f"Failed to subscribe to {topic}")
-
+                        latencies[topic] = time.monotonic() - started
                     except Exception as mqtt_err:
                         _LOGGER.error(f"Error subscribing to {topic}: {mqtt_err}")
 
-                # Short delay to ensure MQTT subscription is established
-                await asyncio.sleep(2)
-
-                # Store MQTT subscriptions in component data for future reference
-                if DOMAIN in hass.data:
-                    for entry_id in hass.data[DOMAIN]:
-                        if isinstance(hass.data[DOMAIN][entry_id], dict):
-                            hass.data[DOMAIN][entry_id]["mqtt_topics"] = mqtt_topics
-                            hass.data[DOMAIN][entry_id][
-                                "last_reconnect"
-                            ] = datetime.datetime.now().isoformat()
+                success = any(latency is not None for latency in latencies.values())
+                _LOGGER.info(
+                    "Resubscribe latency per topic: %s",
+                    _format_latencies(latencies),
+                )
 
                 # Update gateway sensor state if available
                 try:
@@ -1364,7 +1984,8 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
                             "create",
                             {
                                 "title": "BLE Gateway Reconnect",
-                                "message": f"Successfully subscribed to MQTT topics: {', '.join(mqtt_topics)}",
+                                "message": "Successfully subscribed to MQTT topics: "
+                                + _format_latencies(latencies),
                                 "notification_id": "ble_gateway_reconnect",
                             },
                         )
@@ -1374,7 +1995,8 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
                             "create",
                             {
                                 "title": "BLE Gateway Reconnect",
-                                "message": "Failed to resubscribe to MQTT topics.",
+                                "message": "Failed to resubscribe to MQTT topics: "
+                                + _format_latencies(latencies),
                                 "notification_id": "ble_gateway_reconnect",
                             },
                         )
@@ -1399,6 +2021,9 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
             except Exception:
                 pass  # Silently ignore notification errors
             return False
+        finally:
+            if holds_flag:
+                hass.data[DOMAIN]["reconnect_in_progress"] = False
 
     # Register the simple MQTT reconnect service
     async_register_admin_service(
@@ -1413,6 +2038,35 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     return True
 
 
+def _read_manifest_version() -> str:
+    """Read the installed version from manifest.json (blocking)."""
+    manifest_path = os.path.join(os.path.dirname(__file__), "manifest.json")
+    with open(manifest_path) as f:
+        return json.load(f)["version"]
+
+
+async def _async_manifest_version(hass: HomeAssistant) -> str:
+    """Return the installed version without blocking the event loop.
+
+    During startup all entries await the same executor read. Once Home
+    Assistant is running (an entry reload, possibly after an update) the
+    manifest is read again so a changed version is still noticed.
+    """
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    read = domain_data.get("manifest_version")
+    if hass.is_running or read is None:
+        read = domain_data["manifest_version"] = hass.async_add_executor_job(
+            _read_manifest_version
+        )
+    try:
+        return await read
+    except Exception:
+        # Don't hand a failed read to every later caller
+        if domain_data.get("manifest_version") is read:
+            del domain_data["manifest_version"]
+        raise
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up April Brother BLE Gateway from a config entry."""
 
@@ -1423,12 +2077,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     stored_version = hass.data.get(DOMAIN, {}).get("version")
 
     # Get current version from manifest
-    import json
-    import os
-    manifest_path = os.path.join(os.path.dirname(__file__), "manifest.json")
-    with open(manifest_path) as f:
-        manifest = json.load(f)
-    current_version = manifest["version"]
+    current_version = await _async_manifest_version(hass)
 
     if stored_version and stored_version != current_version:
         ir.async_create_issue(
@@ -1458,14 +2107,58 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         source_id,
         entry.title,
         connector=connector,
+        useful_rssi=entry.options.get(CONF_USEFUL_RSSI, DEFAULT_USEFUL_RSSI),
+        max_devices=entry.options.get(CONF_MAX_DEVICES, DEFAULT_MAX_DEVICES),
+        ignore_nrpa=entry.options.get(CONF_IGNORE_NRPA, False),
+        collapse_random=entry.options.get(CONF_COLLAPSE_RANDOM, False),
+        summary_window=entry.options.get(CONF_SUMMARY_WINDOW, DEFAULT_SUMMARY_WINDOW),
+        smoothing=entry.options.get(CONF_SMOOTHING, SMOOTHING_NONE),
     )
+    scanner.entry_id = entry.entry_id
+    scanner.rules = hass.data[DOMAIN].get("rules")
+    scanner.fanout = hass.data[DOMAIN].get("fanout")
+    entry.async_on_unload(entry.add_update_listener(_async_options_updated))
+
+    tracked_addresses = parse_addresses(entry.options.get(CONF_TRACKED_DEVICES, ""))
+    if tracked_addresses:
+        scanner.tracked = TrackedDevices(
+            hass,
+            tracked_addresses,
+            entry.options.get(CONF_WRITE_INTERVAL, DEFAULT_WRITE_INTERVAL),
+            entry.options.get(CONF_RSSI_THRESHOLD, DEFAULT_RSSI_THRESHOLD),
+        )
+        entry.async_on_unload(
+            async_track_time_interval(
+                hass,
+                scanner.tracked.async_tick,
+                datetime.timedelta(seconds=TRACKING_TICK),
+            )
+        )
+    _async_setup_localization(hass, entry, scanner)
+
+    aggregation_window = entry.options.get(
+        CONF_AGGREGATION_WINDOW, DEFAULT_AGGREGATION_WINDOW
+    )
+    if aggregation_window:
+        scanner.aggregator = Aggregator(
+            aggregation_window,
+            entry.options.get(CONF_AGGREGATION_RSSI, AGGREGATION_MAX),
+        )
+        entry.async_on_unload(
+            async_track_time_interval(
+                hass,
+                scanner.async_flush_aggregated,
+                datetime.timedelta(seconds=aggregation_window),
+            )
+        )
 
     config = entry.as_dict()
+    connection = entry.data.get(CONF_CONNECTION, CONNECTION_MQTT)
 
     # Get mqtt_topic from the correct location in config
     mqtt_topic = config.get("data", {}).get("mqtt_topic")
 
-    if not mqtt_topic:
+    if connection == CONNECTION_MQTT and not mqtt_topic:
         _LOGGER.error("Missing mqtt_topic in configuration")
         return False
 
@@ -1488,6 +2181,22 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     except Exception as err:
         _LOGGER.warning(f"Could not create gateway sensor: {err}")
 
+    last_seen_store = LastSeenStore(hass, entry.entry_id)
+
+    if connection == CONNECTION_HTTP:
+        _async_setup_http_ingest(hass, entry)
+        unregister = async_register_scanner(hass, scanner, 1)
+        hass.data[DOMAIN][entry.entry_id] = {
+            "scanner": scanner,
+            "unregister": unregister,
+            "last_seen_store": last_seen_store,
+            "hass": hass,
+        }
+        scanner.entry_data = hass.data[DOMAIN][entry.entry_id]
+        await _async_warm_start(scanner, last_seen_store)
+        await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+        return True
+
     # Set up the MQTT subscription with proper error handling
     try:
         _LOGGER.info(f"Subscribing to MQTT topic: {mqtt_topic}")
@@ -1518,8 +2227,14 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     hass.data[DOMAIN][entry.entry_id] = {
         "scanner": scanner,
         "unregister": unregister,
+        "unsubscribe": subscription,
+        "last_seen_store": last_seen_store,
         "hass": hass,  # Store hass reference for use in the scanner
     }
+    scanner.entry_data = hass.data[DOMAIN][entry.entry_id]
+
+    await _async_warm_start(scanner, last_seen_store)
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
     # We've already created the gateway sensor above, so nothing more to do here
     _LOGGER.info("BLE Gateway integration setup complete")
@@ -1527,6 +2242,147 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     return True
 
 
+async def _async_options_updated(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Apply changed scanner options in place, without reloading the entry."""
+    entry_data = hass.data.get(DOMAIN, {}).get(entry.entry_id)
+    if not isinstance(entry_data, dict) or "scanner" not in entry_data:
+        return
+    scanner = entry_data["scanner"]
+    # The filtering may have been pushed to the gateway, read it again
+    entry_data.pop("gateway_profile", None)
+    scanner.traffic.useful_rssi = entry.options.get(
+        CONF_USEFUL_RSSI, DEFAULT_USEFUL_RSSI
+    )
+    max_devices = entry.options.get(CONF_MAX_DEVICES, DEFAULT_MAX_DEVICES)
+    smoothing = entry.options.get(CONF_SMOOTHING, SMOOTHING_NONE)
+    current_smoothing = (
+        scanner.smoother.method if scanner.smoother is not None else SMOOTHING_NONE
+    )
+    scanner.max_devices = max_devices
+    if smoothing != current_smoothing or (
+        scanner.smoother is not None and scanner.smoother.capacity <= max_devices
+    ):
+        scanner.async_set_smoothing(smoothing)
+    scanner.ignore_nrpa = entry.options.get(CONF_IGNORE_NRPA, False)
+    scanner.async_set_collapse_random(entry.options.get(CONF_COLLAPSE_RANDOM, False))
+    scanner.summary.window = (
+        entry.options.get(CONF_SUMMARY_WINDOW, DEFAULT_SUMMARY_WINDOW) * 60
+    )
+
+    _async_setup_localization(hass, entry, scanner)
+
+    tracked_addresses = parse_addresses(entry.options.get(CONF_TRACKED_DEVICES, ""))
+    current = list(scanner.tracked.devices) if scanner.tracked is not None else []
+    aggregation = (
+        entry.options.get(CONF_AGGREGATION_WINDOW, DEFAULT_AGGREGATION_WINDOW),
+        entry.options.get(CONF_AGGREGATION_RSSI, AGGREGATION_MAX),
+    )
+    current_aggregation = (
+        (scanner.aggregator.window, scanner.aggregator.rssi_mode)
+        if scanner.aggregator is not None
+        else (0, AGGREGATION_MAX)
+    )
+    if not aggregation[0]:
+        aggregation = (0, AGGREGATION_MAX)
+    if tracked_addresses != current or aggregation != current_aggregation:
+        # Entities or timers have to be added or removed
+        hass.async_create_task(hass.config_entries.async_reload(entry.entry_id))
+    elif scanner.tracked is not None:
+        scanner.tracked.interval = entry.options.get(
+            CONF_WRITE_INTERVAL, DEFAULT_WRITE_INTERVAL
+        )
+        scanner.tracked.threshold = entry.options.get(
+            CONF_RSSI_THRESHOLD, DEFAULT_RSSI_THRESHOLD
+        )
+
+
+@callback
+def _async_setup_localization(
+    hass: HomeAssistant, entry: ConfigEntry, scanner: AbBleScanner
+) -> None:
+    """Register a gateway's position and tracked devices with the localizer."""
+    position = parse_position(entry.options.get(CONF_POSITION, ""))
+    localizer = hass.data[DOMAIN].get("localizer")
+    if localizer is None:
+        if position is not None:
+            _LOGGER.warning("Room localization needs numpy, which is not installed")
+        return
+    scanner.localizer = localizer
+    if position is None:
+        localizer.remove_entry(entry.entry_id)
+    else:
+        localizer.set_gateway(
+            entry.entry_id,
+            position,
+            entry.options.get(CONF_ROOM) or entry.title,
+            entry.options.get(CONF_TX_POWER, DEFAULT_TX_POWER),
+            entry.options.get(CONF_PATH_LOSS, DEFAULT_PATH_LOSS),
+        )
+    localizer.set_devices(
+        entry.entry_id,
+        parse_addresses(entry.options.get(CONF_TRACKED_DEVICES, "")),
+    )
+
+
+@callback
+def _async_localization_tick(hass: HomeAssistant, *_) -> None:
+    """Localize all tracked devices and publish the ones that moved."""
+    localizer = hass.data[DOMAIN]["localizer"]
+    for address in localizer.tick(time.monotonic()):
+        result = localizer.results[address]
+        gateway = result["gateway"] and hass.config_entries.async_get_entry(
+            result["gateway"]
+        )
+        hass.states.async_set(
+            f"sensor.ble_room_{address.replace(':', '').lower()}",
+            result["room"] or "unknown",
+            {
+                "friendly_name": f"BLE room {address}",
+                "address": address,
+                "gateway": gateway.title if gateway else None,
+                "x": result["x"],
+                "y": result["y"],
+                "icon": "mdi:map-marker-radius",
+            },
+        )
+
+
+async def _async_warm_start(scanner: AbBleScanner, store: LastSeenStore) -> None:
+    """Replay devices seen shortly before the last shutdown."""
+    records = await store.async_load()
+    if records:
+        _LOGGER.info(f"Replaying {len(records)} devices seen before restart")
+        scanner.async_replay(records)
+
+
+@callback
+def _async_setup_http_ingest(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Make sure an HTTP gateway has an ingest token and tell the user its URL."""
+    if entry.data.get(CONF_HTTP_TOKEN):
+        return
+
+    hass.config_entries.async_update_entry(
+        entry, data={**entry.data, CONF_HTTP_TOKEN: secrets.token_urlsafe(24)}
+    )
+    path = INGEST_URL.format(entry_id=entry.entry_id)
+    try:
+        base_url = get_url(hass, prefer_external=False)
+    except NoURLAvailableError:
+        base_url = "http://<home-assistant>:8123"
+    hass.async_create_task(
+        hass.services.async_call(
+            "persistent_notification",
+            "create",
+            {
+                "title": "BLE Gateway HTTP Endpoint",
+                "message": f"Set the HTTP URL of gateway {entry.title} to "
+                f"{base_url}{path}?token={entry.data[CONF_HTTP_TOKEN]}",
+                "notification_id": f"ble_gateway_http_{entry.entry_id}",
+            },
+        )
+    )
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
@@ -1534,6 +2390,14 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             # Unregister the scanner
             if "unregister" in hass.data[DOMAIN][entry.entry_id]:
                 hass.data[DOMAIN][entry.entry_id]["unregister"]()
+            if "unsubscribe" in hass.data[DOMAIN][entry.entry_id]:
+                hass.data[DOMAIN][entry.entry_id]["unsubscribe"]()
+            if "localizer" in hass.data[DOMAIN]:
+                hass.data[DOMAIN]["localizer"].remove_entry(entry.entry_id)
+            if "last_seen_store" in hass.data[DOMAIN][entry.entry_id]:
+                await hass.data[DOMAIN][entry.entry_id]["last_seen_store"].async_save(
+                    hass.data[DOMAIN][entry.entry_id]["scanner"].last_seen
+                )
 
             # Remove data
             hass.data[DOMAIN].pop(entry.entry_id)
@@ -0,0 +1,174 @@
+"""Traffic analysis and req-int/dup-filter/min-rssi tuning advice per gateway."""
+
+from __future__ import annotations
+
+import logging
+import math
+import time
+
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    CONF_AUTO_TUNE,
+    CONF_DUP_FILTER,
+    CONF_MIN_RSSI,
+    CONF_RECORDS_BUDGET,
+    CONF_REQ_INT,
+    DEFAULT_RECORDS_BUDGET,
+    DEFAULT_USEFUL_RSSI,
+    DOMAIN,
+    GATEWAY_FILTER_KEYS,
+)
+from .gateway import async_apply_profile, async_fetch_profile, format_diff
+
+_LOGGER = logging.getLogger(__name__)
+
+# Don't give advice on less traffic than this per analysis window
+MIN_RECORDS = 100
+# Above this share of repeated payloads the gateway's dup-filter pays off
+DUP_RATIO_THRESHOLD = 0.2
+# Only raise min-rssi if at least this share of records is below useful RSSI
+WEAK_SHARE_THRESHOLD = 0.1
+MAX_REQ_INT = 10
+# Bound the duplicate detection set so a busy window can't grow it forever
+MAX_SEEN_PAYLOADS = 50000
+
+
+class TrafficStats:
+    """Per gateway traffic counters, updated for every frame and record."""
+
+    def __init__(self, useful_rssi=DEFAULT_USEFUL_RSSI):
+        """Initialize the counters."""
+        self.useful_rssi = useful_rssi
+        self.reset()
+
+    def reset(self):
+        """Start a new measurement window."""
+        self.started = time.monotonic()
+        self.frames = 0
+        self.bytes = 0
+        self.records = 0
+        self.duplicates = 0
+        self.weak = 0
+        self._seen = set()
+
+    def add_frame(self, size: int):
+        """Count a received frame of `size` bytes."""
+        self.frames += 1
+        self.bytes += size
+
+    def add_record(self, key, rssi: int):
+        """Count a decoded record; `key` identifies its payload without RSSI."""
+        self.records += 1
+        if rssi < self.useful_rssi:
+            self.weak += 1
+        if key in self._seen:
+            self.duplicates += 1
+        elif len(self._seen) < MAX_SEEN_PAYLOADS:
+            self._seen.add(key)
+
+    def snapshot(self) -> dict:
+        """Return the measured rates for the current window."""
+        elapsed = max(time.monotonic() - self.started, 1e-3)
+        records = self.records
+        return {
+            "window": round(elapsed, 1),
+            "frames": self.frames,
+            "records": records,
+            "records_per_second": records / elapsed,
+            "records_per_frame": records / self.frames if self.frames else 0,
+            "frame_size": self.bytes / self.frames if self.frames else 0,
+            "duplicate_ratio": self.duplicates / records if records else 0,
+            "weak_share": self.weak / records if records else 0,
+        }
+
+
+def recommend(stats: dict, current: dict, budget: float, useful_rssi: int) -> dict:
+    """Recommend req_int, dup_filter and min_rssi to stay within `budget` rec/s."""
+    req_int = current.get(CONF_REQ_INT) or 1
+    dup_filter = current.get(CONF_DUP_FILTER) or 0
+    min_rssi = current.get(CONF_MIN_RSSI, -127)
+    projected = stats["records_per_second"]
+
+    if stats["duplicate_ratio"] >= DUP_RATIO_THRESHOLD or projected > budget:
+        dup_filter = 1
+    if dup_filter and not current.get(CONF_DUP_FILTER):
+        projected *= 1 - stats["duplicate_ratio"]
+
+    if projected > budget and stats["weak_share"] >= WEAK_SHARE_THRESHOLD:
+        if min_rssi < useful_rssi:
+            min_rssi = useful_rssi
+            projected *= 1 - stats["weak_share"]
+
+    # With dup-filter on, a longer req-int collapses repeats of the same
+    # payload, so records/s scale down roughly with the interval
+    if dup_filter and projected > budget:
+        req_int = min(MAX_REQ_INT, math.ceil(req_int * projected / budget))
+    elif projected < budget / 4 and req_int > 1:
+        req_int = max(1, math.floor(req_int * projected * 2 / budget))
+
+    return {CONF_REQ_INT: req_int, CONF_DUP_FILTER: dup_filter, CONF_MIN_RSSI: min_rssi}
+
+
+async def async_run_advisor(hass: HomeAssistant, *_) -> None:
+    """Analyze every gateway's last window and advise (or apply) new settings."""
+    domain_data = hass.data.get(DOMAIN, {})
+    for entry in hass.config_entries.async_entries(DOMAIN):
+        entry_data = domain_data.get(entry.entry_id)
+        if not isinstance(entry_data, dict) or "scanner" not in entry_data:
+            continue
+        traffic = entry_data["scanner"].traffic
+        stats = traffic.snapshot()
+        traffic.reset()
+        if stats["records"] < MIN_RECORDS:
+            continue
+
+        # Advise against what the gateway runs with, it may never have been
+        # configured from HA
+        try:
+            profile = await async_fetch_profile(hass, entry, cache=False)
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.debug("Could not read config of %s: %s", entry.title, err)
+            continue
+        entry_data["gateway_profile"] = profile
+        current = {
+            CONF_REQ_INT: profile.get(CONF_REQ_INT, 1),
+            CONF_DUP_FILTER: profile.get(CONF_DUP_FILTER, 0),
+            CONF_MIN_RSSI: profile.get(CONF_MIN_RSSI, -127),
+        }
+        advice = recommend(
+            stats,
+            current,
+            entry.options.get(CONF_RECORDS_BUDGET, DEFAULT_RECORDS_BUDGET),
+            traffic.useful_rssi,
+        )
+        changes = {key: value for key, value in advice.items() if current[key] != value}
+        entry_data["advisor"] = {**stats, "recommendation": advice}
+        if not changes:
+            continue
+
+        _LOGGER.info(
+            "Gateway %s at %.1f records/s (%.0f%% duplicates, %.0f%% weak): "
+            "recommended %s",
+            entry.title,
+            stats["records_per_second"],
+            stats["duplicate_ratio"] * 100,
+            stats["weak_share"] * 100,
+            format_diff(
+                {
+                    GATEWAY_FILTER_KEYS[key]: (current[key], value)
+                    for key, value in changes.items()
+                }
+            ),
+        )
+        if not entry.options.get(CONF_AUTO_TUNE):
+            continue
+
+        result = (await async_apply_profile(hass, [entry], changes))[entry.entry_id]
+        if isinstance(result, Exception):
+            _LOGGER.warning("Auto-tune of %s failed: %s", entry.title, result)
+            continue
+        profile.update(changes)
+        hass.config_entries.async_update_entry(
+            entry, options={**entry.options, **changes}
+        )
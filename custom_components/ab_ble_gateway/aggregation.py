@@ -0,0 +1,59 @@
+"""Collect records per MAC over a window and dispatch one per MAC."""
+
+from __future__ import annotations
+
+from statistics import median_low
+
+from .const import AGGREGATION_MAX, AGGREGATION_MEDIAN
+
+
+class Aggregator:
+    """Per-window buffer of the records of each address.
+
+    add() updates the buffer in place; swap() hands the filled buffer to
+    the caller and starts an empty one, so collection continues while the
+    previous window is dispatched.
+    """
+
+    def __init__(self, window: float, rssi_mode=AGGREGATION_MAX) -> None:
+        """Initialize an empty buffer flushed every `window` seconds."""
+        self.window = window
+        self.rssi_mode = rssi_mode
+        self.median = rssi_mode == AGGREGATION_MEDIAN
+        # {address: [samples, max rssi, [rssi, ...] or None, latest advertisement]}
+        self._pending = {}
+
+    def add(self, address: str, rssi: int, advertisement: tuple) -> None:
+        """Add a record; `advertisement` is the latest payload of the address."""
+        entry = self._pending.get(address)
+        if entry is None:
+            self._pending[address] = [
+                1,
+                rssi,
+                [rssi] if self.median else None,
+                advertisement,
+            ]
+            return
+        entry[0] += 1
+        if rssi > entry[1]:
+            entry[1] = rssi
+        if entry[2] is not None:
+            entry[2].append(rssi)
+        entry[3] = advertisement
+
+    def swap(self) -> list[tuple[str, int, int, tuple]]:
+        """Close the window: return [(address, rssi, samples, advertisement)]."""
+        pending, self._pending = self._pending, {}
+        return [
+            (
+                address,
+                median_low(rssis) if rssis is not None else max_rssi,
+                samples,
+                advertisement,
+            )
+            for address, (samples, max_rssi, rssis, advertisement) in pending.items()
+        ]
+
+    def __len__(self) -> int:
+        """Return the number of addresses in the open window."""
+        return len(self._pending)
@@ -0,0 +1,128 @@
+"""Collapse rotating private addresses into one logical device."""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+import time
+
+from .const import (
+    ALIAS_OVERLAP,
+    ALIAS_RSSI_DELTA,
+    ALIAS_WINDOW,
+    DEFAULT_MAX_DEVICES,
+)
+
+
+class _Device:
+    """A logical device and the address it currently advertises with."""
+
+    __slots__ = ("address", "current", "since", "last_seen", "rssi", "aliases")
+
+    def __init__(self, address: str, rssi: int, now: float):
+        """Initialize a device first seen with `address`."""
+        self.address = address
+        self.current = address
+        self.since = now
+        self.last_seen = now
+        self.rssi = rssi
+        self.aliases = 0
+
+
+class AliasTable:
+    """Map rotating addresses to the logical device they belong to.
+
+    Phones and wearables pick a new random address every few minutes. A new
+    address is taken for the next address of a known device with the same
+    payload fingerprint, heard within ALIAS_WINDOW seconds and at an RSSI
+    within ALIAS_RSSI_DELTA dB; the closest RSSI wins.
+
+    A fingerprint only tells the kind of device apart, all iPhones in range
+    share one. If a device's previous address keeps advertising more than
+    ALIAS_OVERLAP seconds after its new one appeared, these are two devices
+    and the new address is split off again.
+
+    The table holds at most max_aliases addresses, least recently seen are
+    dropped first; a device is forgotten with its last alias.
+    """
+
+    def __init__(self, max_aliases=DEFAULT_MAX_DEVICES):
+        """Initialize an empty alias table."""
+        self.max_aliases = max_aliases
+        # {address: (device, fingerprint)}, least recently seen first
+        self._aliases = OrderedDict()
+        # {fingerprint: [device, ...]}
+        self._devices = {}
+        self.collapsed = 0
+        self.split = 0
+
+    def __len__(self) -> int:
+        """Return the number of known aliases."""
+        return len(self._aliases)
+
+    def resolve(self, address: str, fingerprint: bytes, rssi: int, now=None) -> str:
+        """Return the logical address for `address` advertising `fingerprint`."""
+        if now is None:
+            now = time.monotonic()
+        alias = self._aliases.get(address)
+        if alias is not None:
+            self._aliases.move_to_end(address)
+            device = alias[0]
+            if address != device.current:
+                if now - device.since <= ALIAS_OVERLAP:
+                    # Last advertisements of the old address, e.g. in the
+                    # same frame as the first ones of the new address
+                    return device.address
+                newest = self._aliases.get(device.current)
+                if newest is not None and newest[0] is device:
+                    self._split(device, alias[1])
+                device.current = address
+            device.last_seen = now
+            device.rssi = rssi
+            return device.address
+
+        device = self._match(fingerprint, rssi, now)
+        if device is None:
+            device = _Device(address, rssi, now)
+            self._devices.setdefault(fingerprint, []).append(device)
+        else:
+            self.collapsed += 1
+            device.current = address
+            device.since = device.last_seen = now
+            device.rssi = rssi
+        device.aliases += 1
+        self._aliases[address] = (device, fingerprint)
+
+        while len(self._aliases) > self.max_aliases:
+            _, (evicted, evicted_fingerprint) = self._aliases.popitem(last=False)
+            self._release(evicted, evicted_fingerprint)
+        return device.address
+
+    def _match(self, fingerprint: bytes, rssi: int, now: float) -> _Device | None:
+        """Return the recently heard device a new address most likely belongs to."""
+        best = None
+        best_delta = ALIAS_RSSI_DELTA + 1
+        for device in self._devices.get(fingerprint, ()):
+            delta = abs(device.rssi - rssi)
+            if now - device.last_seen <= ALIAS_WINDOW and delta < best_delta:
+                best, best_delta = device, delta
+        return best
+
+    def _split(self, device: _Device, fingerprint: bytes) -> None:
+        """Make the newest address of `device` a device of its own."""
+        self.split += 1
+        address = device.current
+        newer = _Device(address, device.rssi, device.since)
+        newer.last_seen = device.last_seen
+        newer.aliases = 1
+        self._aliases[address] = (newer, fingerprint)
+        self._devices[fingerprint].append(newer)
+        self._release(device, fingerprint)
+
+    def _release(self, device: _Device, fingerprint: bytes) -> None:
+        """Drop one alias of `device`, and the device with its last alias."""
+        device.aliases -= 1
+        if not device.aliases:
+            devices = self._devices[fingerprint]
+            devices.remove(device)
+            if not devices:
+                del self._devices[fingerprint]
@@ -0,0 +1,35 @@
+"""JSON codec for frames and files: orjson when importable, else stdlib json.
+
+Both accept bytes without decoding them first; dumps() returns bytes.
+Decode errors are ValueError subclasses in either case.
+"""
+
+from __future__ import annotations
+
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+if orjson is not None:
+
+    def loads(data: bytes | bytearray | str):
+        """Parse a JSON document."""
+        return orjson.loads(data)
+
+    def dumps(obj) -> bytes:
+        """Serialize to compact UTF-8 JSON; non-string keys become strings."""
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+else:
+
+    def loads(data: bytes | bytearray | str):
+        """Parse a JSON document."""
+        return json.loads(data)
+
+    def dumps(obj) -> bytes:
+        """Serialize to compact UTF-8 JSON; non-string keys become strings."""
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
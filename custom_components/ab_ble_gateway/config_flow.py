@@ -1,5 +1,8 @@
 """Config flow for  devices."""
 
+from __future__ import annotations
+
+import asyncio
 import errno
 from functools import partial
 import logging
@@ -11,10 +14,62 @@ from homeassistant.components import mqtt, zeroconf
 from homeassistant.components.mqtt.const import CONF_BROKER
 from homeassistant.components.mqtt.models import DATA_MQTT, DATA_MQTT_AVAILABLE
 from homeassistant.exceptions import HomeAssistantError
-import requests
+import aiohttp
 import voluptuous as vol
 
-from .const import DOMAIN
+from .const import (
+    AGGREGATION_MAX,
+    AGGREGATION_MEDIAN,
+    CONF_ADV_FILTER,
+    CONF_AGGREGATION_RSSI,
+    CONF_AGGREGATION_WINDOW,
+    CONF_APPLY_TO_ALL,
+    CONF_AUTO_TUNE,
+    CONF_COLLAPSE_RANDOM,
+    CONF_CONNECTION,
+    CONF_DUP_FILTER,
+    CONF_FILTER_MFG,
+    CONF_FILTER_UUID,
+    CONF_IGNORE_NRPA,
+    CONF_MAX_DEVICES,
+    CONF_MIN_RSSI,
+    CONF_PATH_LOSS,
+    CONF_POSITION,
+    CONF_RECORDS_BUDGET,
+    CONF_REDACT_MACS,
+    CONF_REQ_INT,
+    CONF_ROOM,
+    CONF_RSSI_THRESHOLD,
+    CONF_SMOOTHING,
+    CONF_SUMMARY_WINDOW,
+    CONF_TRACKED_DEVICES,
+    CONF_TX_POWER,
+    CONF_USEFUL_RSSI,
+    CONF_WRITE_INTERVAL,
+    CONNECTION_HTTP,
+    CONNECTION_MQTT,
+    DEFAULT_AGGREGATION_WINDOW,
+    DEFAULT_MAX_DEVICES,
+    DEFAULT_PATH_LOSS,
+    DEFAULT_RECORDS_BUDGET,
+    DEFAULT_RSSI_THRESHOLD,
+    DEFAULT_SUMMARY_WINDOW,
+    DEFAULT_TX_POWER,
+    DEFAULT_USEFUL_RSSI,
+    DEFAULT_WRITE_INTERVAL,
+    DOMAIN,
+    GATEWAY_FILTER_KEYS,
+    SMOOTHING_METHODS,
+    SMOOTHING_NONE,
+)
+from .gateway import (
+    async_apply_profile,
+    async_fetch_config,
+    async_probe,
+    entry_connection,
+    format_diff,
+    gateway_to_profile,
+)
 
 try:
     # Use the new recommended location for ZeroconfServiceInfo
@@ -41,6 +96,7 @@ from homeassistant.const import (
     CONF_UNIQUE_ID,
     CONF_USERNAME,
 )
+from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.debounce import Debouncer
@@ -50,11 +106,42 @@ from homeassistant.helpers.debounce import Debouncer
 _LOGGER = logging.getLogger(__name__)
 
 
+def mqtt_config_error(hass, gateway_config: dict) -> str | None:
+    """Return why a gateway's MQTT settings don't match HA's broker, if they don't."""
+    mqtt_data = hass.data.get(DATA_MQTT)
+    if (
+        mqtt_data is None
+        or mqtt_data.client is None
+        or not mqtt.util.mqtt_config_entry_enabled(hass)
+    ):
+        return "mqtt_not_enabled"
+    mqtt_config = mqtt_data.client.conf
+    if (
+        gateway_config["conn-type"] != 3
+    ):  # 3 is the conn-type for MQTT (1 is websocket, 2 is HTTP)
+        return "gateway_mqtt_not_configured"
+    if gateway_config["host"] != mqtt_config.get(CONF_BROKER) or gateway_config[
+        "port"
+    ] != mqtt_config.get(CONF_PORT):
+        return "mqtt_broker_mismatch"
+    if gateway_config["mqtt-username"] != (
+        mqtt_config.get(CONF_USERNAME) or ""
+    ) or gateway_config["mqtt-password"] != (mqtt_config.get(CONF_PASSWORD) or ""):
+        return "mqtt_auth_mismatch"
+    return None
+
+
 class AbBleFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a AbBle config flow."""
 
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        """Get the options flow for this handler."""
+        return AbBleOptionsFlowHandler(config_entry)
+
     async def async_step_zeroconf(
         self, discovery_info: ZeroconfServiceInfo
     ) -> FlowResult:
@@ -89,20 +176,6 @@ class AbBleFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
         }
         return await self.async_step_confirm()
 
-    def get_info(self, host, port):
-        """Fetch info from gateway"""
-        return requests.get("http://{}:{}/info".format(host, port), timeout=5).json()
-
-    def get_config(self, host, port, username=None, password=None):
-        """Fetch config from gateway"""
-        auth = None
-        if username or password:
-            _LOGGER.debug("setting username + password")
-            auth = requests.auth.HTTPBasicAuth(username, password)
-        return requests.get(
-            "http://{}:{}/config".format(host, port), timeout=5, auth=auth
-        ).json()
-
     async def async_step_confirm(self, user_input=None):
         """Handle user-confirmation of discovered node."""
 
@@ -115,8 +188,11 @@ class AbBleFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
         """
 
         errors = {}
-        if user_input:
+        if user_input is not None:
+            if self.config.get(CONF_CONNECTION) == CONNECTION_HTTP:
+                return await self._async_get_entry()
             # check connection and bail
+            self.config[CONF_CONNECTION] = CONNECTION_MQTT
             self.config["mqtt_id_prefix"] = user_input["mqtt_id_prefix"]
             self.config["mqtt_topic"] = user_input["mqtt_topic"]
             self.config["mqtt_user"] = (
@@ -148,8 +224,15 @@ class AbBleFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
             else (self.config[CONF_PASSWORD] if CONF_PASSWORD in self.config else None)
         )
 
+        gateway_config = None
         if host is not None and port is not None:
-            details = await self.hass.async_add_executor_job(self.get_info, host, port)
+            try:
+                details, gateway_config = await async_probe(
+                    self.hass, host, port, username, password
+                )
+            except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+                _LOGGER.error("Could not reach gateway at %s: %s", host, err)
+                return self.async_abort(reason="cannot_connect")
             # some is set by discovery, otherwise we set it manually
             if CONF_HOST not in self.config:
                 self.config[CONF_HOST] = host
@@ -170,37 +253,32 @@ class AbBleFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
             # {"firmwareVer":"1.5.12","hardwareVer":"4.0","mac":"C4:5B:BE:8E:51:8C","sn":9326988,"validate":1,"auth":1}
 
             # if auth works, get other settings, otherwise ask for auth first
-            if details["auth"] == 0 or (username and password):
-                gateway_config = await self.hass.async_add_executor_job(
-                    self.get_config, host, port, username, password
-                )
-            else:
+            if details["auth"] != 0 and not (username and password):
                 errors["base"] = "failed_connecting"
                 _LOGGER.error("Can't fetch config, no auth set")
 
+        if gateway_config is None:
+            return self.async_abort(reason=errors.get("base", "cannot_connect"))
+
         # http://192.168.178.223/config
         # {"conn-type":3,"host":"mqtt.bconimg.com","port":1883,"mqtt-topic":"gw/test555","cfg-topic":"device-config","one-cfg-topic":"device-config-","one-pub-topic":"pub-config-","http-url":"","req-int":1,"min-rssi":-127,"adv-filter":0,"dup-filter":0,"scan-act":0,"mqtt-id-prefix":"XBG_","mqtt-username":"","mqtt-password":"","mqtt-config":0,"mqtt-retain":0,"mqtt-qos":0,"basic-auth":1,"req-format":0,"ntp-enabled":0,"ntp1":"ntp1.aliyun.com","ntp2":"ntp2.aliyun.com","mqtts":0,"https":0,"wss":0,"sch-type":0,"metadata":"","tz":"","sch-begin":"","sch-end":"","filter-mfg":0,"filter-uuid":""}
+        # conn-type 2 is HTTP: the gateway posts to our ingest view, no broker needed
+        if gateway_config["conn-type"] == 2:
+            self.config[CONF_CONNECTION] = CONNECTION_HTTP
+            return self.async_show_form(
+                step_id="confirm",
+                description_placeholders={
+                    CONF_HOST: self.config[CONF_HOST],
+                    CONF_NAME: self.config[CONF_NAME],
+                    CONF_DESCRIPTION: self.config[CONF_UNIQUE_ID],
+                },
+                data_schema=vol.Schema({}),
+                errors=errors,
+            )
+
         # make sure conn-type is 3, mqtt settings match and show an error otherwise
-        mqtt_data = self.hass.data[DATA_MQTT]
-        if mqtt_data.client is None or not mqtt.util.mqtt_config_entry_enabled(
-            self.hass
-        ):
-            errors["base"] = "mqtt_not_enabled"
-        mqtt_config = mqtt_data.client.conf
-        if (
-            gateway_config["conn-type"] != 3
-        ):  # 3 is the conn-type for MQTT (1 is websocket, 2 is HTTP)
-            errors["base"] = "gateway_mqtt_not_configured"
-
-        elif gateway_config["host"] != mqtt_config.get(CONF_BROKER) or gateway_config[
-            "port"
-        ] != mqtt_config.get(CONF_PORT):
-            errors["base"] = "mqtt_broker_mismatch"
-
-        elif gateway_config["mqtt-username"] != (
-            mqtt_config.get(CONF_USERNAME) or ""
-        ) or gateway_config["mqtt-password"] != (mqtt_config.get(CONF_PASSWORD) or ""):
-            errors["base"] = "mqtt_auth_mismatch"
+        if error := mqtt_config_error(self.hass, gateway_config):
+            errors["base"] = error
 
         data_schema = {
             vol.Required(
@@ -286,6 +364,73 @@ class AbBleFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
             errors=errors,
         )
 
+    async def async_step_import(self, import_data):
+        """Create an entry for a gateway found by the bulk importer.
+
+        The MQTT settings are taken from the gateway's own /config instead of
+        being confirmed by hand; the probe is usually still cached.
+        """
+        host = import_data[CONF_HOST]
+        port = import_data.get(CONF_PORT, 80)
+        username = import_data.get(CONF_USERNAME)
+        password = import_data.get(CONF_PASSWORD)
+        try:
+            details, gateway_config = await async_probe(
+                self.hass, host, port, username, password
+            )
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            return self.async_abort(reason="cannot_connect")
+        if gateway_config is None:
+            return self.async_abort(reason="failed_connecting")
+
+        mac = details["mac"]
+        # A zeroconf flow for the same gateway may be waiting for a confirm;
+        # it is aborted below rather than aborting this import
+        await self.async_set_unique_id(mac, raise_on_progress=False)
+        self._abort_if_unique_id_configured()
+
+        name = "xbg-" + mac.replace(":", "")[-6:].lower()
+        self.config = {
+            CONF_HOST: host,
+            CONF_HOSTS: [host],
+            CONF_PORT: port,
+            CONF_NAME: name,
+            CONF_FRIENDLY_NAME: name.upper(),
+            CONF_MAC: mac,
+            CONF_UNIQUE_ID: mac,
+        }
+        if username:
+            self.config[CONF_USERNAME] = username
+        if password:
+            self.config[CONF_PASSWORD] = password
+
+        if gateway_config["conn-type"] == 2:
+            self.config[CONF_CONNECTION] = CONNECTION_HTTP
+        elif error := mqtt_config_error(self.hass, gateway_config):
+            return self.async_abort(reason=error)
+        else:
+            self.config[CONF_CONNECTION] = CONNECTION_MQTT
+            self.config["mqtt_id_prefix"] = gateway_config["mqtt-id-prefix"]
+            self.config["mqtt_topic"] = gateway_config["mqtt-topic"]
+            self.config["mqtt_user"] = gateway_config["mqtt-username"] or None
+            self.config["mqtt_password"] = gateway_config["mqtt-password"] or None
+        self._async_abort_discoveries(host, mac)
+        return await self._async_get_entry()
+
+    @callback
+    def _async_abort_discoveries(self, host: str, mac: str) -> None:
+        """Abort zeroconf flows still waiting for a confirm of this gateway."""
+        for flow in self._async_in_progress():
+            context = flow["context"]
+            if context.get("source") != config_entries.SOURCE_ZEROCONF:
+                continue
+            unique_id = str(context.get("unique_id", "")).replace(":", "").upper()
+            if (
+                unique_id == mac.replace(":", "").upper()
+                or context.get("title_placeholders", {}).get(CONF_HOST) == host
+            ):
+                self.hass.config_entries.flow.async_abort(flow["flow_id"])
+
     async def _async_get_entry(self):
         """Return config entry or update existing config entry."""
         print("self.async_create_entry")
@@ -293,3 +438,185 @@ class AbBleFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
             title=self.config[CONF_FRIENDLY_NAME],
             data=self.config,
         )
+
+
+class AbBleOptionsFlowHandler(config_entries.OptionsFlow):
+    """Edit the gateway's source-side filtering and push it to the gateway."""
+
+    def __init__(self, config_entry):
+        """Initialize options flow."""
+        self._entry = config_entry
+        self._profile = {}
+        self._entries = []
+
+    async def async_step_init(self, user_input=None):
+        """Ask for the filtering profile."""
+        errors = {}
+        if user_input is not None:
+            apply_to_all = user_input.pop(CONF_APPLY_TO_ALL, False)
+            self._profile = user_input
+            self._entries = (
+                self.hass.config_entries.async_entries(DOMAIN)
+                if apply_to_all
+                else [self._entry]
+            )
+            return await self.async_step_preview()
+
+        current = dict(self._entry.options)
+        try:
+            gateway_config = await async_fetch_config(
+                self.hass, *entry_connection(self._entry), cache=False
+            )
+            # The options only hold what was last pushed, the gateway wins
+            current = {**current, **gateway_to_profile(gateway_config)}
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.warning("Could not read config from gateway: %s", err)
+            errors["base"] = "cannot_connect"
+
+        data_schema = {
+            vol.Required(CONF_REQ_INT, default=current.get(CONF_REQ_INT, 1)): vol.All(
+                vol.Coerce(int), vol.Range(min=0, max=3600)
+            ),
+            vol.Required(
+                CONF_MIN_RSSI, default=current.get(CONF_MIN_RSSI, -127)
+            ): vol.All(vol.Coerce(int), vol.Range(min=-127, max=0)),
+            vol.Required(
+                CONF_ADV_FILTER, default=current.get(CONF_ADV_FILTER, 0)
+            ): vol.Coerce(int),
+            vol.Required(
+                CONF_DUP_FILTER, default=current.get(CONF_DUP_FILTER, 0)
+            ): vol.All(vol.Coerce(int), vol.Range(min=0, max=1)),
+            vol.Required(
+                CONF_FILTER_MFG, default=current.get(CONF_FILTER_MFG, 0)
+            ): vol.Coerce(int),
+            vol.Optional(
+                CONF_FILTER_UUID, default=current.get(CONF_FILTER_UUID, "")
+            ): str,
+            vol.Optional(
+                CONF_AUTO_TUNE, default=current.get(CONF_AUTO_TUNE, False)
+            ): bool,
+            vol.Optional(
+                CONF_RECORDS_BUDGET,
+                default=current.get(CONF_RECORDS_BUDGET, DEFAULT_RECORDS_BUDGET),
+            ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+            vol.Optional(
+                CONF_USEFUL_RSSI,
+                default=current.get(CONF_USEFUL_RSSI, DEFAULT_USEFUL_RSSI),
+            ): vol.All(vol.Coerce(int), vol.Range(min=-127, max=0)),
+            vol.Optional(
+                CONF_MAX_DEVICES,
+                default=current.get(CONF_MAX_DEVICES, DEFAULT_MAX_DEVICES),
+            ): vol.All(vol.Coerce(int), vol.Range(min=10)),
+            vol.Optional(
+                CONF_IGNORE_NRPA, default=current.get(CONF_IGNORE_NRPA, False)
+            ): bool,
+            vol.Optional(
+                CONF_COLLAPSE_RANDOM,
+                default=current.get(CONF_COLLAPSE_RANDOM, False),
+            ): bool,
+            vol.Optional(
+                CONF_REDACT_MACS, default=current.get(CONF_REDACT_MACS, True)
+            ): bool,
+            vol.Optional(
+                CONF_SMOOTHING, default=current.get(CONF_SMOOTHING, SMOOTHING_NONE)
+            ): vol.In(SMOOTHING_METHODS),
+            vol.Optional(
+                CONF_SUMMARY_WINDOW,
+                default=current.get(CONF_SUMMARY_WINDOW, DEFAULT_SUMMARY_WINDOW),
+            ): vol.All(vol.Coerce(int), vol.Range(min=1, max=1440)),
+            vol.Optional(
+                CONF_AGGREGATION_WINDOW,
+                default=current.get(
+                    CONF_AGGREGATION_WINDOW, DEFAULT_AGGREGATION_WINDOW
+                ),
+            ): vol.All(vol.Coerce(float), vol.Range(min=0, max=60)),
+            vol.Optional(
+                CONF_AGGREGATION_RSSI,
+                default=current.get(CONF_AGGREGATION_RSSI, AGGREGATION_MAX),
+            ): vol.In([AGGREGATION_MAX, AGGREGATION_MEDIAN]),
+            vol.Optional(
+                CONF_TRACKED_DEVICES, default=current.get(CONF_TRACKED_DEVICES, "")
+            ): str,
+            vol.Optional(
+                CONF_WRITE_INTERVAL,
+                default=current.get(CONF_WRITE_INTERVAL, DEFAULT_WRITE_INTERVAL),
+            ): vol.All(vol.Coerce(int), vol.Range(min=1, max=3600)),
+            vol.Optional(
+                CONF_RSSI_THRESHOLD,
+                default=current.get(CONF_RSSI_THRESHOLD, DEFAULT_RSSI_THRESHOLD),
+            ): vol.All(vol.Coerce(int), vol.Range(min=0, max=50)),
+            vol.Optional(
+                CONF_POSITION, default=current.get(CONF_POSITION, "")
+            ): str,
+            vol.Optional(CONF_ROOM, default=current.get(CONF_ROOM, "")): str,
+            vol.Optional(
+                CONF_TX_POWER, default=current.get(CONF_TX_POWER, DEFAULT_TX_POWER)
+            ): vol.All(vol.Coerce(int), vol.Range(min=-127, max=0)),
+            vol.Optional(
+                CONF_PATH_LOSS, default=current.get(CONF_PATH_LOSS, DEFAULT_PATH_LOSS)
+            ): vol.All(vol.Coerce(float), vol.Range(min=1, max=6)),
+            vol.Optional(CONF_APPLY_TO_ALL, default=False): bool,
+        }
+        return self.async_show_form(
+            step_id="init", data_schema=vol.Schema(data_schema), errors=errors
+        )
+
+    async def async_step_preview(self, user_input=None):
+        """Show what would change on each gateway and push it on confirm."""
+        errors = {}
+        dry_run = user_input is None
+        results = await async_apply_profile(
+            self.hass, self._entries, self._profile, dry_run=dry_run
+        )
+        titles = {entry.entry_id: entry.title for entry in self._entries}
+        lines = []
+        for entry_id, result in results.items():
+            if isinstance(result, Exception):
+                errors["base"] = "cannot_connect"
+                lines.append(f"{titles[entry_id]}: error ({result})")
+            else:
+                lines.append(f"{titles[entry_id]}: {format_diff(result)}")
+
+        if not dry_run and not errors:
+            # Only the filtering pushed to the gateways is shared, everything
+            # else in the form (position, room, ...) belongs to this gateway
+            pushed = {
+                key: value
+                for key, value in self._profile.items()
+                if key in GATEWAY_FILTER_KEYS
+            }
+            for entry in self._entries:
+                if entry.entry_id != self._entry.entry_id:
+                    self.hass.config_entries.async_update_entry(
+                        entry, options={**entry.options, **pushed}
+                    )
+            return self.async_create_entry(
+                title="", data={**self._entry.options, **self._profile}
+            )
+
+        if errors:
+            # The gateway can't be written, the options that only live in
+            # Home Assistant can still be saved
+            return self.async_show_form(
+                step_id="save_local",
+                data_schema=vol.Schema({}),
+                description_placeholders={"diff": "\n".join(lines)},
+                errors=errors,
+            )
+        return self.async_show_form(
+            step_id="preview",
+            data_schema=vol.Schema({}),
+            description_placeholders={"diff": "\n".join(lines)},
+            errors=errors,
+        )
+
+    async def async_step_save_local(self, user_input=None):
+        """Save everything but the gateway filtering, without a push."""
+        local = {
+            key: value
+            for key, value in self._profile.items()
+            if key not in GATEWAY_FILTER_KEYS
+        }
+        return self.async_create_entry(
+            title="", data={**self._entry.options, **local}
+        )
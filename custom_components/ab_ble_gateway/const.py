@@ -12,3 +12,140 @@ LOGGER_NAME = "custom_components.ab_ble_gateway"
 DEFAULT_LOG_LEVEL = "INFO"
 LOG_FILE = None  # Placeholder to fix import issues
 LOG_FORMAT = None  # Placeholder to fix import issues
+
+# Gateway source-side filtering (options flow / push_gateway_config service)
+SERVICE_PUSH_GATEWAY_CONFIG = "push_gateway_config"
+ATTR_ENTRY_ID = "entry_id"
+CONF_REQ_INT = "req_int"
+CONF_MIN_RSSI = "min_rssi"
+CONF_ADV_FILTER = "adv_filter"
+CONF_DUP_FILTER = "dup_filter"
+CONF_FILTER_MFG = "filter_mfg"
+CONF_FILTER_UUID = "filter_uuid"
+CONF_APPLY_TO_ALL = "apply_to_all"
+
+# Maps option keys to the keys used by the gateway's HTTP /config endpoint
+GATEWAY_FILTER_KEYS = {
+    CONF_REQ_INT: "req-int",
+    CONF_MIN_RSSI: "min-rssi",
+    CONF_ADV_FILTER: "adv-filter",
+    CONF_DUP_FILTER: "dup-filter",
+    CONF_FILTER_MFG: "filter-mfg",
+    CONF_FILTER_UUID: "filter-uuid",
+}
+
+# Auto-tuning advisor
+CONF_AUTO_TUNE = "auto_tune"
+CONF_RECORDS_BUDGET = "records_budget"
+CONF_USEFUL_RSSI = "useful_rssi"
+DEFAULT_RECORDS_BUDGET = 50  # records/s per gateway
+DEFAULT_USEFUL_RSSI = -90
+ADVISOR_INTERVAL = 300  # seconds
+
+# How the gateway delivers frames (gateway conn-type 3 = MQTT, 2 = HTTP)
+CONF_CONNECTION = "connection"
+CONNECTION_MQTT = "mqtt"
+CONNECTION_HTTP = "http"
+CONF_HTTP_TOKEN = "http_token"
+INGEST_URL = "/api/ab_ble_gateway/{entry_id}"
+
+# Silent-gateway watchdog
+WATCHDOG_INTERVAL = 10  # seconds between checks of all gateways
+WATCHDOG_FACTOR = 30  # silent after this many req-int periods without a frame
+WATCHDOG_BACKOFF_BASE = 30  # seconds before the first retry
+WATCHDOG_BACKOFF_MAX = 900
+HEALTH_OK = "ok"
+HEALTH_SILENT = "silent"
+HEALTH_RECOVERING = "recovering"
+
+# Bulk onboarding (YAML ab_ble_gateway: block / bulk_import service)
+SERVICE_BULK_IMPORT = "bulk_import"
+CONF_CIDR = "cidr"
+CONF_INCLUDE_DISCOVERED = "include_discovered"
+BULK_MAX_HOSTS = 1024
+BULK_CONCURRENCY = 64
+
+# Warm-start cache of last-seen devices
+WARM_START_TTL = 900  # seconds; older devices aren't replayed after a restart
+WARM_START_SAVE_INTERVAL = 60  # seconds between snapshots of all scanners
+
+# Tracked-device table per scanner
+CONF_MAX_DEVICES = "max_devices"
+CONF_IGNORE_NRPA = "ignore_nrpa"
+CONF_COLLAPSE_RANDOM = "collapse_random"
+# A rotated address continues a device heard this recently at a similar RSSI
+ALIAS_WINDOW = 30  # seconds
+ALIAS_RSSI_DELTA = 8  # dB
+# Two addresses both advertising for longer than this are two devices
+ALIAS_OVERLAP = 3  # seconds
+DEFAULT_MAX_DEVICES = 2000
+
+# On-demand profiling of the frame handler
+SERVICE_PROFILE = "profile"
+ATTR_DURATION = "duration"
+ATTR_TRACEMALLOC = "tracemalloc"
+
+# Diagnostics: recent frames and decode timings kept per scanner
+CONF_REDACT_MACS = "redact_macs"
+DIAGNOSTICS_FRAMES = 50
+DIAGNOSTICS_TIMINGS = 1000
+
+# Summary sensors
+CONF_SUMMARY_WINDOW = "summary_window"
+DEFAULT_SUMMARY_WINDOW = 10  # minutes
+SUMMARY_TOP_N = 10
+SUMMARY_INTERVAL = 10  # seconds between sensor refreshes
+
+# Opt-in per-device entities
+CONF_TRACKED_DEVICES = "tracked_devices"
+CONF_WRITE_INTERVAL = "write_interval"
+CONF_RSSI_THRESHOLD = "rssi_threshold"
+DEFAULT_WRITE_INTERVAL = 30  # seconds; at most one state write per entity
+DEFAULT_RSSI_THRESHOLD = 3  # dB change needed before the RSSI sensor is written
+CONSIDER_HOME = 180  # seconds without a record before a device is away
+TRACKING_TICK = 5  # seconds between checks for pending writes and departures
+
+# RSSI smoothing before dispatch
+CONF_SMOOTHING = "smoothing"
+SMOOTHING_NONE = "none"
+SMOOTHING_EMA = "ema"
+SMOOTHING_MEDIAN = "median"
+SMOOTHING_KALMAN = "kalman"
+SMOOTHING_METHODS = [SMOOTHING_NONE, SMOOTHING_EMA, SMOOTHING_MEDIAN, SMOOTHING_KALMAN]
+
+# Multi-gateway room localization
+CONF_POSITION = "position"
+CONF_ROOM = "room"
+CONF_TX_POWER = "tx_power"
+CONF_PATH_LOSS = "path_loss"
+CONF_LOCALIZATION_INTERVAL = "localization_interval"
+DEFAULT_TX_POWER = -59  # RSSI at 1 m
+DEFAULT_PATH_LOSS = 2.0
+DEFAULT_LOCALIZATION_INTERVAL = 5  # seconds
+LOCALIZATION_WINDOW = 30  # seconds a gateway's reading of a device stays valid
+
+# Threshold-crossing rules (YAML rules: list)
+CONF_RULES = "rules"
+CONF_OUI = "oui"
+CONF_COMPANY_ID = "company_id"
+CONF_GATEWAY = "gateway"
+CONF_ENTER_RSSI = "enter_rssi"
+CONF_LEAVE_RSSI = "leave_rssi"
+CONF_ABSENCE_TIMEOUT = "absence_timeout"
+DEFAULT_HYSTERESIS = 5  # dB between enter and leave thresholds
+EVENT_RULE = "ab_ble_gateway_event"
+
+# Time-bucketed aggregation of records before dispatch
+CONF_AGGREGATION_WINDOW = "aggregation_window"
+CONF_AGGREGATION_RSSI = "aggregation_rssi"
+AGGREGATION_MAX = "max"
+AGGREGATION_MEDIAN = "median"
+DEFAULT_AGGREGATION_WINDOW = 0  # seconds; 0 dispatches every record
+
+# Local fan-out of decoded advertisements (YAML fanout: block)
+CONF_FANOUT = "fanout"
+CONF_FANOUT_SOCKET = "socket"
+CONF_FANOUT_MULTICAST = "multicast"
+CONF_FANOUT_QUEUE = "queue_size"
+DEFAULT_FANOUT_QUEUE = 256  # frames buffered per socket reader
+FANOUT_MAX_DATAGRAM = 1400  # bytes; keeps multicast datagrams unfragmented
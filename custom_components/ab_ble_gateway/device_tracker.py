@@ -0,0 +1,75 @@
+"""Presence of selected devices as seen by an AB BLE Gateway."""
+
+from __future__ import annotations
+
+from homeassistant.components.device_tracker import SourceType
+from homeassistant.components.device_tracker.config_entry import ScannerEntity
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .const import DOMAIN
+from .tracking import TrackedDevices
+
+
+async def async_setup_entry(
+    hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
+) -> None:
+    """Set up presence trackers for the gateway's selected devices."""
+    scanner = hass.data[DOMAIN][entry.entry_id]["scanner"]
+    if scanner.tracked is None:
+        return
+    async_add_entities(
+        TrackedPresence(
+            entry,
+            scanner.tracked,
+            address,
+            scanner.device_names.get(address, address),
+        )
+        for address in scanner.tracked.devices
+    )
+
+
+class TrackedPresence(ScannerEntity):
+    """Home while the device was heard within the consider-home time."""
+
+    _attr_should_poll = False
+
+    def __init__(
+        self, entry: ConfigEntry, tracked: TrackedDevices, address: str, name: str
+    ) -> None:
+        """Initialize the tracker."""
+        self._tracked = tracked
+        self._address = address
+        self._present = False
+        self._last_write = None
+        self._attr_unique_id = f"{entry.unique_id}_{address}_presence"
+        self._attr_name = name
+
+    @property
+    def source_type(self) -> SourceType:
+        """Return the source type of the tracker."""
+        return SourceType.BLUETOOTH_LE
+
+    @property
+    def is_connected(self) -> bool:
+        """Return True if the device is present."""
+        return self._present
+
+    async def async_added_to_hass(self) -> None:
+        """Start receiving coalesced updates."""
+        self.async_on_remove(self._tracked.async_add_entity(self._address, self))
+
+    @callback
+    def async_maybe_write(self, now: float) -> None:
+        """Write the state if presence changed and the interval passed."""
+        present = self._tracked.present(self._address, now)
+        if present == self._present:
+            return
+        if self._last_write is not None and now - self._last_write < (
+            self._tracked.interval
+        ):
+            return
+        self._present = present
+        self._last_write = now
+        self.async_write_ha_state()
@@ -0,0 +1,111 @@
+"""Diagnostics support for the AB BLE Gateway."""
+
+from __future__ import annotations
+
+import datetime
+import re
+import time
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+import msgpack
+
+from .codec import loads as json_loads
+from .const import CONF_CONNECTION, CONF_HTTP_TOKEN, CONF_REDACT_MACS, DOMAIN
+
+TO_REDACT = {CONF_PASSWORD, CONF_USERNAME, CONF_HTTP_TOKEN, "mqtt-password"}
+REDACTED_MAC = "**:**:**:**:**:**"
+# MACs as they appear in JSON frames, with or without separators
+MAC_PATTERN = re.compile(r"\b[0-9A-Fa-f]{2}(?:[:-]?[0-9A-Fa-f]{2}){5}\b")
+
+
+def _render_frame(payload: bytes, redact: bool) -> dict:
+    """Render a raw frame as text (JSON) or hex records (msgpack)."""
+    try:
+        json_loads(payload)
+        text = payload.decode("utf-8")
+    except ValueError:
+        pass
+    else:
+        return {
+            "format": "json",
+            "data": MAC_PATTERN.sub(REDACTED_MAC, text) if redact else text,
+        }
+
+    try:
+        unpacked = msgpack.unpackb(payload, raw=True)
+        devices = unpacked.get(b"devices", [])
+    except Exception:  # pylint: disable=broad-except
+        return {"format": "unknown", "data": payload.hex()}
+    records = []
+    for record in devices:
+        if isinstance(record, (bytes, bytearray)) and len(record) > 7:
+            # d[1:7] is the MAC of a binary record
+            if redact:
+                record = record[:1] + bytes(6) + record[7:]
+            records.append(bytes(record).hex())
+        else:
+            records.append(repr(record))
+    return {"format": "msgpack", "devices": records}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict:
+    """Return diagnostics for a config entry."""
+    entry_data = hass.data.get(DOMAIN, {}).get(entry.entry_id)
+    diagnostics = {
+        "entry": {
+            "title": entry.title,
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": dict(entry.options),
+        },
+    }
+    if not isinstance(entry_data, dict) or "scanner" not in entry_data:
+        diagnostics["loaded"] = False
+        return diagnostics
+
+    scanner = entry_data["scanner"]
+    frame_log = scanner.frame_log
+    redact = entry.options.get(CONF_REDACT_MACS, True)
+    health = entry_data.get("health")
+    diagnostics.update(
+        {
+            "loaded": True,
+            "subscription": {
+                "connection": entry.data.get(CONF_CONNECTION, "mqtt"),
+                "topic": entry.data.get("mqtt_topic"),
+                "subscribed": "unsubscribe" in entry_data,
+                "last_frame_age": round(time.monotonic() - scanner.last_frame, 1),
+                "health": health.as_dict() if health is not None else None,
+                "resubscribe_latency": entry_data.get("resubscribe_latency"),
+                "last_reconnect": entry_data.get("last_reconnect"),
+            },
+            "counters": {
+                **frame_log.counters(),
+                "tracked_devices": len(scanner.last_seen),
+                "evictions": scanner.evictions,
+                "ignored_nrpa": scanner.ignored_nrpa,
+                "aliases": len(scanner.aliases) if scanner.aliases is not None else 0,
+                "collapsed_addresses": (
+                    scanner.aliases.collapsed if scanner.aliases is not None else 0
+                ),
+                "split_addresses": (
+                    scanner.aliases.split if scanner.aliases is not None else 0
+                ),
+            },
+            "decode_timings": frame_log.timing_stats(),
+            "traffic": scanner.traffic.snapshot(),
+            "frames": [
+                {
+                    "time": datetime.datetime.fromtimestamp(received).isoformat(),
+                    "size": len(payload),
+                    **_render_frame(payload, redact),
+                }
+                for received, payload in list(frame_log.frames)
+            ],
+        }
+    )
+    return diagnostics
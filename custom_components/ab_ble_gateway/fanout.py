@@ -0,0 +1,202 @@
+"""Publish decoded advertisement batches to other processes on this host.
+
+Each batch is one frame: a 4 byte big-endian length followed by a msgpack
+array [source, wall-clock time, records], where every record is
+[address, rssi, local_name, service_uuids, service_data, manufacturer_data]
+with bytes values and integer company IDs as map keys.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+import logging
+import os
+import socket
+import struct
+import time
+
+import msgpack
+
+from .const import (
+    CONF_FANOUT_MULTICAST,
+    CONF_FANOUT_QUEUE,
+    CONF_FANOUT_SOCKET,
+    DEFAULT_FANOUT_QUEUE,
+    FANOUT_MAX_DATAGRAM,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+LENGTH = struct.Struct(">I")
+
+
+def pack_batch(source: str, records: list) -> bytes:
+    """Frame a batch of decoded records from one gateway."""
+    body = msgpack.packb([source, time.time(), records])
+    return LENGTH.pack(len(body)) + body
+
+
+def iter_frames(buffer: bytearray):
+    """Yield the unpacked batches in `buffer`, consuming complete frames."""
+    while len(buffer) >= LENGTH.size:
+        (size,) = LENGTH.unpack_from(buffer)
+        if len(buffer) < LENGTH.size + size:
+            return
+        body = bytes(buffer[LENGTH.size : LENGTH.size + size])
+        del buffer[: LENGTH.size + size]
+        yield msgpack.unpackb(body, strict_map_key=False)
+
+
+class _Subscriber:
+    """One connected reader with a bounded queue of frames."""
+
+    def __init__(self, writer: asyncio.StreamWriter, queue_size: int):
+        """Initialize the subscriber's queue."""
+        self.writer = writer
+        self.queue = deque(maxlen=queue_size)
+        self.ready = asyncio.Event()
+        self.dropped = 0
+        self.task = asyncio.current_task()
+
+    def put(self, frame: bytes) -> None:
+        """Queue a frame, dropping the oldest one if the reader is behind."""
+        if len(self.queue) == self.queue.maxlen:
+            self.dropped += 1
+        self.queue.append(frame)
+        self.ready.set()
+
+    async def run(self) -> None:
+        """Write queued frames until the reader goes away."""
+        writer = self.writer
+        while not writer.is_closing():
+            await self.ready.wait()
+            self.ready.clear()
+            while self.queue:
+                writer.write(self.queue.popleft())
+            await writer.drain()
+
+
+class UnixFanout:
+    """Serve batches to any number of readers on a Unix domain socket.
+
+    A slow reader only loses its own oldest frames; it never blocks the
+    event loop or the other readers.
+    """
+
+    def __init__(self, path: str, queue_size=DEFAULT_FANOUT_QUEUE):
+        """Initialize the publisher; call async_start() to listen."""
+        self.path = path
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._server = None
+
+    @property
+    def subscribers(self) -> int:
+        """Return the number of connected readers."""
+        return len(self._subscribers)
+
+    @property
+    def dropped(self) -> int:
+        """Return frames dropped for the connected readers."""
+        return sum(subscriber.dropped for subscriber in self._subscribers)
+
+    async def async_start(self) -> None:
+        """Listen on the socket, replacing a stale one from a previous run."""
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._server = await asyncio.start_unix_server(self._handle, self.path)
+        _LOGGER.info("Publishing decoded advertisements on %s", self.path)
+
+    async def _handle(self, reader, writer) -> None:
+        """Feed one reader until it disconnects."""
+        subscriber = _Subscriber(writer, self.queue_size)
+        self._subscribers.add(subscriber)
+        try:
+            await subscriber.run()
+        except (ConnectionError, OSError) as err:
+            _LOGGER.debug("Fan-out reader went away: %s", err)
+        finally:
+            self._subscribers.discard(subscriber)
+            writer.close()
+
+    def publish(self, source: str, records: list) -> None:
+        """Queue a batch for every reader; nothing is packed without readers."""
+        if not self._subscribers or not records:
+            return
+        frame = pack_batch(source, records)
+        for subscriber in self._subscribers:
+            subscriber.put(frame)
+
+    async def async_stop(self) -> None:
+        """Stop listening and disconnect all readers."""
+        if self._server is not None:
+            self._server.close()
+            subscribers = list(self._subscribers)
+            for subscriber in subscribers:
+                subscriber.writer.close()
+                subscriber.ready.set()
+            await asyncio.gather(
+                *(subscriber.task for subscriber in subscribers),
+                return_exceptions=True,
+            )
+            await self._server.wait_closed()
+            self._server = None
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+class MulticastFanout:
+    """Send batches as UDP multicast datagrams, one frame per datagram.
+
+    Batches are split so a datagram stays below FANOUT_MAX_DATAGRAM; the
+    socket's send buffer is the only queue, a full one drops the datagram.
+    """
+
+    def __init__(self, group: str, port: int, ttl=1):
+        """Initialize the publisher; call async_start() to open the socket."""
+        self.address = (group, port)
+        self.ttl = ttl
+        self.dropped = 0
+        self._sock = None
+
+    async def async_start(self) -> None:
+        """Open the non-blocking multicast socket."""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, self.ttl)
+        sock.setblocking(False)
+        self._sock = sock
+        _LOGGER.info("Publishing decoded advertisements to %s:%s", *self.address)
+
+    def publish(self, source: str, records: list) -> None:
+        """Send a batch, split over as many datagrams as needed."""
+        if self._sock is None or not records:
+            return
+        frame = pack_batch(source, records)
+        if len(frame) > FANOUT_MAX_DATAGRAM and len(records) > 1:
+            half = len(records) // 2
+            self.publish(source, records[:half])
+            self.publish(source, records[half:])
+            return
+        try:
+            self._sock.sendto(frame, self.address)
+        except (BlockingIOError, OSError) as err:
+            self.dropped += 1
+            _LOGGER.debug("Dropped fan-out datagram: %s", err)
+
+    async def async_stop(self) -> None:
+        """Close the socket."""
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+
+def create_fanout(config: dict) -> UnixFanout | MulticastFanout:
+    """Create the publisher for a validated fanout: YAML block."""
+    if CONF_FANOUT_SOCKET in config:
+        return UnixFanout(
+            config[CONF_FANOUT_SOCKET],
+            config.get(CONF_FANOUT_QUEUE, DEFAULT_FANOUT_QUEUE),
+        )
+    group, _, port = config[CONF_FANOUT_MULTICAST].rpartition(":")
+    return MulticastFanout(group, int(port))
@@ -0,0 +1,62 @@
+"""Fixed-size record of recent frames and decode timings for diagnostics."""
+
+from __future__ import annotations
+
+from collections import deque
+import time
+
+from .const import DIAGNOSTICS_FRAMES, DIAGNOSTICS_TIMINGS
+
+
+class FrameLog:
+    """Ring buffers of the last raw frames and decode times, plus counters.
+
+    Adding a frame is O(1) and keeps a reference to the payload bytes, so
+    the cost while nobody is looking is a couple of deque appends.
+    """
+
+    def __init__(self, frames=DIAGNOSTICS_FRAMES, timings=DIAGNOSTICS_TIMINGS):
+        """Initialize the buffers."""
+        # (wall-clock time, raw payload)
+        self.frames = deque(maxlen=frames)
+        # seconds spent decoding each frame
+        self.timings = deque(maxlen=timings)
+        self.frames_total = 0
+        # frames that yielded no device records at all
+        self.frames_undecodable = 0
+        self.records_total = 0
+        # records that were skipped or failed to dispatch
+        self.records_dropped = 0
+
+    def add(self, payload: bytes, duration: float, records: int, processed: int):
+        """Record a handled frame."""
+        self.frames.append((time.time(), payload))
+        self.timings.append(duration)
+        self.frames_total += 1
+        if not records:
+            self.frames_undecodable += 1
+        self.records_total += records
+        self.records_dropped += records - processed
+
+    def timing_stats(self) -> dict:
+        """Return decode time statistics in milliseconds."""
+        timings = sorted(self.timings)
+        if not timings:
+            return {"count": 0}
+        count = len(timings)
+        return {
+            "count": count,
+            "mean_ms": round(sum(timings) / count * 1000, 3),
+            "p50_ms": round(timings[count // 2] * 1000, 3),
+            "p95_ms": round(timings[min(count - 1, int(count * 0.95))] * 1000, 3),
+            "max_ms": round(timings[-1] * 1000, 3),
+        }
+
+    def counters(self) -> dict:
+        """Return the frame and record counters."""
+        return {
+            "frames_total": self.frames_total,
+            "frames_undecodable": self.frames_undecodable,
+            "records_total": self.records_total,
+            "records_dropped": self.records_dropped,
+        }
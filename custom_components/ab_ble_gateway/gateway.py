@@ -0,0 +1,212 @@
+"""HTTP client for the AB BLE Gateway's local configuration API."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+
+import aiohttp
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_HOST, CONF_PASSWORD, CONF_PORT, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+from .const import GATEWAY_FILTER_KEYS
+
+_LOGGER = logging.getLogger(__name__)
+
+# Gateways answer within milliseconds on a LAN; don't let a dead one hold a flow
+HTTP_TIMEOUT = aiohttp.ClientTimeout(total=5, connect=2)
+# Probe results are reused for this long, e.g. when a confirm step is retried
+PROBE_CACHE_TTL = 180
+
+# {(host, port, path): (monotonic time, json)}, only for requests without
+# credentials so a wrong password never gets a cached success
+_PROBE_CACHE: dict[tuple, tuple[float, dict]] = {}
+
+
+def _auth(username=None, password=None):
+    """Return basic auth for the gateway if credentials are set."""
+    if username or password:
+        return aiohttp.BasicAuth(username or "", password or "")
+    return None
+
+
+async def _async_get(
+    hass: HomeAssistant, host, port, path, username=None, password=None, cache=True
+) -> dict:
+    """GET a JSON document from the gateway, optionally from the probe cache."""
+    key = (host, str(port), path)
+    cache = cache and not (username or password)
+    if cache and key in _PROBE_CACHE:
+        fetched, data = _PROBE_CACHE[key]
+        if time.monotonic() - fetched < PROBE_CACHE_TTL:
+            return data
+
+    session = async_get_clientsession(hass)
+    async with session.get(
+        "http://{}:{}{}".format(host, port, path),
+        auth=_auth(username, password),
+        timeout=HTTP_TIMEOUT,
+    ) as response:
+        response.raise_for_status()
+        data = await response.json(content_type=None)
+    if cache:
+        _cache_probe(key, data)
+    return data
+
+
+def _cache_probe(key: tuple, data: dict) -> None:
+    """Cache a probe result and drop expired ones, e.g. of a bulk CIDR scan."""
+    now = time.monotonic()
+    for expired in [
+        other
+        for other, (fetched, _) in _PROBE_CACHE.items()
+        if now - fetched >= PROBE_CACHE_TTL
+    ]:
+        del _PROBE_CACHE[expired]
+    _PROBE_CACHE[key] = (now, data)
+
+
+async def async_fetch_info(hass: HomeAssistant, host, port, cache=True) -> dict:
+    """Fetch /info (MAC, firmware, whether auth is required) from a gateway."""
+    return await _async_get(hass, host, port, "/info", cache=cache)
+
+
+async def async_fetch_config(
+    hass: HomeAssistant, host, port, username=None, password=None, cache=True
+) -> dict:
+    """Fetch the full configuration from a gateway."""
+    return await _async_get(
+        hass, host, port, "/config", username, password, cache=cache
+    )
+
+
+async def async_probe(
+    hass: HomeAssistant, host, port, username=None, password=None
+) -> tuple[dict, dict | None]:
+    """Fetch /info and /config concurrently.
+
+    Raises if the gateway can't be reached. The config is None if it could
+    not be read, e.g. because the gateway requires credentials.
+    """
+    info, config = await asyncio.gather(
+        async_fetch_info(hass, host, port),
+        async_fetch_config(hass, host, port, username, password),
+        return_exceptions=True,
+    )
+    if isinstance(info, BaseException):
+        raise info
+    if isinstance(config, BaseException):
+        _LOGGER.debug("Could not read config from %s: %s", host, config)
+        config = None
+    return info, config
+
+
+async def async_push_config(
+    hass: HomeAssistant, host, port, changes: dict, username=None, password=None
+) -> dict:
+    """Write changed settings to a gateway and return its new configuration."""
+    session = async_get_clientsession(hass)
+    async with session.post(
+        "http://{}:{}/config".format(host, port),
+        json=changes,
+        auth=_auth(username, password),
+        timeout=HTTP_TIMEOUT,
+    ) as response:
+        response.raise_for_status()
+    return await async_fetch_config(
+        hass, host, port, username, password, cache=False
+    )
+
+
+def profile_to_gateway(profile: dict) -> dict:
+    """Translate option keys (min_rssi) into gateway keys (min-rssi)."""
+    return {
+        GATEWAY_FILTER_KEYS[key]: value
+        for key, value in profile.items()
+        if key in GATEWAY_FILTER_KEYS and value is not None
+    }
+
+
+def gateway_to_profile(gateway_config: dict) -> dict:
+    """Extract the filtering settings from a gateway configuration."""
+    return {
+        key: gateway_config[gateway_key]
+        for key, gateway_key in GATEWAY_FILTER_KEYS.items()
+        if gateway_key in gateway_config
+    }
+
+
+def diff_config(current: dict, wanted: dict) -> dict:
+    """Return {gateway_key: (old, new)} for settings that would change."""
+    return {
+        key: (current.get(key), value)
+        for key, value in wanted.items()
+        if current.get(key) != value
+    }
+
+
+def format_diff(diff: dict) -> str:
+    """Render a config diff as a short human readable string."""
+    if not diff:
+        return "no changes"
+    return ", ".join(f"{key}: {old} → {new}" for key, (old, new) in diff.items())
+
+
+def entry_connection(entry: ConfigEntry) -> tuple:
+    """Return (host, port, username, password) for a config entry."""
+    data = entry.data
+    return (
+        data.get(CONF_HOST),
+        data.get(CONF_PORT, 80),
+        data.get(CONF_USERNAME),
+        data.get(CONF_PASSWORD),
+    )
+
+
+async def async_fetch_profile(
+    hass: HomeAssistant, entry: ConfigEntry, cache=True
+) -> dict:
+    """Fetch the filtering settings a config entry's gateway is running with."""
+    return gateway_to_profile(
+        await async_fetch_config(hass, *entry_connection(entry), cache=cache)
+    )
+
+
+async def _async_apply_profile(
+    hass: HomeAssistant, entry: ConfigEntry, wanted: dict, dry_run: bool
+) -> dict:
+    """Diff and (unless dry_run) push a gateway profile to one gateway."""
+    host, port, username, password = entry_connection(entry)
+    current = await async_fetch_config(
+        hass, host, port, username, password, cache=False
+    )
+    diff = diff_config(current, wanted)
+    if diff and not dry_run:
+        _LOGGER.info("Pushing config to gateway %s: %s", host, format_diff(diff))
+        await async_push_config(
+            hass,
+            host,
+            port,
+            {key: new for key, (_, new) in diff.items()},
+            username,
+            password,
+        )
+    return diff
+
+
+async def async_apply_profile(
+    hass: HomeAssistant, entries: list[ConfigEntry], profile: dict, dry_run=False
+) -> dict:
+    """Apply a filtering profile to several gateways concurrently.
+
+    Returns {entry_id: diff} on success or {entry_id: exception} per gateway.
+    """
+    wanted = profile_to_gateway(profile)
+    results = await asyncio.gather(
+        *(_async_apply_profile(hass, entry, wanted, dry_run) for entry in entries),
+        return_exceptions=True,
+    )
+    return {entry.entry_id: result for entry, result in zip(entries, results)}
@@ -0,0 +1,179 @@
+"""Combine several gateways' RSSI readings into a room and position per device."""
+
+from __future__ import annotations
+
+import logging
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy ships with Home Assistant
+    np = None
+
+from .const import LOCALIZATION_WINDOW
+
+_LOGGER = logging.getLogger(__name__)
+
+# Closer than this the log-distance model says nothing useful
+MIN_DISTANCE = 0.1
+# Only report a position change larger than this many meters
+POSITION_RESOLUTION = 0.5
+INITIAL_RSSI = -100.0
+
+
+def parse_position(value) -> tuple[float, float] | None:
+    """Parse an "x, y" position in meters."""
+    try:
+        x, y = (float(part) for part in str(value).split(","))
+    except ValueError:
+        return None
+    return x, y
+
+
+class Localizer:
+    """Readings of the localized devices by every positioned gateway.
+
+    Readings are accumulated in D×G arrays (devices × gateways) with O(1)
+    work per record. Each tick averages them and, for all devices at once,
+    picks the nearest gateway's room and solves a weighted linear
+    least-squares trilateration for devices heard by three or more
+    gateways.
+    """
+
+    def __init__(self, window=LOCALIZATION_WINDOW) -> None:
+        """Initialize without gateways or devices."""
+        self.window = window
+        # {entry_id: (x, y, tx_power, path_loss, room)}
+        self._gateway_config = {}
+        # {entry_id: [addresses]} of the devices each entry wants localized
+        self._device_config = {}
+        # {entry_id: column}, {address: row}
+        self.gateways = {}
+        self.devices = {}
+        # {address: {"room", "gateway", "x", "y"}} as of the last tick
+        self.results = {}
+        self._rebuild()
+
+    def set_gateway(self, entry_id: str, position, room: str, tx_power, path_loss):
+        """Add or update a gateway with a known position."""
+        self._gateway_config[entry_id] = (*position, tx_power, path_loss, room)
+        self._rebuild()
+
+    def set_devices(self, entry_id: str, addresses: list[str]) -> None:
+        """Set the devices an entry wants localized."""
+        self._device_config[entry_id] = list(addresses)
+        self._rebuild()
+
+    def remove_entry(self, entry_id: str) -> None:
+        """Forget an entry's gateway and devices."""
+        self._gateway_config.pop(entry_id, None)
+        self._device_config.pop(entry_id, None)
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        """Reindex and reallocate the arrays; pending readings are dropped."""
+        self.gateways = {
+            entry_id: column for column, entry_id in enumerate(self._gateway_config)
+        }
+        addresses = dict.fromkeys(
+            address
+            for addresses in self._device_config.values()
+            for address in addresses
+        )
+        self.devices = {address: row for row, address in enumerate(addresses)}
+        self.results = {
+            address: result
+            for address, result in self.results.items()
+            if address in self.devices
+        }
+        configs = list(self._gateway_config.values())
+        self._rooms = [config[4] for config in configs]
+        self._entry_ids = list(self._gateway_config)
+        shape = (len(self.devices), len(self.gateways))
+        self._positions = np.array(
+            [config[:2] for config in configs], dtype=float
+        ).reshape(-1, 2)
+        self._tx_power = np.array([config[2] for config in configs], dtype=float)
+        self._path_loss = np.array([config[3] for config in configs], dtype=float)
+        self._sums = np.zeros(shape)
+        self._counts = np.zeros(shape)
+        self._rssi = np.full(shape, INITIAL_RSSI)
+        self._seen = np.full(shape, -np.inf)
+
+    def add(self, address: str, entry_id: str, rssi: float) -> None:
+        """Record a reading of a device by a gateway, if both are localized."""
+        row = self.devices.get(address)
+        if row is None:
+            return
+        column = self.gateways.get(entry_id)
+        if column is None:
+            return
+        self._sums[row, column] += rssi
+        self._counts[row, column] += 1
+
+    def tick(self, now: float) -> list[str]:
+        """Update rooms and positions; return the addresses that changed."""
+        if not self.devices or not self.gateways:
+            return []
+        counts = self._counts
+        heard_now = counts > 0
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = self._sums / counts
+        self._rssi = np.where(heard_now, means, self._rssi)
+        self._seen = np.where(heard_now, now, self._seen)
+        self._sums.fill(0)
+        counts.fill(0)
+
+        valid = (now - self._seen) < self.window
+        heard = valid.any(axis=1)
+
+        # Log-distance path loss model per gateway
+        distance = np.maximum(
+            10.0 ** ((self._tx_power - self._rssi) / (10.0 * self._path_loss)),
+            MIN_DISTANCE,
+        )
+        # Gateways are calibrated differently, so the strongest RSSI isn't
+        # necessarily the closest gateway
+        nearest = np.where(valid, distance, np.inf).argmin(axis=1)
+        # (x - xi)² + (y - yi)² = di² is linear in (x, y, x² + y²):
+        # -2xi·x - 2yi·y + (x² + y²) = di² - xi² - yi²
+        positions = self._positions
+        design = np.column_stack(
+            [-2 * positions[:, 0], -2 * positions[:, 1], np.ones(len(positions))]
+        )
+        target = distance**2 - (positions**2).sum(axis=1)
+        # Near gateways are more trustworthy than far ones
+        weights = np.where(valid, 1.0 / distance**2, 0.0)
+        normal = np.einsum("dg,gi,gj->dij", weights, design, design)
+        moment = np.einsum("dg,gi,dg->di", weights, design, target)
+        solution = np.einsum("dij,dj->di", np.linalg.pinv(normal), moment)
+        solvable = valid.sum(axis=1) >= 3
+
+        changed = []
+        for address, row in self.devices.items():
+            result = {"room": None, "gateway": None, "x": None, "y": None}
+            if heard[row]:
+                column = int(nearest[row])
+                result["room"] = self._rooms[column]
+                result["gateway"] = self._entry_ids[column]
+            if solvable[row]:
+                result["x"] = round(float(solution[row, 0]), 1)
+                result["y"] = round(float(solution[row, 1]), 1)
+            if self._changed(self.results.get(address), result):
+                self.results[address] = result
+                changed.append(address)
+        return changed
+
+    @staticmethod
+    def _changed(old, new) -> bool:
+        """Return True if the room changed or the position moved noticeably."""
+        if old is None or old["room"] != new["room"]:
+            return True
+        if (old["x"] is None) != (new["x"] is None):
+            return True
+        if new["x"] is None:
+            return False
+        return (
+            abs(old["x"] - new["x"]) >= POSITION_RESOLUTION
+            or abs(old["y"] - new["y"]) >= POSITION_RESOLUTION
+        )
+
@@ -0,0 +1,123 @@
+"""Onboard many gateways at once from a host list, CIDR ranges or zeroconf."""
+
+from __future__ import annotations
+
+import asyncio
+import ipaddress
+import logging
+
+import aiohttp
+from homeassistant.config_entries import SOURCE_IMPORT, SOURCE_ZEROCONF
+from homeassistant.const import CONF_HOST, CONF_PASSWORD, CONF_PORT, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+
+from .config_flow import mqtt_config_error
+from .const import BULK_CONCURRENCY, BULK_MAX_HOSTS, DOMAIN
+from .gateway import async_probe
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def expand_hosts(hosts=(), cidrs=()) -> list[str]:
+    """Return the unique hosts from a host list and CIDR ranges."""
+    result = dict.fromkeys(hosts)
+    for cidr in cidrs:
+        network = ipaddress.ip_network(cidr, strict=False)
+        if network.num_addresses > BULK_MAX_HOSTS:
+            raise ValueError(f"{cidr} has more than {BULK_MAX_HOSTS} addresses")
+        for address in network.hosts() if network.num_addresses > 2 else network:
+            result.setdefault(str(address))
+    return list(result)
+
+
+def discovered_hosts(hass: HomeAssistant) -> dict[str, str]:
+    """Return {host: flow_id} for zeroconf discoveries waiting for a confirm."""
+    return {
+        flow["context"]["title_placeholders"][CONF_HOST]: flow["flow_id"]
+        for flow in hass.config_entries.flow.async_progress_by_handler(DOMAIN)
+        if flow["context"].get("source") == SOURCE_ZEROCONF
+        and CONF_HOST in flow["context"].get("title_placeholders", {})
+    }
+
+
+async def async_bulk_import(
+    hass: HomeAssistant,
+    hosts=(),
+    cidrs=(),
+    port=80,
+    username=None,
+    password=None,
+    include_discovered=False,
+) -> dict:
+    """Probe all hosts concurrently, check them in one pass and add entries.
+
+    Returns {host: outcome} where outcome is "created", an abort reason or
+    an error description.
+    """
+    pending = discovered_hosts(hass) if include_discovered else {}
+    targets = expand_hosts([*hosts, *pending], cidrs)
+    configured = {
+        entry.data.get(CONF_HOST) for entry in hass.config_entries.async_entries(DOMAIN)
+    }
+    targets = [host for host in targets if host not in configured]
+    semaphore = asyncio.Semaphore(BULK_CONCURRENCY)
+
+    async def probe(host):
+        async with semaphore:
+            return await async_probe(hass, host, port, username, password)
+
+    probes = await asyncio.gather(
+        *(probe(host) for host in targets), return_exceptions=True
+    )
+
+    outcomes = {}
+    candidates = []
+    for host, result in zip(targets, probes):
+        if isinstance(result, (aiohttp.ClientError, asyncio.TimeoutError)):
+            # Nothing (or not a gateway) answering on this address
+            continue
+        if isinstance(result, Exception):
+            outcomes[host] = f"error: {result}"
+            continue
+        info, gateway_config = result
+        if not str(info.get("hardwareVer", "4.")).startswith("4."):
+            outcomes[host] = "unsupported_hardware"
+        elif gateway_config is None:
+            outcomes[host] = "failed_connecting"
+        elif gateway_config.get("conn-type") != 2 and (
+            error := mqtt_config_error(hass, gateway_config)
+        ):
+            outcomes[host] = error
+        else:
+            candidates.append(host)
+
+    flow_results = await asyncio.gather(
+        *(
+            hass.config_entries.flow.async_init(
+                DOMAIN,
+                context={"source": SOURCE_IMPORT},
+                data={
+                    CONF_HOST: host,
+                    CONF_PORT: port,
+                    CONF_USERNAME: username,
+                    CONF_PASSWORD: password,
+                },
+            )
+            for host in candidates
+        ),
+        return_exceptions=True,
+    )
+    for host, result in zip(candidates, flow_results):
+        if isinstance(result, Exception):
+            outcomes[host] = f"error: {result}"
+        elif result["type"] == "create_entry":
+            # The import flow aborted the host's pending zeroconf flow
+            outcomes[host] = "created"
+        else:
+            outcomes[host] = result.get("reason", result["type"])
+
+    created = sum(1 for outcome in outcomes.values() if outcome == "created")
+    _LOGGER.info(
+        "Bulk import probed %d hosts, added %d gateways", len(targets), created
+    )
+    return outcomes
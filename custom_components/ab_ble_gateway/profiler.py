@@ -0,0 +1,148 @@
+"""On-demand profiling of the integration's frame handling."""
+
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import io
+import logging
+import os
+import pstats
+import time
+import tracemalloc
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+# Lines of the cumulative-time table and allocation sites in the report
+REPORT_FUNCTIONS = 40
+REPORT_ALLOCATIONS = 25
+TRACEMALLOC_FRAMES = 10
+
+
+class HandlerProfiler:
+    """Profile every call to the scanners' frame handler, and nothing else.
+
+    The profiler is only enabled while a frame is being decoded, so the
+    rest of Home Assistant runs unprofiled.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the profiler."""
+        self.profile = cProfile.Profile()
+        self.calls = 0
+        self.busy = 0.0
+        self._scanners = []
+
+    def attach(self, scanner) -> None:
+        """Wrap a scanner's async_on_payload (used for MQTT and HTTP frames)."""
+        original = scanner.async_on_payload
+        profile = self.profile
+
+        def profiled(payload):
+            self.calls += 1
+            start = time.perf_counter()
+            profile.enable()
+            try:
+                return original(payload)
+            finally:
+                profile.disable()
+                self.busy += time.perf_counter() - start
+
+        scanner.async_on_payload = profiled
+        self._scanners.append(scanner)
+
+    def detach(self) -> None:
+        """Restore the scanners' own handler."""
+        for scanner in self._scanners:
+            del scanner.async_on_payload
+        self._scanners = []
+
+
+def _write_report(
+    profiler: HandlerProfiler, duration, snapshot, base_path: str
+) -> tuple[str, str]:
+    """Write the .pstats dump and a text report next to it."""
+    stats_path = f"{base_path}.pstats"
+    report_path = f"{base_path}.txt"
+    profiler.profile.dump_stats(stats_path)
+
+    out = io.StringIO()
+    out.write(f"Profiled for {duration} s: {profiler.calls} frames, ")
+    out.write(f"{profiler.busy * 1000:.1f} ms in the handler")
+    if profiler.calls:
+        out.write(f" ({profiler.busy / profiler.calls * 1e6:.0f} µs per frame)")
+    out.write("\n\n")
+    if profiler.calls:
+        stats = pstats.Stats(profiler.profile, stream=out)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(REPORT_FUNCTIONS)
+
+    if snapshot is not None:
+        out.write("\nTop allocations by line (still allocated at the end):\n")
+        for stat in snapshot.statistics("lineno")[:REPORT_ALLOCATIONS]:
+            out.write(f"{stat}\n")
+
+    with open(report_path, "w", encoding="utf-8") as report:
+        report.write(out.getvalue())
+    return stats_path, report_path
+
+
+async def async_profile_handler(
+    hass: HomeAssistant, duration: float, trace_memory=False
+) -> tuple[str, str]:
+    """Profile all scanners' frame handling for `duration` seconds.
+
+    Returns the paths of the .pstats file and the text report in the config
+    directory.
+    """
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if domain_data.get("profiling"):
+        raise HomeAssistantError("A profiling run is already in progress")
+    scanners = [
+        entry_data["scanner"]
+        for entry_data in domain_data.values()
+        if isinstance(entry_data, dict) and "scanner" in entry_data
+    ]
+    if not scanners:
+        raise HomeAssistantError("No gateway is set up")
+
+    profiler = HandlerProfiler()
+    try:
+        # Only one profiler can be active per interpreter on newer Pythons
+        profiler.profile.enable()
+        profiler.profile.disable()
+    except ValueError as err:
+        raise HomeAssistantError(f"Cannot start profiler: {err}") from err
+
+    start_tracing = trace_memory and not tracemalloc.is_tracing()
+    if start_tracing:
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+
+    domain_data["profiling"] = True
+    for scanner in scanners:
+        profiler.attach(scanner)
+    _LOGGER.info(f"Profiling frame handling of {len(scanners)} gateways for {duration} s")
+    try:
+        await asyncio.sleep(duration)
+    finally:
+        profiler.detach()
+        domain_data["profiling"] = False
+
+    snapshot = None
+    if trace_memory:
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(True, os.path.join(os.path.dirname(__file__), "*"))]
+        )
+        if start_tracing:
+            tracemalloc.stop()
+
+    base_path = hass.config.path(
+        f"{DOMAIN}_profile_{time.strftime('%Y%m%d_%H%M%S')}"
+    )
+    return await hass.async_add_executor_job(
+        _write_report, profiler, duration, snapshot, base_path
+    )
@@ -0,0 +1,206 @@
+"""Threshold-crossing rules, indexed per MAC, OUI and company ID."""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+import logging
+import time
+
+from homeassistant.const import CONF_MAC, CONF_NAME
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import config_validation as cv
+import voluptuous as vol
+
+from .const import (
+    CONF_ABSENCE_TIMEOUT,
+    CONF_COMPANY_ID,
+    CONF_ENTER_RSSI,
+    CONF_GATEWAY,
+    CONF_LEAVE_RSSI,
+    CONF_OUI,
+    DEFAULT_HYSTERESIS,
+    EVENT_RULE,
+)
+from .tracking import parse_addresses
+
+_LOGGER = logging.getLogger(__name__)
+
+# One slot per second; absence timeouts longer than this take several turns
+WHEEL_SLOTS = 64
+# Bound the per-address cache of matching rules
+MAX_RESOLVED = 10000
+# Bound the devices inside a rule; the least recently seen are dropped first
+MAX_INSIDE = 10000
+
+
+def _oui(value: str) -> str:
+    """Normalize an OUI to AA:BB:CC."""
+    oui = value.upper().replace("-", "").replace(":", "")
+    if len(oui) != 6:
+        raise vol.Invalid(f"invalid OUI: {value}")
+    return ":".join(oui[i : i + 2] for i in range(0, 6, 2))
+
+
+def _mac(value: str) -> str:
+    """Normalize a MAC to AA:BB:CC:DD:EE:FF."""
+    addresses = parse_addresses(str(value))
+    if len(addresses) != 1:
+        raise vol.Invalid(f"invalid MAC address: {value}")
+    return addresses[0]
+
+
+RULE_SCHEMA = vol.All(
+    {
+        vol.Required(CONF_NAME): cv.string,
+        vol.Exclusive(CONF_MAC, "match"): _mac,
+        vol.Exclusive(CONF_OUI, "match"): _oui,
+        vol.Exclusive(CONF_COMPANY_ID, "match"): vol.Coerce(int),
+        vol.Optional(CONF_GATEWAY): cv.string,
+        vol.Optional(CONF_ENTER_RSSI, default=-70): vol.Coerce(int),
+        vol.Optional(CONF_LEAVE_RSSI): vol.Coerce(int),
+        vol.Optional(CONF_ABSENCE_TIMEOUT): vol.All(
+            vol.Coerce(int), vol.Range(min=1)
+        ),
+    },
+    cv.has_at_least_one_key(CONF_MAC, CONF_OUI, CONF_COMPANY_ID),
+)
+
+
+class Rule:
+    """A compiled rule."""
+
+    __slots__ = ("name", "gateway", "enter", "leave", "timeout")
+
+    def __init__(self, config: dict) -> None:
+        """Compile a validated rule config."""
+        self.name = config[CONF_NAME]
+        self.gateway = config.get(CONF_GATEWAY)
+        self.enter = config[CONF_ENTER_RSSI]
+        self.leave = config.get(CONF_LEAVE_RSSI, self.enter - DEFAULT_HYSTERESIS)
+        self.timeout = config.get(CONF_ABSENCE_TIMEOUT)
+
+
+class RuleEngine:
+    """Evaluate rules for each record and fire an event when one crosses.
+
+    Rules are indexed by MAC, OUI and company ID, and the MAC/OUI matches
+    of an address are resolved once, so a record only looks at its own
+    rules. Per rule and address inside it the engine keeps [last seen,
+    gateway], dropped again on leave or absence. Absence timeouts are
+    checked by a single timer wheel, ticked every second, instead of a
+    timer per device.
+    """
+
+    def __init__(self, hass: HomeAssistant, rules: list[dict]) -> None:
+        """Compile and index the rules."""
+        self.hass = hass
+        self._by_mac = {}
+        self._by_oui = {}
+        self._by_company = {}
+        for config in rules:
+            rule = Rule(config)
+            if CONF_MAC in config:
+                self._by_mac.setdefault(config[CONF_MAC], []).append(rule)
+            elif CONF_OUI in config:
+                self._by_oui.setdefault(config[CONF_OUI], []).append(rule)
+            else:
+                self._by_company.setdefault(config[CONF_COMPANY_ID], []).append(rule)
+        # {address: [rules matching by MAC or OUI]}
+        self._resolved = {}
+        # {(rule, address): [monotonic last seen, gateway]}, LRU ordered
+        self._state = OrderedDict()
+        self._wheel = [set() for _ in range(WHEEL_SLOTS)]
+        self._cursor = int(time.monotonic())
+
+    def _rules_for(self, address: str) -> list[Rule]:
+        """Return the MAC and OUI rules of an address, cached."""
+        rules = self._resolved.get(address)
+        if rules is None:
+            rules = self._by_mac.get(address, []) + self._by_oui.get(address[:8], [])
+            if len(self._resolved) >= MAX_RESOLVED:
+                self._resolved.clear()
+            self._resolved[address] = rules
+        return rules
+
+    @callback
+    def async_process(
+        self, address: str, gateway: tuple, rssi: int, manufacturer_data: dict
+    ) -> None:
+        """Evaluate the rules of a record; `gateway` is (entry_id, title)."""
+        rules = self._rules_for(address)
+        if self._by_company and manufacturer_data:
+            for company_id in manufacturer_data:
+                if company_id in self._by_company:
+                    rules = rules + self._by_company[company_id]
+        if not rules:
+            return
+        now = time.monotonic()
+        for rule in rules:
+            if rule.gateway is not None and rule.gateway not in gateway:
+                continue
+            key = (rule, address)
+            state = self._state.get(key)
+            if state is None:
+                if rssi >= rule.enter:
+                    if len(self._state) >= MAX_INSIDE:
+                        self._state.popitem(last=False)
+                    self._state[key] = [now, gateway]
+                    self._fire(rule, address, gateway, rssi, "enter")
+                    if rule.timeout:
+                        self._schedule(key, now + rule.timeout)
+            elif rssi >= rule.leave:
+                state[0] = now
+                self._state.move_to_end(key)
+            elif gateway == state[1]:
+                del self._state[key]
+                self._fire(rule, address, gateway, rssi, "leave")
+
+    @staticmethod
+    def _slot(deadline: float) -> int:
+        """Return the first slot visited at or after a deadline."""
+        return (int(deadline) + 1) % WHEEL_SLOTS
+
+    def _schedule(self, key, deadline: float) -> None:
+        """Put a key in the wheel slot of its deadline."""
+        self._wheel[self._slot(deadline)].add(key)
+
+    @callback
+    def async_tick(self, *_) -> None:
+        """Advance the wheel and fire absence for keys past their timeout."""
+        now = time.monotonic()
+        target = int(now)
+        # After a long stall every slot is due once
+        start = max(self._cursor + 1, target - WHEEL_SLOTS + 1)
+        for second in range(start, target + 1):
+            slot = self._wheel[second % WHEEL_SLOTS]
+            if not slot:
+                continue
+            for key in list(slot):
+                state = self._state.get(key)
+                if state is None:
+                    slot.discard(key)
+                    continue
+                rule, address = key
+                deadline = state[0] + rule.timeout
+                if deadline <= now:
+                    slot.discard(key)
+                    del self._state[key]
+                    self._fire(rule, address, state[1], None, "absent")
+                elif self._slot(deadline) != second % WHEEL_SLOTS:
+                    # Seen since it was scheduled; move to its new deadline
+                    slot.discard(key)
+                    self._schedule(key, deadline)
+        self._cursor = target
+
+    def _fire(self, rule: Rule, address: str, gateway: tuple, rssi, kind: str):
+        """Fire the rule event."""
+        self.hass.bus.async_fire(
+            EVENT_RULE,
+            {
+                "rule": rule.name,
+                "type": kind,
+                "address": address,
+                "gateway": gateway[1],
+                "rssi": rssi,
+            },
+        )
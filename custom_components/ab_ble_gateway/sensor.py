@@ -0,0 +1,189 @@
+"""Summary sensors for each AB BLE Gateway."""
+
+from __future__ import annotations
+
+from abc import abstractmethod
+import datetime
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorStateClass,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import SIGNAL_STRENGTH_DECIBELS_MILLIWATT
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.device_registry import CONNECTION_BLUETOOTH, DeviceInfo
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_track_time_interval
+
+from .const import DOMAIN, SUMMARY_INTERVAL
+from .tracking import TrackedDevices
+
+
+async def async_setup_entry(
+    hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
+) -> None:
+    """Set up the summary sensors of a gateway."""
+    scanner = hass.data[DOMAIN][entry.entry_id]["scanner"]
+    entities = [
+        DevicesSeenSensor(entry, scanner),
+        NewDevicesSensor(entry, scanner),
+        StrongestDevicesSensor(entry, scanner),
+    ]
+    async_add_entities(entities)
+
+    if scanner.tracked is not None:
+        async_add_entities(
+            TrackedRssiSensor(
+                entry,
+                scanner.tracked,
+                address,
+                scanner.device_names.get(address, address),
+            )
+            for address in scanner.tracked.devices
+        )
+
+    @callback
+    def refresh(*_):
+        """Expire the window once and update all sensors that changed."""
+        scanner.summary.expire()
+        for entity in entities:
+            entity.async_refresh()
+
+    entry.async_on_unload(
+        async_track_time_interval(
+            hass, refresh, datetime.timedelta(seconds=SUMMARY_INTERVAL)
+        )
+    )
+
+
+class GatewaySummarySensor(SensorEntity):
+    """Base for sensors reading a scanner's DeviceSummary."""
+
+    _attr_should_poll = False
+    _key = ""
+
+    def __init__(self, entry: ConfigEntry, scanner) -> None:
+        """Initialize the sensor."""
+        self._scanner = scanner
+        self._attr_unique_id = f"{entry.unique_id}_{self._key}"
+        self._attr_name = f"{entry.title} {self._key.replace('_', ' ')}"
+
+    @abstractmethod
+    def _value(self):
+        """Return the current state."""
+
+    @callback
+    def async_refresh(self) -> None:
+        """Write the state only if it changed."""
+        value = self._value()
+        attrs_changed = self._attrs_changed()
+        if value != self._attr_native_value or attrs_changed:
+            self._attr_native_value = value
+            if self.hass is not None:
+                self.async_write_ha_state()
+
+    def _attrs_changed(self) -> bool:
+        """Return True if the extra attributes changed."""
+        return False
+
+
+class DevicesSeenSensor(GatewaySummarySensor):
+    """Devices heard by the gateway within the summary window."""
+
+    _key = "devices_seen"
+    _attr_icon = "mdi:bluetooth"
+    _attr_native_unit_of_measurement = "devices"
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def _value(self):
+        return self._scanner.summary.devices
+
+
+class NewDevicesSensor(GatewaySummarySensor):
+    """Previously unknown devices that showed up within the summary window."""
+
+    _key = "new_devices"
+    _attr_icon = "mdi:bluetooth-connect"
+    _attr_native_unit_of_measurement = "devices"
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def _value(self):
+        return self._scanner.summary.new_devices
+
+
+class StrongestDevicesSensor(GatewaySummarySensor):
+    """RSSI of the strongest device, with the top-N list as an attribute."""
+
+    _key = "strongest_devices"
+    _attr_icon = "mdi:signal"
+    _attr_native_unit_of_measurement = SIGNAL_STRENGTH_DECIBELS_MILLIWATT
+    _attr_extra_state_attributes = {"devices": []}
+
+    def _value(self):
+        self._top = [
+            {
+                "address": address,
+                "name": self._scanner.device_names.get(address, ""),
+                "rssi": rssi,
+            }
+            for address, rssi in self._scanner.summary.strongest()
+        ]
+        return self._top[0]["rssi"] if self._top else None
+
+    def _attrs_changed(self) -> bool:
+        if self._top == self._attr_extra_state_attributes["devices"]:
+            return False
+        self._attr_extra_state_attributes = {"devices": self._top}
+        return True
+
+
+class TrackedRssiSensor(SensorEntity):
+    """RSSI of a selected device, written at most once per write interval."""
+
+    _attr_should_poll = False
+    _attr_available = False
+    _attr_device_class = SensorDeviceClass.SIGNAL_STRENGTH
+    _attr_native_unit_of_measurement = SIGNAL_STRENGTH_DECIBELS_MILLIWATT
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(
+        self, entry: ConfigEntry, tracked: TrackedDevices, address: str, name: str
+    ) -> None:
+        """Initialize the sensor."""
+        self._tracked = tracked
+        self._address = address
+        self._last_write = None
+        self._attr_unique_id = f"{entry.unique_id}_{address}_rssi"
+        self._attr_name = f"{name} RSSI"
+        self._attr_device_info = DeviceInfo(
+            connections={(CONNECTION_BLUETOOTH, address)}
+        )
+
+    async def async_added_to_hass(self) -> None:
+        """Start receiving coalesced updates."""
+        self.async_on_remove(self._tracked.async_add_entity(self._address, self))
+
+    @callback
+    def async_maybe_write(self, now: float) -> None:
+        """Write the state if the interval passed and the value moved enough."""
+        if self._last_write is not None and now - self._last_write < (
+            self._tracked.interval
+        ):
+            return
+        rssi = self._tracked.devices[self._address][0]
+        available = self._tracked.present(self._address, now)
+        if available == self._attr_available and (
+            rssi is None
+            or (
+                self._attr_native_value is not None
+                and abs(rssi - self._attr_native_value) < self._tracked.threshold
+            )
+        ):
+            return
+        self._attr_available = available
+        if rssi is not None:
+            self._attr_native_value = round(rssi)
+        self._last_write = now
+        self.async_write_ha_state()
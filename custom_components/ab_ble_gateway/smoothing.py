@@ -0,0 +1,116 @@
+"""RSSI smoothing with per-device state kept in preallocated arrays."""
+
+from __future__ import annotations
+
+from array import array
+
+from .const import SMOOTHING_EMA, SMOOTHING_KALMAN, SMOOTHING_MEDIAN
+
+# Weight of a new reading in the exponential moving average
+EMA_ALPHA = 0.3
+# Readings the median filter looks at
+MEDIAN_WINDOW = 5
+# Kalman process noise (how fast the true RSSI drifts) and measurement noise,
+# both in dB²
+KALMAN_Q = 0.5
+KALMAN_R = 9.0
+
+
+class RssiSmoother:
+    """Smooth RSSI per device with EMA, median-of-k or a 1-D Kalman filter.
+
+    Each device gets a slot in flat arrays of floats through an
+    address-to-slot table, so an update is a dict lookup and a few float
+    operations. Slots are released when the scanner stops tracking a
+    device; if all slots are taken, readings pass through unsmoothed.
+    """
+
+    def __init__(self, method: str, capacity: int) -> None:
+        """Allocate state for `capacity` devices."""
+        self.method = method
+        self.capacity = capacity
+        self._slots = {}
+        self._free = list(range(capacity - 1, -1, -1))
+        # readings seen per slot
+        self._count = array("Q", bytes(8 * capacity))
+        # EMA value or Kalman estimate
+        self._value = array("d", bytes(8 * capacity))
+        # Kalman error variance
+        self._variance = array("d", bytes(8 * capacity))
+        # MEDIAN_WINDOW readings per slot, used as a ring
+        window = MEDIAN_WINDOW if method == SMOOTHING_MEDIAN else 0
+        self._history = array("d", bytes(8 * capacity * window))
+        self.update = {
+            SMOOTHING_EMA: self._update_ema,
+            SMOOTHING_MEDIAN: self._update_median,
+            SMOOTHING_KALMAN: self._update_kalman,
+        }[method]
+
+    def _slot(self, address: str):
+        """Return the slot of a device, assigning a free one if needed."""
+        slot = self._slots.get(address)
+        if slot is None and self._free:
+            slot = self._free.pop()
+            self._slots[address] = slot
+            self._count[slot] = 0
+        return slot
+
+    def release(self, address: str) -> None:
+        """Free the slot of a device that is no longer tracked."""
+        slot = self._slots.pop(address, None)
+        if slot is not None:
+            self._free.append(slot)
+
+    def value(self, address: str):
+        """Return the last smoothed value of a device, or None."""
+        slot = self._slots.get(address)
+        if slot is None or not self._count[slot]:
+            return None
+        if self.method == SMOOTHING_MEDIAN:
+            return self._median(slot)
+        return self._value[slot]
+
+    def _update_ema(self, address: str, rssi: float) -> float:
+        """Exponential moving average."""
+        slot = self._slot(address)
+        if slot is None:
+            return rssi
+        if self._count[slot]:
+            rssi = self._value[slot] + EMA_ALPHA * (rssi - self._value[slot])
+        self._count[slot] += 1
+        self._value[slot] = rssi
+        return rssi
+
+    def _median(self, slot: int) -> float:
+        """Median of the readings in a slot's window."""
+        filled = min(self._count[slot], MEDIAN_WINDOW)
+        start = slot * MEDIAN_WINDOW
+        return sorted(self._history[start : start + filled])[filled // 2]
+
+    def _update_median(self, address: str, rssi: float) -> float:
+        """Median of the last MEDIAN_WINDOW readings."""
+        slot = self._slot(address)
+        if slot is None:
+            return rssi
+        count = self._count[slot]
+        self._history[slot * MEDIAN_WINDOW + count % MEDIAN_WINDOW] = rssi
+        self._count[slot] = count + 1
+        return self._median(slot)
+
+    def _update_kalman(self, address: str, rssi: float) -> float:
+        """One-dimensional Kalman filter with a constant-value model."""
+        slot = self._slot(address)
+        if slot is None:
+            return rssi
+        if not self._count[slot]:
+            estimate = rssi
+            variance = KALMAN_R
+        else:
+            variance = self._variance[slot] + KALMAN_Q
+            gain = variance / (variance + KALMAN_R)
+            estimate = self._value[slot] + gain * (rssi - self._value[slot])
+            variance *= 1 - gain
+        self._count[slot] += 1
+        self._value[slot] = estimate
+        self._variance[slot] = variance
+        return estimate
@@ -0,0 +1,69 @@
+"""Incrementally maintained per-gateway device summaries for the sensors."""
+
+from __future__ import annotations
+
+from collections import OrderedDict, deque
+import heapq
+import time
+
+from .const import DEFAULT_SUMMARY_WINDOW, SUMMARY_TOP_N
+
+
+class DeviceSummary:
+    """Devices seen within a sliding window, their RSSI and new arrivals.
+
+    add() is O(1): the window is an OrderedDict kept in last-seen order, so
+    expiring old devices only ever pops from the front. The top-N list is
+    computed with a bounded heap when the sensors refresh, not per record.
+    """
+
+    def __init__(self, window=DEFAULT_SUMMARY_WINDOW * 60):
+        """Initialize an empty summary with a window in seconds."""
+        self.window = window
+        # {address: (monotonic time last seen, rssi)}, least recently seen first
+        self._seen = OrderedDict()
+        # monotonic times at which previously unknown devices showed up
+        self._new = deque()
+
+    def add(self, address: str, rssi: int, new: bool, now=None) -> None:
+        """Count a record from `address`; `new` if it wasn't known before."""
+        if now is None:
+            now = time.monotonic()
+        seen = self._seen
+        if address in seen:
+            seen.move_to_end(address)
+        seen[address] = (now, rssi)
+        if new:
+            self._new.append(now)
+
+    def expire(self, now=None) -> None:
+        """Drop devices and arrivals older than the window."""
+        cutoff = (time.monotonic() if now is None else now) - self.window
+        seen = self._seen
+        while seen:
+            address, (last, _) = next(iter(seen.items()))
+            if last > cutoff:
+                break
+            del seen[address]
+        new = self._new
+        while new and new[0] <= cutoff:
+            new.popleft()
+
+    @property
+    def devices(self) -> int:
+        """Number of devices seen within the window (after expire())."""
+        return len(self._seen)
+
+    @property
+    def new_devices(self) -> int:
+        """Number of new devices within the window (after expire())."""
+        return len(self._new)
+
+    def strongest(self, count=SUMMARY_TOP_N) -> list[tuple[str, int]]:
+        """Return [(address, rssi)] of the strongest devices in the window."""
+        return [
+            (address, rssi)
+            for address, (_, rssi) in heapq.nlargest(
+                count, self._seen.items(), key=lambda item: item[1][1]
+            )
+        ]
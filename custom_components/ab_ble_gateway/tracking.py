@@ -0,0 +1,98 @@
+"""Coalesced state updates for the opt-in per-device entities."""
+
+from __future__ import annotations
+
+import time
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+
+from .const import (
+    CONSIDER_HOME,
+    DEFAULT_RSSI_THRESHOLD,
+    DEFAULT_WRITE_INTERVAL,
+)
+
+
+def parse_addresses(value: str) -> list[str]:
+    """Parse a comma/space separated MAC list into AA:BB:CC:DD:EE:FF form."""
+    addresses = []
+    for raw in value.replace(",", " ").split():
+        mac = raw.upper().replace("-", "").replace(":", "")
+        if len(mac) != 12:
+            continue
+        mac = ":".join(mac[i : i + 2] for i in range(0, 12, 2))
+        if mac not in addresses:
+            addresses.append(mac)
+    return addresses
+
+
+class TrackedDevices:
+    """Latest RSSI of the selected devices and the entities showing them.
+
+    Records only update a small list per device and mark it dirty. Dirty
+    devices are flushed once per event loop iteration, and each entity
+    decides whether a state write is due, so a device heard on every frame
+    costs at most one write per entity per write interval.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        addresses: list[str],
+        interval=DEFAULT_WRITE_INTERVAL,
+        threshold=DEFAULT_RSSI_THRESHOLD,
+    ) -> None:
+        """Initialize for the given addresses."""
+        self.hass = hass
+        self.interval = interval
+        self.threshold = threshold
+        # {address: [rssi, monotonic time last seen]}
+        self.devices = {address: [None, None] for address in addresses}
+        self._entities = {address: [] for address in addresses}
+        self._dirty = set()
+        self._flush_scheduled = False
+
+    @callback
+    def async_update(self, address: str, rssi: float) -> None:
+        """Record an RSSI reading of a tracked device."""
+        device = self.devices[address]
+        device[0] = rssi
+        device[1] = time.monotonic()
+        self._dirty.add(address)
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            self.hass.loop.call_soon(self._async_flush)
+
+    @callback
+    def _async_flush(self) -> None:
+        """Let the entities of every device updated this iteration write."""
+        self._flush_scheduled = False
+        dirty, self._dirty = self._dirty, set()
+        now = time.monotonic()
+        for address in dirty:
+            for entity in self._entities[address]:
+                entity.async_maybe_write(now)
+
+    @callback
+    def async_tick(self, *_) -> None:
+        """Write delayed values and notice devices that went away."""
+        now = time.monotonic()
+        for entities in self._entities.values():
+            for entity in entities:
+                entity.async_maybe_write(now)
+
+    def present(self, address: str, now: float) -> bool:
+        """Return True if the device was heard within CONSIDER_HOME."""
+        last_seen = self.devices[address][1]
+        return last_seen is not None and now - last_seen < CONSIDER_HOME
+
+    @callback
+    def async_add_entity(self, address: str, entity) -> CALLBACK_TYPE:
+        """Register an entity for a device; returns a remove callback."""
+        self._entities[address].append(entity)
+
+        @callback
+        def remove() -> None:
+            self._entities[address].remove(entity)
+
+        return remove
@@ -1,8 +1,17 @@
+from __future__ import annotations
+
 import logging
 from uuid import UUID
 
 _LOGGER = logging.getLogger(__name__)
 
+# Random address sub-types by the two most significant bits of the address
+RANDOM_SUBTYPES = ("non_resolvable", "resolvable", "reserved", "static")
+# Manufacturer data bytes after the company ID that are kept in a fingerprint;
+# e.g. the type and length of an Apple continuity message. Those tell the kind
+# of device apart, not the device: AliasTable also matches time and RSSI.
+FINGERPRINT_BYTES = 2
+
 
 def to_unformatted_mac(addr: int):
     """Return unformatted MAC address"""
@@ -14,6 +23,66 @@ def to_mac(addr: str) -> str:
     return ":".join(f"{i:02X}" for i in addr)
 
 
+def is_non_resolvable_random(address_type: int, mac: bytes) -> bool:
+    """Return True for a random non-resolvable private address.
+
+    Those change on every advertising cycle or so and can't be resolved with
+    an IRK, so tracking them only fills the device table.
+    """
+    # Random address type with the two most significant bits cleared
+    return address_type == 1 and len(mac) > 0 and mac[0] >> 6 == 0
+
+
+def address_kind(address_type: int, mac: bytes) -> str:
+    """Classify an address as public, static, resolvable or non_resolvable.
+
+    `address_type` is the gateway's address type byte (1 for random) and the
+    random sub-type is in the two most significant bits of the address.
+    """
+    if address_type != 1 or len(mac) == 0:
+        return "public"
+    return RANDOM_SUBTYPES[mac[0] >> 6]
+
+
+def ad_fingerprint(adv: bytes) -> bytes | None:
+    """Return the parts of an advertisement that survive address rotation.
+
+    That is the length, company ID and first FINGERPRINT_BYTES bytes of
+    manufacturer data, the length and UUID of service data, 16-bit service
+    UUIDs and the local name. Counters, keys and sensor readings further into
+    the payload are left out. Returns None if the advertisement carries none
+    of those.
+    """
+    parts = []
+    pos = 0
+    while pos + 1 < len(adv):
+        size = adv[pos]
+        if size == 0 or pos + 1 + size > len(adv):
+            break
+        ad_type = adv[pos + 1]
+        value = adv[pos + 2 : pos + 1 + size]
+        if ad_type in (0xFF, 0x16):
+            keep = 2 + FINGERPRINT_BYTES if ad_type == 0xFF else 2
+            parts.append(bytes((ad_type, len(value))) + value[:keep])
+        elif ad_type in (0x02, 0x03, 0x08, 0x09):
+            parts.append(bytes((ad_type,)) + value)
+        pos += 1 + size
+    if not parts:
+        return None
+    return b"".join(parts)
+
+
+def rotating_fingerprint(address_type: int, mac: bytes, adv: bytes) -> bytes | None:
+    """Return the payload fingerprint of a rotating private address.
+
+    Public and static random addresses are stable by themselves; None is
+    returned for those, as for payloads without a fingerprint.
+    """
+    if address_kind(address_type, mac) not in ("resolvable", "non_resolvable"):
+        return None
+    return ad_fingerprint(adv)
+
+
 def parse_ap_ble_devices_data(devices_data):
     """Converts the April Brother BLE Gateway Data Format into Raw HCI Packets"""
     # See  https://wiki.aprbrother.com/en/User_Guide_For_AB_BLE_Gateway_V4.html#data-format
@@ -0,0 +1,61 @@
+"""HTTP endpoint gateways can POST their frames to instead of using MQTT."""
+
+from __future__ import annotations
+
+import hmac
+from http import HTTPStatus
+import logging
+
+from aiohttp import web
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_HTTP_TOKEN, DOMAIN, INGEST_URL
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class AbBleGatewayIngestView(HomeAssistantView):
+    """Receive gateway frames (msgpack or JSON) over HTTP.
+
+    Gateways can't send a Home Assistant access token, so each config entry
+    has its own token that is passed as `?token=` in the gateway's http-url
+    (or as a bearer token). aiohttp keeps HTTP/1.1 connections alive, so a
+    gateway posting every req-int seconds reuses one connection.
+    """
+
+    url = INGEST_URL
+    name = "api:ab_ble_gateway:ingest"
+    requires_auth = False
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the view."""
+        self.hass = hass
+
+    async def post(self, request: web.Request, entry_id: str) -> web.Response:
+        """Feed a posted frame into the entry's scanner."""
+        entry = self.hass.config_entries.async_get_entry(entry_id)
+        entry_data = self.hass.data.get(DOMAIN, {}).get(entry_id)
+        if (
+            entry is None
+            or entry.domain != DOMAIN
+            or not isinstance(entry_data, dict)
+            or "scanner" not in entry_data
+        ):
+            return web.Response(status=HTTPStatus.NOT_FOUND)
+
+        token = request.query.get("token", "")
+        if not token:
+            auth_header = request.headers.get("Authorization", "")
+            if auth_header.startswith("Bearer "):
+                token = auth_header[7:]
+        expected = entry.data.get(CONF_HTTP_TOKEN)
+        # compare_digest() rejects str with non-ASCII characters, compare bytes
+        if not expected or not hmac.compare_digest(
+            token.encode(), expected.encode()
+        ):
+            _LOGGER.debug("Rejected frame for %s: bad token", entry.title)
+            return web.Response(status=HTTPStatus.UNAUTHORIZED)
+
+        entry_data["scanner"].async_on_payload(await request.read())
+        return web.Response(status=HTTPStatus.OK)
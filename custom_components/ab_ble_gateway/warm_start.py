@@ -0,0 +1,62 @@
+"""Persist each scanner's last-seen devices so they can be replayed on startup."""
+
+from __future__ import annotations
+
+import base64
+import logging
+import time
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+import msgpack
+
+from .const import DOMAIN, WARM_START_TTL
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+
+
+class LastSeenStore:
+    """Compact snapshot of a scanner's last-seen table.
+
+    The table {mac: [raw record, rssi, wall-clock time]} is packed with
+    msgpack (raw gateway records stay bytes) and kept as a single base64
+    blob in a Home Assistant Store.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the store for one config entry."""
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.last_seen")
+        self._table = {}
+
+    @staticmethod
+    def _pack(table: dict) -> dict:
+        """Pack the table into the stored representation."""
+        packed = msgpack.packb(
+            [[mac, *entry] for mac, entry in table.items()], use_bin_type=True
+        )
+        return {"devices": base64.b64encode(packed).decode("ascii")}
+
+    async def async_load(self, ttl=WARM_START_TTL) -> list:
+        """Return (raw record, time seen) of devices seen within `ttl` seconds."""
+        try:
+            data = await self._store.async_load()
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.warning("Could not load last-seen devices: %s", err)
+            return []
+        if not data or "devices" not in data:
+            return []
+        cutoff = time.time() - ttl
+        rows = msgpack.unpackb(base64.b64decode(data["devices"]), raw=False)
+        return [(record, seen) for _, record, _, seen in rows if seen >= cutoff]
+
+    @callback
+    def async_schedule_save(self, table: dict) -> None:
+        """Snapshot the table; written by the Store shortly after."""
+        self._table = table
+        self._store.async_delay_save(lambda: self._pack(self._table), 1)
+
+    async def async_save(self, table: dict) -> None:
+        """Write the table now, e.g. when the entry unloads."""
+        await self._store.async_save(self._pack(table))
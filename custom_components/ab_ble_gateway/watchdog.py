@@ -0,0 +1,147 @@
+"""Detect silent gateways and resubscribe only their topic."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    CONF_CONNECTION,
+    CONF_REQ_INT,
+    CONNECTION_MQTT,
+    DOMAIN,
+    HEALTH_OK,
+    HEALTH_RECOVERING,
+    HEALTH_SILENT,
+    WATCHDOG_BACKOFF_BASE,
+    WATCHDOG_BACKOFF_MAX,
+    WATCHDOG_FACTOR,
+)
+from .gateway import async_fetch_profile
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class GatewayHealth:
+    """Health state of one gateway, as seen by the watchdog."""
+
+    def __init__(self):
+        """Initialize as healthy."""
+        self.state = HEALTH_OK
+        self.failures = 0
+        self.silent_since = None
+        self.next_attempt = 0.0
+        self.last_resubscribe = None
+
+    def as_dict(self) -> dict:
+        """Return the state for diagnostics and services."""
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "silent_for": (
+                round(time.monotonic() - self.silent_since)
+                if self.silent_since is not None
+                else 0
+            ),
+        }
+
+
+async def _async_req_int(hass: HomeAssistant, entry, entry_data: dict) -> int:
+    """Return the req-int the gateway reports in its /config.
+
+    The options only hold what was last pushed from HA, a gateway configured
+    elsewhere may send at a different interval. The gateway is asked once;
+    the options are used while it can't be reached and the advisor refreshes
+    the stored profile.
+    """
+    profile = entry_data.get("gateway_profile")
+    if profile is None:
+        try:
+            profile = await async_fetch_profile(hass, entry)
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.debug("Could not read config of %s: %s", entry.title, err)
+            profile = {}
+        entry_data["gateway_profile"] = profile
+    return max(profile.get(CONF_REQ_INT) or entry.options.get(CONF_REQ_INT) or 1, 1)
+
+
+async def async_watchdog_tick(hass: HomeAssistant, resubscribe, *_) -> None:
+    """Check every gateway for silence; resubscribe silent ones with backoff.
+
+    `resubscribe(hass, entry_id)` replaces one entry's subscription and
+    returns (topic, latency or None).
+    """
+    domain_data = hass.data.get(DOMAIN, {})
+    # A tick waiting on a gateway's /config or a resubscribe must not overlap
+    # with the next one
+    if domain_data.get("reconnect_in_progress") or domain_data.get("watchdog_running"):
+        return
+    domain_data["watchdog_running"] = True
+    try:
+        await _async_check_gateways(hass, domain_data, resubscribe)
+    finally:
+        domain_data["watchdog_running"] = False
+
+
+async def _async_check_gateways(
+    hass: HomeAssistant, domain_data: dict, resubscribe
+) -> None:
+    """Run one watchdog pass over all gateways."""
+    entries = [
+        (entry, domain_data[entry.entry_id])
+        for entry in hass.config_entries.async_entries(DOMAIN)
+        if isinstance(domain_data.get(entry.entry_id), dict)
+        and "scanner" in domain_data[entry.entry_id]
+    ]
+    # Ask all gateways that have no stored profile yet at once
+    req_ints = await asyncio.gather(
+        *(_async_req_int(hass, entry, entry_data) for entry, entry_data in entries)
+    )
+
+    now = time.monotonic()
+    for (entry, entry_data), req_int in zip(entries, req_ints):
+        health = entry_data.setdefault("health", GatewayHealth())
+        last_frame = entry_data["scanner"].last_frame
+        timeout = WATCHDOG_FACTOR * req_int
+
+        if now - last_frame < timeout:
+            if health.state != HEALTH_OK:
+                _LOGGER.info("Gateway %s is sending frames again", entry.title)
+            health.state = HEALTH_OK
+            health.failures = 0
+            health.silent_since = None
+            continue
+
+        if health.silent_since is None:
+            health.silent_since = last_frame
+            health.state = HEALTH_SILENT
+            _LOGGER.warning(
+                "No frames from gateway %s for %.0f s", entry.title, now - last_frame
+            )
+        # HTTP gateways post to us, there is no subscription to replace
+        if (
+            now < health.next_attempt
+            or entry.data.get(CONF_CONNECTION, CONNECTION_MQTT) != CONNECTION_MQTT
+        ):
+            continue
+
+        # A failed attempt leaves no subscription behind; keep retrying on the
+        # backoff until one succeeds
+        topic, latency = await resubscribe(hass, entry.entry_id)
+        if latency is not None:
+            health.state = HEALTH_RECOVERING
+        health.last_resubscribe = now
+        health.next_attempt = now + min(
+            WATCHDOG_BACKOFF_BASE * 2**health.failures, WATCHDOG_BACKOFF_MAX
+        )
+        health.failures += 1
+        _LOGGER.warning(
+            "Resubscribed silent gateway %s on %s (attempt %d, %s)",
+            entry.title,
+            topic,
+            health.failures,
+            "failed" if latency is None else f"{latency * 1000:.0f} ms",
+        )
@@ -4,7 +4,6 @@ Enhanced BLE Device Discovery Add-on for Home Assistant
 """
 
 import argparse
-import json
 import logging
 import os
 import sys
@@ -13,10 +12,22 @@ from datetime import datetime, timedelta
 import uuid
 import requests
 
+from codec import dumps, loads
+
 # Configuration
 DISCOVERIES_FILE = "/config/bluetooth_discoveries.json"
 DEFAULT_SCAN_INTERVAL = 60
 DEFAULT_GATEWAY_TOPIC = "xbg"
+# Rotating random addresses kept per logical device in discoveries.json
+MAX_ALIASES = 16
+# Random address sub-types by the two most significant bits of the address
+RANDOM_SUBTYPES = ("non_resolvable", "resolvable", "reserved", "static")
+# Manufacturer data bytes after the company ID that identify a device's payload
+FINGERPRINT_BYTES = 2
+# A new rotating address continues a known device with the same fingerprint
+# that was last seen this recently, at an RSSI this close
+ALIAS_WINDOW = timedelta(minutes=10)
+ALIAS_RSSI_DELTA = 8
 
 def setup_logging(log_level):
     """Configure logging based on input level."""
@@ -82,8 +93,8 @@ def load_discoveries():
     """Load previously discovered devices."""
     try:
         if os.path.exists(DISCOVERIES_FILE):
-            with open(DISCOVERIES_FILE, 'r') as f:
-                return json.load(f)
+            with open(DISCOVERIES_FILE, 'rb') as f:
+                return loads(f.read())
     except Exception as e:
         logging.error(f"Error loading discoveries: {e}")
     return []
@@ -91,8 +102,8 @@ def load_discoveries():
 def save_discoveries(discoveries):
     """Save discoveries to file."""
     try:
-        with open(DISCOVERIES_FILE, 'w') as f:
-            json.dump(discoveries, f, indent=2)
+        with open(DISCOVERIES_FILE, 'wb') as f:
+            f.write(dumps(discoveries, indent=True))
         return True
     except Exception as e:
         logging.error(f"Error saving discoveries: {e}")
@@ -151,7 +162,7 @@ def get_ble_gateway_data():
             logging.error(f"Error getting states: {response.status_code} - {response.text}")
             return []
             
-        states = response.json()
+        states = loads(response.content)
         
         # Look for bluetooth devices in the states
         devices = []
@@ -198,7 +209,7 @@ def get_ble_gateway_data():
                     headers=headers
                 )
                 if alt_response.status_code >= 200 and alt_response.status_code < 300:
-                    state_data = alt_response.json()
+                    state_data = loads(alt_response.content)
                     if 'attributes' in state_data and 'devices' in state_data['attributes']:
                         devices = state_data['attributes']['devices']
                         logging.info(f"Found {len(devices)} devices in {sensor_name}")
@@ -208,7 +219,7 @@ def get_ble_gateway_data():
             create_ble_gateway_sensor()
             return []
             
-        state_data = response.json()
+        state_data = loads(response.content)
         
         # Check if we have attributes with devices
         if 'attributes' in state_data and 'devices' in state_data['attributes']:
@@ -487,6 +498,71 @@ def simulate_bluetooth_scan():
         ["Simulated Device 2", "DD:EE:FF:44:55:66", "-78", "{}"]
     ]
 
+def address_kind(address_type, mac):
+    """Classify a MAC as public, static, resolvable or non_resolvable.
+
+    Only gateway records ([type, mac, rssi, adv]) carry the address type;
+    anything else is reported as unknown.
+    """
+    if not isinstance(address_type, int):
+        return "unknown"
+    if address_type != 1:
+        return "public"
+    try:
+        return RANDOM_SUBTYPES[int(mac.replace(":", "")[:2], 16) >> 6]
+    except ValueError:
+        return "unknown"
+
+def ad_fingerprint(adv_data):
+    """
+    Return the parts of a hex advertisement that survive address rotation:
+    length, company ID and leading bytes of manufacturer data, length and UUID
+    of service data, 16-bit service UUIDs and name. That tells the kind of
+    device apart, not the device; see find_rotated_device().
+    Returns None if the advertisement isn't hex or carries none of those.
+    """
+    try:
+        adv = bytes.fromhex(adv_data)
+    except (TypeError, ValueError):
+        return None
+    parts = []
+    pos = 0
+    while pos + 1 < len(adv):
+        size = adv[pos]
+        if size == 0 or pos + 1 + size > len(adv):
+            break
+        ad_type = adv[pos + 1]
+        value = adv[pos + 2:pos + 1 + size]
+        if ad_type in (0xFF, 0x16):
+            keep = 2 + FINGERPRINT_BYTES if ad_type == 0xFF else 2
+            parts.append(bytes((ad_type, len(value))) + value[:keep])
+        elif ad_type in (0x02, 0x03, 0x08, 0x09):
+            parts.append(bytes((ad_type,)) + value)
+        pos += 1 + size
+    return b"".join(parts).hex() if parts else None
+
+def find_rotated_device(candidates, device, heard):
+    """
+    Return the known device a new rotating address most likely belongs to.
+    Candidates share its fingerprint; the one that wasn't heard under another
+    address in this scan, was last seen within ALIAS_WINDOW and is closest
+    in RSSI (within ALIAS_RSSI_DELTA) wins. Returns None if none qualifies.
+    """
+    now = datetime.now()
+    best = None
+    best_delta = ALIAS_RSSI_DELTA + 1
+    for known in candidates:
+        if id(known) in heard:
+            continue
+        try:
+            age = now - datetime.fromisoformat(known["last_seen"])
+            delta = abs(int(known["rssi"]) - int(device["rssi"]))
+        except (KeyError, TypeError, ValueError):
+            continue
+        if age <= ALIAS_WINDOW and delta < best_delta:
+            best, best_delta = known, delta
+    return best
+
 def process_ble_gateway_data(gateway_devices):
     """
     Process the raw BLE gateway data into a structured format.
@@ -499,7 +575,8 @@ def process_ble_gateway_data(gateway_devices):
             if len(device) >= 3:
                 # Extract MAC address (index 1) and RSSI (index 2)
                 mac = device[1] if device[1] else "UNKNOWN"
-                rssi = int(device[2]) if device[2] and device[2].strip() else -100
+                # Gateway records carry an int RSSI, HA states a string
+                rssi = int(device[2]) if str(device[2]).strip() else -100
                 
                 # Extract advertisement data if available
                 adv_data = device[3] if len(device) > 3 and device[3] else ""
@@ -867,12 +944,20 @@ def process_ble_gateway_data(gateway_devices):
                     except:
                         pass
                 
+                # Rotating private addresses are grouped by payload fingerprint
+                kind = address_kind(device[0], mac)
+                fingerprint = None
+                if kind in ("resolvable", "non_resolvable"):
+                    fingerprint = ad_fingerprint(adv_data)
+                
                 # Create device entry
                 device_entry = {
                     "mac_address": mac,
                     "rssi": rssi,
                     "manufacturer": manufacturer,
                     "device_type": device_type,
+                    "address_type": kind,
+                    "fingerprint": fingerprint,
                     "adv_data": adv_data,
                     "last_seen": datetime.now().isoformat()
                 }
@@ -975,7 +1060,7 @@ def trigger_bluetooth_scan():
                 requests.post(
                     "http://supervisor/core/api/states/sensor.ble_gateway_raw_data",
                     headers=headers,
-                    json=sensor_data
+                    data=dumps(sensor_data)
                 )
                 logging.info("Updated BLE gateway sensor with simulated devices")
                 success = True
@@ -1017,10 +1102,11 @@ def update_ha_input_text(entity_id, value):
         logging.error(f"Error updating input_text: {e}")
         return False
 
-def discover_ble_devices(force_scan=False):
+def discover_ble_devices(force_scan=False, collapse_random=False):
     """
     Discover BLE devices using the BLE gateway.
-    Optionally trigger a fresh scan.
+    Optionally trigger a fresh scan, and fold new rotating addresses into
+    the known device they most likely belong to.
     """
     # Trigger a new scan if requested
     if force_scan:
@@ -1042,12 +1128,41 @@ def discover_ble_devices(force_scan=False):
     # Flag to track if we found new devices
     new_devices_found = False
     
+    # Index known devices by MAC, their aliases and payload fingerprint
+    by_mac = {}
+    by_fingerprint = {}
+    for known in discoveries:
+        by_mac[known["mac_address"]] = known
+        for alias in known.get("aliases", ()):
+            by_mac[alias] = known
+        if collapse_random and known.get("fingerprint"):
+            by_fingerprint.setdefault(known["fingerprint"], []).append(known)
+    
+    # Known devices heard in this scan under an address they already have;
+    # those are advertising and can't have rotated to another address
+    heard = {
+        id(by_mac[d["mac_address"]])
+        for d in processed_devices
+        if d["mac_address"] in by_mac
+    }
+    
     # Update existing devices and add new ones
     for device in processed_devices:
         device_mac = device["mac_address"]
+        fingerprint = device.get("fingerprint") if collapse_random else None
         
-        # Check if this is a new device
-        existing_device = next((d for d in discoveries if d["mac_address"] == device_mac), None)
+        # Check if this is a new device, or a known one with a new address
+        existing_device = by_mac.get(device_mac)
+        if existing_device is None and fingerprint:
+            existing_device = find_rotated_device(
+                by_fingerprint.get(fingerprint, ()), device, heard
+            )
+            if existing_device is not None:
+                aliases = existing_device.setdefault("aliases", [])
+                aliases.append(device_mac)
+                del aliases[:-MAX_ALIASES]
+                by_mac[device_mac] = existing_device
+                heard.add(id(existing_device))
         
         if existing_device:
             # Update existing device
@@ -1060,6 +1175,10 @@ def discover_ble_devices(force_scan=False):
             device["discovered_at"] = datetime.now().isoformat()
             device["name"] = f"BLE Device {device_mac[-6:]}"
             discoveries.append(device)
+            by_mac[device_mac] = device
+            heard.add(id(device))
+            if fingerprint:
+                by_fingerprint.setdefault(fingerprint, []).append(device)
             new_devices_found = True
     
     # Save updated discoveries
@@ -1067,7 +1186,7 @@ def discover_ble_devices(force_scan=False):
     
     # Create a simple map of MAC to RSSI for the input_text
     mac_to_rssi = {d["mac_address"]: d["rssi"] for d in processed_devices}
-    update_ha_input_text("input_text.discovered_ble_devices", json.dumps(mac_to_rssi))
+    update_ha_input_text("input_text.discovered_ble_devices", dumps(mac_to_rssi).decode())
     
     # Create notification for new devices
     if new_devices_found:
@@ -1230,8 +1349,8 @@ def collect_system_diagnostics():
             os.makedirs(diag_dir, exist_ok=True)
             
         diag_filename = os.path.join(diag_dir, f"diagnostics_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
-        with open(diag_filename, 'w') as f:
-            json.dump(diagnostics, f, indent=2)
+        with open(diag_filename, 'wb') as f:
+            f.write(dumps(diagnostics, indent=True))
             
         logging.info(f"Diagnostics saved to {diag_filename}")
         return diagnostics
@@ -1328,7 +1447,7 @@ def get_home_assistant_activity_level():
         )
         
         if response.status_code >= 200 and response.status_code < 300:
-            history = response.json()
+            history = loads(response.content)
             
             # Count state changes as a measure of activity
             total_changes = 0
@@ -1349,7 +1468,7 @@ def get_home_assistant_activity_level():
     # Default to medium activity if we can't determine
     return 50
 
-def main(log_level, scan_interval, gateway_topic=DEFAULT_GATEWAY_TOPIC):
+def main(log_level, scan_interval, gateway_topic=DEFAULT_GATEWAY_TOPIC, collapse_random=False):
     """Main discovery loop."""
     setup_logging(log_level)
     
@@ -1387,7 +1506,7 @@ def main(log_level, scan_interval, gateway_topic=DEFAULT_GATEWAY_TOPIC):
             activity_level = get_home_assistant_activity_level()
             
             # Regular discovery
-            discovered_devices = discover_ble_devices()
+            discovered_devices = discover_ble_devices(collapse_random=collapse_random)
             logging.info(f"Regular scan complete. Total discovered devices: {len(discovered_devices)}")
             
             # Update the BLE gateway sensor with discovered devices if we have any
@@ -1412,7 +1531,7 @@ def main(log_level, scan_interval, gateway_topic=DEFAULT_GATEWAY_TOPIC):
                 requests.post(
                     "http://supervisor/core/api/states/sensor.ble_gateway_raw_data",
                     headers=headers,
-                    json=sensor_data
+                    data=dumps(sensor_data)
                 )
             
             # Update last_devices for next adaptive interval calculation
@@ -1465,7 +1584,9 @@ if __name__ == "__main__":
                         help="Interval between BLE scans in seconds")
     parser.add_argument("--gateway-topic", default=DEFAULT_GATEWAY_TOPIC,
                         help="MQTT topic for BLE gateway")
+    parser.add_argument("--collapse-random", action="store_true",
+                        help="Fold rotating random addresses into known devices")
     
     args = parser.parse_args()
     
-    main(args.log_level, args.scan_interval, args.gateway_topic)
+    main(args.log_level, args.scan_interval, args.gateway_topic, args.collapse_random)
@@ -0,0 +1,40 @@
+"""
+JSON codec for the add-on: orjson when importable, else stdlib json.
+
+Mirrors custom_components/ab_ble_gateway/codec.py. Both accept bytes without
+decoding them first; dumps() returns bytes. Decode errors are ValueError
+subclasses in either case.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+if orjson is not None:
+
+    def loads(data):
+        """Parse a JSON document from bytes or str."""
+        return orjson.loads(data)
+
+    def dumps(obj, indent=False):
+        """Serialize to UTF-8 JSON bytes, compact unless indent is set."""
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+
+else:
+
+    def loads(data):
+        """Parse a JSON document from bytes or str."""
+        return json.loads(data)
+
+    def dumps(obj, indent=False):
+        """Serialize to UTF-8 JSON bytes, compact unless indent is set."""
+        if indent:
+            return json.dumps(obj, indent=2, ensure_ascii=False).encode()
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
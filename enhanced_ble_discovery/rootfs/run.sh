@@ -5,6 +5,10 @@ source /usr/lib/bashio/bashio.sh
 LOG_LEVEL=$(bashio::config 'log_level')
 SCAN_INTERVAL=$(bashio::config 'scan_interval')
 GATEWAY_TOPIC=$(bashio::config 'gateway_topic')
+EXTRA_ARGS=()
+if bashio::config.true 'collapse_random'; then
+    EXTRA_ARGS+=(--collapse-random)
+fi
 
 # Ensure the data directory exists
 mkdir -p /config/ble_discovery
@@ -198,4 +202,5 @@ bashio::log.info "Starting Enhanced BLE Device Discovery..."
 python3 /ble_discovery.py \
     --log-level "${LOG_LEVEL}" \
     --scan-interval "${SCAN_INTERVAL}" \
-    --gateway-topic "${GATEWAY_TOPIC}"
\ No newline at end of file
+    --gateway-topic "${GATEWAY_TOPIC}" \
+    "${EXTRA_ARGS[@]}"
\ No newline at end of file
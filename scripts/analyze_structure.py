@@ -52,6 +52,7 @@ EXPECTED_PATHS = [
     "enhanced_ble_discovery/README.md",
     "enhanced_ble_discovery/rootfs/",
     "enhanced_ble_discovery/rootfs/ble_discovery.py",
+    "enhanced_ble_discovery/rootfs/codec.py",
     "enhanced_ble_discovery/rootfs/run.sh",
     "enhanced_ble_discovery/run.sh",
     "enhanced_ble_discovery/test_ble_discovery.py",
@@ -119,6 +120,7 @@ EXPECTED_PATHS = [
     "scripts/",
     "scripts/analyze_structure.py",
     "scripts/cleanup.sh",
+    "scripts/gateway_emulator.py",
     
     # Test directory
     "tests/",
@@ -0,0 +1,618 @@
+#!/usr/bin/env python3
+"""
+Emulate a fleet of AB BLE Gateway v4 devices to load test the integration.
+
+Every emulated gateway serves /info and /config over HTTP, so it can be added
+through the config flow, and publishes frames like a real gateway: msgpack or
+JSON, with mid/time fields and a device population whose RSSI random-walks.
+Frames go to an MQTT broker (needs paho-mqtt), are POSTed to the
+integration's HTTP ingest endpoint, or are only generated (--null).
+
+With --fanout pointing at the integration's fan-out socket or multicast
+group, decoded records are read back to report end-to-end latency.
+
+Usage:
+  python3 scripts/gateway_emulator.py --gateways 10 --devices 200 \\
+      --mqtt localhost:1883 --fanout /config/ab_ble_gateway.sock
+"""
+
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import random
+import socket
+import struct
+import sys
+import threading
+import time
+import urllib.request
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Company ID of the probe record that carries the frame's send time
+PROBE_COMPANY_ID = 0xFFFF
+FLAGS = bytes.fromhex("020106")
+LENGTH = struct.Struct(">I")
+
+# /config of a factory gateway, see config_flow.py
+BASE_CONFIG = {
+    "conn-type": 3,
+    "host": "127.0.0.1",
+    "port": 1883,
+    "mqtt-topic": "",
+    "http-url": "",
+    "req-int": 1,
+    "min-rssi": -127,
+    "adv-filter": 0,
+    "dup-filter": 0,
+    "scan-act": 0,
+    "mqtt-id-prefix": "XBG_",
+    "mqtt-username": "",
+    "mqtt-password": "",
+    "mqtt-retain": 0,
+    "mqtt-qos": 0,
+    "req-format": 0,
+    "metadata": "",
+    "filter-mfg": 0,
+    "filter-uuid": "",
+}
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Emulate AB BLE Gateway v4 devices and measure throughput"
+    )
+    parser.add_argument("--gateways", type=int, default=1, help="Gateways to emulate")
+    parser.add_argument(
+        "--devices", type=int, default=100, help="BLE devices heard per gateway"
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        help="Seconds between frames; defaults to each gateway's req-int",
+    )
+    parser.add_argument(
+        "--adv-rate",
+        type=float,
+        default=1.0,
+        help="Advertisements per device per second",
+    )
+    parser.add_argument(
+        "--duplicate-ratio",
+        type=float,
+        default=0.3,
+        help="Share of advertisements that repeat the device's last payload",
+    )
+    parser.add_argument(
+        "--random-share",
+        type=float,
+        default=0.3,
+        help="Share of devices using rotating resolvable random addresses",
+    )
+    parser.add_argument(
+        "--rotate", type=float, default=900, help="Seconds between address rotations"
+    )
+    parser.add_argument(
+        "--format", choices=["msgpack", "json"], default="msgpack", help="Frame format"
+    )
+    sink = parser.add_mutually_exclusive_group(required=True)
+    sink.add_argument("--mqtt", metavar="HOST:PORT", help="Publish to this broker")
+    sink.add_argument(
+        "--http",
+        metavar="URL",
+        help="POST frames to the ingest URL; {index} is replaced per gateway",
+    )
+    sink.add_argument(
+        "--null", action="store_true", help="Only generate frames, don't send them"
+    )
+    parser.add_argument(
+        "--topic",
+        default="gw/emulator-{index}",
+        help="MQTT topic per gateway; {index} is replaced",
+    )
+    parser.add_argument(
+        "--http-port",
+        type=int,
+        default=8080,
+        help="First port for the /info and /config servers; 0 disables them",
+    )
+    parser.add_argument("--bind", default="127.0.0.1", help="Address to serve on")
+    parser.add_argument(
+        "--fanout",
+        metavar="PATH|GROUP:PORT",
+        help="Read decoded records back from the integration's fan-out",
+    )
+    parser.add_argument(
+        "--duration", type=float, default=0, help="Seconds to run; 0 runs until ^C"
+    )
+    parser.add_argument(
+        "--report", type=float, default=5, help="Seconds between reports"
+    )
+    parser.add_argument("--seed", type=int, help="Random seed for repeatable runs")
+    return parser.parse_args()
+
+
+class Stats:
+    """Counters shared by the gateway, server and fan-out threads."""
+
+    def __init__(self):
+        """Initialize the counters."""
+        self.lock = threading.Lock()
+        self.frames = 0
+        self.records = 0
+        self.errors = 0
+        self.received = 0
+        self.latencies = []
+
+    def sent(self, records):
+        """Count a sent frame."""
+        with self.lock:
+            self.frames += 1
+            self.records += records
+
+    def failed(self):
+        """Count a frame that could not be sent."""
+        with self.lock:
+            self.errors += 1
+
+    def decoded(self, records, latencies):
+        """Count records read back from the fan-out."""
+        with self.lock:
+            self.received += records
+            self.latencies.extend(latencies)
+
+    def take(self):
+        """Return and reset the counters of the last report interval."""
+        with self.lock:
+            snapshot = (
+                self.frames,
+                self.records,
+                self.errors,
+                self.received,
+                self.latencies,
+            )
+            self.frames = self.records = self.errors = self.received = 0
+            self.latencies = []
+        return snapshot
+
+
+class Device:
+    """An advertising BLE device with a drifting RSSI."""
+
+    def __init__(self, rng, rotating, rotate):
+        """Pick an address, an advertisement kind and a starting RSSI."""
+        self.rng = rng
+        self.rotating = rotating
+        self.rotate = rotate
+        self.rssi = rng.randint(-95, -45)
+        self.counter = 0
+        if rotating:
+            self.company_id = 0x004C
+            # Apple nearby-info: type and length stay, the rest changes
+            self.prefix = bytes.fromhex("1005")
+        else:
+            self.company_id = rng.choice([0x0499, 0x0059, 0x0969, 0x004C])
+            self.prefix = bytes(rng.getrandbits(8) for _ in range(2))
+        self._new_address(time.monotonic())
+        self.payload = self._payload()
+
+    def _new_address(self, now):
+        """Pick a new address; resolvable random ones have the top bits 01."""
+        rng = self.rng
+        address = bytearray(rng.getrandbits(8) for _ in range(6))
+        if self.rotating:
+            address[0] = 0x40 | (address[0] & 0x3F)
+            self.address_type = 1
+        else:
+            self.address_type = 0
+        self.address = bytes(address)
+        self.rotated = now
+
+    def _payload(self):
+        """Return a manufacturer data advertisement with a fresh reading."""
+        self.counter = (self.counter + 1) & 0xFFFF
+        data = (
+            struct.pack("<H", self.company_id)
+            + self.prefix
+            + struct.pack(">H", self.counter)
+            + bytes(self.rng.getrandbits(8) for _ in range(4))
+        )
+        return FLAGS + bytes((len(data) + 1, 0xFF)) + data
+
+    def advertise(self, now, duplicate_ratio):
+        """Return (address type, address, rssi, advertisement, duplicate)."""
+        if self.rotating and now - self.rotated >= self.rotate:
+            self._new_address(now)
+        self.rssi = min(-30, max(-100, self.rssi + self.rng.randint(-2, 2)))
+        duplicate = self.rng.random() < duplicate_ratio
+        if not duplicate:
+            self.payload = self._payload()
+        rssi = self.rssi + self.rng.randint(-3, 3)
+        return self.address_type, self.address, rssi, self.payload, duplicate
+
+
+class EmulatedGateway:
+    """One gateway: its /info, /config and the frames it would publish."""
+
+    def __init__(self, index, args, rng):
+        """Create the gateway and the devices it hears."""
+        self.index = index
+        self.args = args
+        self.mac = "C4:5B:BE:{:02X}:{:02X}:{:02X}".format(
+            0xE0 | (index >> 16 & 0x0F), index >> 8 & 0xFF, index & 0xFF
+        )
+        self.info = {
+            "firmwareVer": "1.5.12",
+            "hardwareVer": "4.0",
+            "mac": self.mac,
+            "sn": 9000000 + index,
+            "validate": 1,
+            "auth": 0,
+        }
+        self.config = dict(BASE_CONFIG)
+        if args.mqtt:
+            host, _, port = args.mqtt.rpartition(":")
+            self.config.update(host=host, port=int(port))
+            self.config["mqtt-topic"] = args.topic.format(index=index)
+        else:
+            self.config["conn-type"] = 2
+            if args.http:
+                self.config["http-url"] = args.http.format(index=index)
+        self.lock = threading.Lock()
+        self.mid = 0
+        self.probe = bytes.fromhex("02EE00") + struct.pack(">H", index & 0xFFFF) + b"\0"
+        rotating = round(args.devices * args.random_share)
+        self.devices = [
+            Device(rng, n < rotating, args.rotate) for n in range(args.devices)
+        ]
+
+    @property
+    def interval(self):
+        """Return the seconds between frames."""
+        if self.args.interval:
+            return self.args.interval
+        with self.lock:
+            return max(float(self.config.get("req-int") or 1), 0.1)
+
+    def update_config(self, changes):
+        """Apply a POST /config from the integration."""
+        with self.lock:
+            self.config.update(changes)
+
+    def build_frame(self):
+        """Return (frame bytes, records) for one req-int period."""
+        with self.lock:
+            min_rssi = self.config.get("min-rssi", -127)
+            dup_filter = self.config.get("dup-filter", 0)
+        now = time.monotonic()
+        per_device = max(1, round(self.args.adv_rate * self.interval))
+        records = []
+        for device in self.devices:
+            for _ in range(per_device):
+                address_type, address, rssi, adv, duplicate = device.advertise(
+                    now, self.args.duplicate_ratio
+                )
+                if rssi < min_rssi or (duplicate and dup_filter):
+                    continue
+                records.append((address_type, address, rssi, adv))
+        # Probe record carrying the send time, for latency measurements
+        records.append(
+            (
+                0,
+                self.probe,
+                -40,
+                FLAGS + b"\x0b\xff" + struct.pack("<H", PROBE_COMPANY_ID)
+                + struct.pack(">d", time.time()),
+            )
+        )
+
+        self.mid += 1
+        frame = {
+            "v": 1,
+            "mid": self.mid,
+            "time": int(time.time()),
+            "ip": "127.0.0.1",
+            "mac": self.mac.replace(":", ""),
+            "rssi": -40,
+        }
+        if self.args.format == "json":
+            frame["devices"] = [
+                [address_type, address.hex().upper(), rssi, adv.hex().upper()]
+                for address_type, address, rssi, adv in records
+            ]
+            return json.dumps(frame, separators=(",", ":")).encode(), len(records)
+        frame["devices"] = [
+            bytes((address_type,)) + address + struct.pack("b", rssi) + adv
+            for address_type, address, rssi, adv in records
+        ]
+        return msgpack.packb(frame), len(records)
+
+
+class GatewayHandler(BaseHTTPRequestHandler):
+    """Serve an emulated gateway's /info and /config."""
+
+    def _reply(self, body):
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        gateway = self.server.gateway
+        if self.path == "/info":
+            self._reply(gateway.info)
+        elif self.path == "/config":
+            with gateway.lock:
+                self._reply(dict(gateway.config))
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        if self.path != "/config":
+            self.send_error(404)
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            changes = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self.send_error(400)
+            return
+        self.server.gateway.update_config(changes)
+        print(f"Gateway {self.server.gateway.index} config changed: {changes}")
+        self._reply({"result": "ok"})
+
+    def log_message(self, *args):
+        pass
+
+
+class MqttSink:
+    """Publish frames to each gateway's MQTT topic."""
+
+    def __init__(self, address):
+        """Connect to the broker."""
+        try:
+            import paho.mqtt.client as mqtt
+        except ImportError:
+            sys.exit("MQTT output needs paho-mqtt: pip install paho-mqtt")
+        host, _, port = address.rpartition(":")
+        try:
+            self.client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+        except AttributeError:
+            self.client = mqtt.Client()
+        self.client.connect(host, int(port))
+        self.client.loop_start()
+
+    def send(self, gateway, frame):
+        """Publish one frame."""
+        result = self.client.publish(gateway.config["mqtt-topic"], frame)
+        return result.rc == 0
+
+    def close(self):
+        """Disconnect from the broker."""
+        self.client.loop_stop()
+        self.client.disconnect()
+
+
+class HttpSink:
+    """POST frames to the integration's ingest endpoint."""
+
+    def send(self, gateway, frame):
+        """Post one frame."""
+        request = urllib.request.Request(
+            gateway.config["http-url"],
+            data=frame,
+            headers={"Content-Type": "application/octet-stream"},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=5) as response:
+                return response.status == 200
+        except OSError as err:
+            print(f"POST from gateway {gateway.index} failed: {err}")
+            return False
+
+    def close(self):
+        """Nothing to close."""
+
+
+class NullSink:
+    """Drop frames; measures what the emulator itself can generate."""
+
+    def send(self, gateway, frame):
+        """Pretend to send one frame."""
+        return True
+
+    def close(self):
+        """Nothing to close."""
+
+
+def run_gateway(gateway, sink, stats, stop):
+    """Publish a frame every interval until stopped."""
+    next_frame = time.monotonic()
+    while not stop.is_set():
+        frame, records = gateway.build_frame()
+        if sink.send(gateway, frame):
+            stats.sent(records)
+        else:
+            stats.failed()
+        next_frame += gateway.interval
+        delay = next_frame - time.monotonic()
+        if delay < 0:
+            # Falling behind; don't try to catch up with a burst
+            next_frame = time.monotonic()
+        stop.wait(max(delay, 0))
+
+
+def parse_batches(buffer):
+    """Yield fan-out batches from `buffer`, consuming complete frames."""
+    while len(buffer) >= LENGTH.size:
+        (size,) = LENGTH.unpack_from(buffer)
+        if len(buffer) < LENGTH.size + size:
+            return
+        body = bytes(buffer[LENGTH.size : LENGTH.size + size])
+        del buffer[: LENGTH.size + size]
+        yield msgpack.unpackb(body, strict_map_key=False)
+
+
+def count_batch(batch, stats):
+    """Count a fan-out batch and the latency of its probe records."""
+    _, _, records = batch
+    now = time.time()
+    latencies = []
+    for record in records:
+        probe = record[5].get(PROBE_COMPANY_ID)
+        if probe is not None and len(probe) == 8:
+            latencies.append(now - struct.unpack(">d", probe)[0])
+    stats.decoded(len(records), latencies)
+
+
+def read_fanout(target, stats, stop):
+    """Read decoded records back from the integration's fan-out."""
+    if os.path.sep in target or not target.count(":"):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(target)
+        datagrams = False
+    else:
+        group, _, port = target.rpartition(":")
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(("", int(port)))
+        sock.setsockopt(
+            socket.IPPROTO_IP,
+            socket.IP_ADD_MEMBERSHIP,
+            socket.inet_aton(group) + socket.inet_aton("0.0.0.0"),
+        )
+        datagrams = True
+    sock.settimeout(0.5)
+    buffer = bytearray()
+    while not stop.is_set():
+        try:
+            data = sock.recv(65536)
+        except socket.timeout:
+            continue
+        if not data:
+            print("Fan-out closed by the integration")
+            return
+        if datagrams:
+            buffer = bytearray(data)
+        else:
+            buffer.extend(data)
+        for batch in parse_batches(buffer):
+            count_batch(batch, stats)
+
+
+def percentile(values, share):
+    """Return the value below which `share` of the sorted values fall."""
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+def report(stats, elapsed, fanout):
+    """Print one report line for the last interval."""
+    frames, records, errors, received, latencies = stats.take()
+    line = (
+        f"{frames / elapsed:8.1f} frames/s {records / elapsed:10.1f} records/s sent"
+        f" {errors:4d} errors"
+    )
+    if fanout:
+        line += f" {received / elapsed:10.1f} records/s decoded"
+        if latencies:
+            latencies.sort()
+            line += " latency ms p50 {:.1f} p95 {:.1f} max {:.1f}".format(
+                percentile(latencies, 0.5) * 1000,
+                percentile(latencies, 0.95) * 1000,
+                latencies[-1] * 1000,
+            )
+    print(line)
+    return records, received
+
+
+def main():
+    """Run the emulated gateways until the duration is over or ^C."""
+    args = parse_args()
+    if msgpack is None and (args.format == "msgpack" or args.fanout):
+        sys.exit("msgpack frames and --fanout need msgpack: pip install msgpack")
+    rng = random.Random(args.seed)
+    gateways = [EmulatedGateway(index, args, rng) for index in range(args.gateways)]
+
+    servers = []
+    if args.http_port:
+        for gateway in gateways:
+            server = ThreadingHTTPServer(
+                (args.bind, args.http_port + gateway.index), GatewayHandler
+            )
+            server.gateway = gateway
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            servers.append(server)
+        print(
+            f"Serving /info and /config on {args.bind} ports "
+            f"{args.http_port}-{args.http_port + len(gateways) - 1}"
+        )
+
+    if args.mqtt:
+        sink = MqttSink(args.mqtt)
+    elif args.http:
+        sink = HttpSink()
+    else:
+        sink = NullSink()
+
+    stats = Stats()
+    stop = threading.Event()
+    threads = [
+        threading.Thread(target=run_gateway, args=(gateway, sink, stats, stop))
+        for gateway in gateways
+    ]
+    if args.fanout:
+        threads.append(
+            threading.Thread(
+                target=read_fanout, args=(args.fanout, stats, stop), daemon=True
+            )
+        )
+    for thread in threads:
+        thread.start()
+
+    started = last = time.monotonic()
+    total_sent = total_received = 0
+    try:
+        while not args.duration or time.monotonic() - started < args.duration:
+            time.sleep(
+                min(args.report, max(started + args.duration - time.monotonic(), 0))
+                if args.duration
+                else args.report
+            )
+            now = time.monotonic()
+            sent, received = report(stats, now - last, args.fanout)
+            total_sent += sent
+            total_received += received
+            last = now
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        elapsed = time.monotonic() - started
+        for thread in threads:
+            if not thread.daemon:
+                thread.join()
+        sink.close()
+        for server in servers:
+            server.shutdown()
+
+    print(
+        f"Sent {total_sent} records in {elapsed:.1f}s "
+        f"({total_sent / elapsed:.1f} records/s)"
+    )
+    if args.fanout:
+        print(
+            f"Decoded {total_received} records "
+            f"({total_received / elapsed:.1f} records/s)"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
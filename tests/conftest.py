@@ -0,0 +1,59 @@
+"""Fixtures for AprilBrother BLE Gateway tests."""
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import json
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from homeassistant.components.bluetooth import HaBluetoothConnector
+
+from custom_components.ab_ble_gateway import AbBleScanner
+
+
+@pytest.fixture
+def scanner(hass):
+    """Return a scanner whose advertisements are recorded, not dispatched."""
+    connector = HaBluetoothConnector(
+        client=None, source="C4:5B:BE:8E:51:8C", can_connect=False
+    )
+    scanner = AbBleScanner("C4:5B:BE:8E:51:8C", "gateway", connector=connector)
+    scanner._async_on_advertisement = MagicMock()
+    return scanner
+
+
+@pytest.fixture
+def fake_gateway():
+    """Run a stand-in gateway HTTP server serving /info and /config."""
+    state = {"conn-type": 3, "req-int": 1, "min-rssi": -127, "dup-filter": 0}
+    requests = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, body):
+            data = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            requests.append(self.path)
+            if self.path == "/info":
+                self._reply({"mac": "C4:5B:BE:8E:51:8C", "auth": 0})
+            else:
+                self._reply(state)
+
+        def do_POST(self):
+            length = int(self.headers["Content-Length"])
+            state.update(json.loads(self.rfile.read(length)))
+            self._reply({"result": "ok"})
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server.server_address, state, requests
+    server.shutdown()
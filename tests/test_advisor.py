@@ -0,0 +1,30 @@
+"""Test the gateway tuning advisor."""
+from custom_components.ab_ble_gateway.advisor import TrafficStats, recommend
+
+
+def test_recommend_enables_dup_filter_and_raises_interval():
+    """Test a busy gateway full of repeats is tuned down to the budget."""
+    traffic = TrafficStats(useful_rssi=-90)
+    for i in range(1000):
+        traffic.add_frame(500)
+        traffic.add_record(i % 500, -95 if i % 5 == 0 else -60)
+    stats = traffic.snapshot()
+    stats["records_per_second"] = 400
+
+    advice = recommend(
+        stats, {"req_int": 1, "dup_filter": 0, "min_rssi": -127}, 50, -90
+    )
+    assert advice["dup_filter"] == 1
+    assert advice["min_rssi"] == -90
+    assert advice["req_int"] > 1
+
+
+def test_recommend_keeps_quiet_gateway():
+    """Test a gateway well within budget is left alone."""
+    stats = {
+        "records_per_second": 20,
+        "duplicate_ratio": 0.05,
+        "weak_share": 0.5,
+    }
+    current = {"req_int": 1, "dup_filter": 0, "min_rssi": -127}
+    assert recommend(stats, current, 50, -90) == current
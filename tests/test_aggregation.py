@@ -0,0 +1,23 @@
+"""Test time-bucketed aggregation of records."""
+from custom_components.ab_ble_gateway.aggregation import Aggregator
+from custom_components.ab_ble_gateway.const import AGGREGATION_MAX, AGGREGATION_MEDIAN
+
+
+def test_aggregate_max_and_swap():
+    """Test one entry per address with max RSSI, latest payload and count."""
+    aggregator = Aggregator(2, AGGREGATION_MAX)
+    aggregator.add("AA", -70, ("first",))
+    aggregator.add("AA", -60, ("second",))
+    aggregator.add("AA", -80, ("third",))
+    aggregator.add("BB", -90, ("only",))
+    assert aggregator.swap() == [("AA", -60, 3, ("third",)), ("BB", -90, 1, ("only",))]
+    assert len(aggregator) == 0
+    assert aggregator.swap() == []
+
+
+def test_aggregate_median():
+    """Test the median RSSI ignores a single strong outlier."""
+    aggregator = Aggregator(2, AGGREGATION_MEDIAN)
+    for rssi in (-70, -71, -40, -72):
+        aggregator.add("AA", rssi, ())
+    assert aggregator.swap() == [("AA", -71, 4, ())]
@@ -0,0 +1,11 @@
+"""Test the JSON codec."""
+from custom_components.ab_ble_gateway.codec import dumps, loads
+
+
+def test_codec_round_trip_bytes():
+    """Test frames are parsed from bytes and serialized to compact bytes."""
+    frame = b'{"devices":[[0,"C45BBE8E518C",-60,"0201060303AAFE"]]}'
+    assert loads(frame) == {"devices": [[0, "C45BBE8E518C", -60, "0201060303AAFE"]]}
+    assert dumps(loads(frame)) == frame
+    # Manufacturer data is keyed by integer company ID
+    assert loads(dumps({76: "0215"})) == {"76": "0215"}
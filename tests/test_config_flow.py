@@ -0,0 +1,127 @@
+"""Test the config and options flows."""
+import socket
+from ipaddress import ip_address
+from unittest.mock import patch
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant import config_entries
+from homeassistant.components.zeroconf import ZeroconfServiceInfo
+from homeassistant.const import CONF_HOST, CONF_PORT
+
+from custom_components.ab_ble_gateway.const import (
+    CONF_APPLY_TO_ALL,
+    CONF_MIN_RSSI,
+    CONF_POSITION,
+    CONF_ROOM,
+    CONF_SMOOTHING,
+    DOMAIN,
+    SMOOTHING_EMA,
+)
+
+
+async def test_apply_to_all_keeps_per_gateway_options(
+    hass, enable_custom_integrations, fake_gateway
+):
+    """Test applying to all gateways shares the filtering but not the position."""
+    (host, port), _, _ = fake_gateway
+    kitchen = MockConfigEntry(
+        domain=DOMAIN,
+        title="kitchen",
+        data={CONF_HOST: host, CONF_PORT: port},
+        options={CONF_POSITION: "0, 0", CONF_ROOM: "kitchen"},
+    )
+    hall = MockConfigEntry(
+        domain=DOMAIN,
+        title="hall",
+        data={CONF_HOST: host, CONF_PORT: port},
+        options={CONF_POSITION: "5, 0", CONF_ROOM: "hall"},
+    )
+    kitchen.add_to_hass(hass)
+    hall.add_to_hass(hass)
+
+    result = await hass.config_entries.options.async_init(kitchen.entry_id)
+    assert result["step_id"] == "init"
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"],
+        user_input={
+            CONF_MIN_RSSI: -80,
+            CONF_POSITION: "0, 0",
+            CONF_ROOM: "kitchen",
+            CONF_APPLY_TO_ALL: True,
+        },
+    )
+    assert result["step_id"] == "preview"
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], user_input={}
+    )
+    await hass.async_block_till_done()
+
+    assert kitchen.options[CONF_MIN_RSSI] == -80
+    assert hall.options[CONF_MIN_RSSI] == -80
+    assert kitchen.options[CONF_POSITION] == "0, 0"
+    assert hall.options[CONF_POSITION] == "5, 0"
+    assert hall.options[CONF_ROOM] == "hall"
+
+
+async def test_import_replaces_pending_discovery(
+    hass, enable_custom_integrations, fake_gateway
+):
+    """Test importing a gateway that zeroconf discovered aborts the discovery."""
+    (host, port), state, _ = fake_gateway
+    state["conn-type"] = 2
+    discovery = await hass.config_entries.flow.async_init(
+        DOMAIN,
+        context={"source": config_entries.SOURCE_ZEROCONF},
+        data=ZeroconfServiceInfo(
+            ip_address=ip_address(host),
+            ip_addresses=[ip_address(host)],
+            port=port,
+            hostname="xbg-8e518c.local.",
+            type="_http._tcp.local.",
+            name="xbg-8e518c._http._tcp.local.",
+            properties={"hw": "4.0", "mac": "C45BBE8E518C"},
+        ),
+    )
+    assert discovery["step_id"] == "confirm"
+
+    with patch(
+        "custom_components.ab_ble_gateway.async_setup_entry", return_value=True
+    ):
+        result = await hass.config_entries.flow.async_init(
+            DOMAIN,
+            context={"source": config_entries.SOURCE_IMPORT},
+            data={CONF_HOST: host, CONF_PORT: port},
+        )
+        await hass.async_block_till_done()
+
+    assert result["type"] == "create_entry"
+    assert hass.config_entries.flow.async_progress_by_handler(DOMAIN) == []
+
+
+async def test_local_options_saved_without_gateway(hass, enable_custom_integrations):
+    """Test the local-only options can be saved while the gateway is offline."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_HOST: "127.0.0.1", CONF_PORT: port},
+        options={CONF_MIN_RSSI: -90},
+    )
+    entry.add_to_hass(hass)
+
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    assert result["errors"] == {"base": "cannot_connect"}
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"],
+        user_input={CONF_MIN_RSSI: -70, CONF_SMOOTHING: SMOOTHING_EMA},
+    )
+    assert result["step_id"] == "save_local"
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], user_input={}
+    )
+
+    assert result["type"] == "create_entry"
+    assert entry.options[CONF_SMOOTHING] == SMOOTHING_EMA
+    assert entry.options[CONF_MIN_RSSI] == -90
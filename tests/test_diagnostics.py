@@ -0,0 +1,35 @@
+"""Test the diagnostics frame buffer and rendering."""
+import json
+
+import msgpack
+
+from custom_components.ab_ble_gateway.diagnostics import REDACTED_MAC, _render_frame
+from custom_components.ab_ble_gateway.frame_log import FrameLog
+
+
+def test_frame_log_is_bounded():
+    """Test only the last frames are kept while counters keep running."""
+    frame_log = FrameLog(frames=3, timings=3)
+    for i in range(5):
+        frame_log.add(bytes([i]), 0.001 * i, records=2, processed=1 if i else 0)
+    assert [payload for _, payload in frame_log.frames] == [b"\x02", b"\x03", b"\x04"]
+    assert frame_log.counters() == {
+        "frames_total": 5,
+        "frames_undecodable": 0,
+        "records_total": 10,
+        "records_dropped": 6,
+    }
+    assert frame_log.timing_stats()["max_ms"] == 4.0
+
+
+def test_render_frame_redacts_macs():
+    """Test MACs are removed from JSON and binary frames."""
+    frame = json.dumps({"devices": [[0, "D712ED6A66C6", -85, "0201"]]}).encode()
+    rendered = _render_frame(frame, redact=True)
+    assert "D712ED6A66C6" not in rendered["data"]
+    assert REDACTED_MAC in rendered["data"]
+
+    record = bytes.fromhex("01D712ED6A66C6AB0201")
+    frame = msgpack.packb({"devices": [record]})
+    assert _render_frame(frame, redact=True)["devices"] == ["01000000000000ab0201"]
+    assert _render_frame(frame, redact=False)["devices"] == [record.hex()]
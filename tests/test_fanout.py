@@ -0,0 +1,31 @@
+"""Test the local fan-out of decoded advertisements."""
+import asyncio
+
+from custom_components.ab_ble_gateway.fanout import UnixFanout, iter_frames
+
+
+async def test_unix_fanout_delivers_batches(hass, tmp_path):
+    """Test a reader receives framed batches and a slow one is bounded."""
+    fanout = UnixFanout(str(tmp_path / "ble.sock"), queue_size=2)
+    await fanout.async_start()
+    reader, writer = await asyncio.open_unix_connection(fanout.path)
+    while not fanout.subscribers:
+        await asyncio.sleep(0)
+
+    record = ("AA:BB:CC:DD:EE:FF", -60, "", [], {}, {76: b"\x02\x15"})
+    fanout.publish("gateway", [record])
+    buffer = bytearray(await reader.read(4096))
+    batches = list(iter_frames(buffer))
+    assert len(batches) == 1
+    source, _, records = batches[0]
+    assert source == "gateway"
+    assert records == [["AA:BB:CC:DD:EE:FF", -60, "", [], {}, {76: b"\x02\x15"}]]
+    assert not buffer
+
+    # Without yielding to the writer, only the newest frames are kept
+    for rssi in (-61, -62, -63):
+        fanout.publish("gateway", [(record[0], rssi, "", [], {}, {})])
+    assert fanout.dropped == 1
+
+    writer.close()
+    await fanout.async_stop()
@@ -0,0 +1,37 @@
+"""Test pushing filtering config to a gateway."""
+from custom_components.ab_ble_gateway.gateway import (
+    async_fetch_config,
+    async_probe,
+    async_push_config,
+    diff_config,
+    profile_to_gateway,
+)
+
+
+async def test_push_config_only_changes_diff(hass, fake_gateway):
+    """Test the diff is computed and written to the gateway."""
+    (host, port), state, _ = fake_gateway
+    wanted = profile_to_gateway({"min_rssi": -90, "dup_filter": 1, "req_int": 1})
+    current = await async_fetch_config(hass, host, port, cache=False)
+    diff = diff_config(current, wanted)
+    assert diff == {"min-rssi": (-127, -90), "dup-filter": (0, 1)}
+
+    new_config = await async_push_config(
+        hass, host, port, {k: new for k, (_, new) in diff.items()}
+    )
+    assert new_config["min-rssi"] == -90
+    assert state["dup-filter"] == 1
+    assert state["conn-type"] == 3
+
+
+async def test_probe_is_cached(hass, fake_gateway):
+    """Test a repeated probe of the same host is served from the cache."""
+    (host, port), _, requests = fake_gateway
+    info, config = await async_probe(hass, host, port)
+    assert info["mac"] == "C4:5B:BE:8E:51:8C"
+    assert config["conn-type"] == 3
+    await async_probe(hass, host, port)
+    assert sorted(requests) == ["/config", "/info"]
+    # Requests with credentials always reach the gateway
+    await async_probe(hass, host, port, "admin", "wrong")
+    assert sorted(requests) == ["/config", "/config", "/info"]
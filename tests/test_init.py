@@ -1,12 +1,75 @@
 """Test integration initialization."""
+import asyncio
+import json
 from unittest.mock import patch
 
 from homeassistant.setup import async_setup_component
 
+from custom_components.ab_ble_gateway import (
+    _async_resubscribe_entry,
+    _clean_failed_entries,
+)
 from custom_components.ab_ble_gateway.const import DOMAIN
 
 
 async def test_async_setup(hass):
     """Test the component gets setup."""
     with patch("custom_components.ab_ble_gateway.setup_abble"):
-        assert await async_setup_component(hass, DOMAIN, {}) is True
\ No newline at end of file
+        assert await async_setup_component(hass, DOMAIN, {}) is True
+
+
+def test_clean_failed_entries(tmp_path):
+    """Test entries are reported on a dry run and atomically removed after."""
+    storage = tmp_path / ".storage"
+    storage.mkdir()
+    path = storage / "core.config_entries"
+    data = {
+        "version": 1,
+        "data": {
+            "entries": [
+                {"entry_id": "a", "domain": DOMAIN, "title": "xbg-8e518c"},
+                {"entry_id": "b", "domain": "mqtt", "title": "MQTT"},
+            ]
+        },
+    }
+    path.write_text(json.dumps(data, indent=4))
+
+    result = _clean_failed_entries(str(tmp_path), DOMAIN, dry_run=True)
+    assert result == {
+        "removed": [{"entry_id": "a", "domain": DOMAIN, "title": "xbg-8e518c"}],
+        "kept": 1,
+    }
+    assert json.loads(path.read_text()) == data
+
+    _clean_failed_entries(str(tmp_path), DOMAIN)
+    assert json.loads(path.read_text())["data"]["entries"] == [
+        {"entry_id": "b", "domain": "mqtt", "title": "MQTT"}
+    ]
+    assert json.loads((storage / "core.config_entries.bak").read_text()) == data
+    assert sorted(p.name for p in storage.iterdir()) == [
+        "core.config_entries",
+        "core.config_entries.bak",
+    ]
+
+
+async def test_concurrent_resubscribes_keep_one_subscription(hass, scanner):
+    """Test overlapping resubscribes of one entry don't leak a subscription."""
+    active = set()
+
+    async def subscribe(hass, topic, callback, encoding=None):
+        await asyncio.sleep(0)
+        token = object()
+        active.add(token)
+        return lambda: active.discard(token)
+
+    hass.data[DOMAIN] = {"entry": {"scanner": scanner}}
+    with patch(
+        "custom_components.ab_ble_gateway._entry_mqtt_topic", return_value="gw/test"
+    ), patch("custom_components.ab_ble_gateway.mqtt.async_subscribe", subscribe):
+        results = await asyncio.gather(
+            _async_resubscribe_entry(hass, "entry"),
+            _async_resubscribe_entry(hass, "entry"),
+        )
+
+    assert all(latency is not None for _, latency in results)
+    assert len(active) == 1
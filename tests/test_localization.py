@@ -0,0 +1,70 @@
+"""Test multi-gateway room localization."""
+import math
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from custom_components.ab_ble_gateway.localization import Localizer, parse_position
+
+GATEWAYS = {
+    "kitchen": (0, 0),
+    "hall": (10, 0),
+    "office": (0, 10),
+    "bedroom": (10, 10),
+}
+
+
+def _rssi(distance):
+    """RSSI at a distance for tx_power -59 and path loss 2."""
+    return -59 - 20 * math.log10(distance)
+
+
+def test_localize_room_and_position():
+    """Test the nearest room is picked and the position is trilaterated."""
+    localizer = Localizer(window=30)
+    for room, position in GATEWAYS.items():
+        localizer.set_gateway(room, position, room, -59, 2.0)
+    localizer.set_devices("kitchen", ["AA:AA:AA:AA:AA:AA", "BB:BB:BB:BB:BB:BB"])
+
+    for room, (x, y) in GATEWAYS.items():
+        localizer.add("AA:AA:AA:AA:AA:AA", room, _rssi(math.hypot(3 - x, 4 - y)))
+    localizer.add("BB:BB:BB:BB:BB:BB", "hall", -70)
+
+    assert localizer.tick(100) == ["AA:AA:AA:AA:AA:AA", "BB:BB:BB:BB:BB:BB"]
+    assert localizer.results["AA:AA:AA:AA:AA:AA"] == {
+        "room": "kitchen",
+        "gateway": "kitchen",
+        "x": 3.0,
+        "y": 4.0,
+    }
+    # Heard by a single gateway: room only
+    assert localizer.results["BB:BB:BB:BB:BB:BB"]["room"] == "hall"
+    assert localizer.results["BB:BB:BB:BB:BB:BB"]["x"] is None
+
+    # Nothing changed, nothing reported; stale readings clear the room
+    assert localizer.tick(101) == []
+    localizer.tick(200)
+    assert localizer.results["AA:AA:AA:AA:AA:AA"]["room"] is None
+
+
+def test_room_uses_calibrated_distance():
+    """Test the room is the nearest gateway, not the one with the best RSSI."""
+    localizer = Localizer(window=30)
+    localizer.set_gateway("kitchen", (0, 0), "kitchen", -50, 2.0)
+    localizer.set_gateway("hall", (6, 0), "hall", -70, 2.0)
+    localizer.set_devices("kitchen", ["AA:AA:AA:AA:AA:AA"])
+
+    # 4 m from a hot kitchen gateway, 2 m from a weak hall gateway
+    localizer.add("AA:AA:AA:AA:AA:AA", "kitchen", -50 - 20 * math.log10(4))
+    localizer.add("AA:AA:AA:AA:AA:AA", "hall", -70 - 20 * math.log10(2))
+
+    localizer.tick(100)
+    assert localizer.results["AA:AA:AA:AA:AA:AA"]["room"] == "hall"
+
+
+def test_parse_position():
+    """Test positions are parsed from "x, y"."""
+    assert parse_position("1.5, -2") == (1.5, -2.0)
+    assert parse_position("") is None
+    assert parse_position("1,2,3") is None
@@ -0,0 +1,16 @@
+"""Test bulk onboarding helpers."""
+import pytest
+
+from custom_components.ab_ble_gateway.onboarding import expand_hosts
+
+
+def test_expand_hosts():
+    """Test host lists and CIDR ranges are merged without duplicates."""
+    hosts = expand_hosts(["10.0.0.1", "gw.local"], ["10.0.0.0/30", "10.0.1.5/32"])
+    assert hosts == ["10.0.0.1", "gw.local", "10.0.0.2", "10.0.1.5"]
+
+
+def test_expand_hosts_rejects_huge_ranges():
+    """Test a range larger than the bulk limit is refused."""
+    with pytest.raises(ValueError):
+        expand_hosts([], ["10.0.0.0/16"])
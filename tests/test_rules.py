@@ -0,0 +1,71 @@
+"""Test the threshold-crossing rule engine."""
+from unittest.mock import patch
+
+from pytest_homeassistant_custom_component.common import async_capture_events
+
+from custom_components.ab_ble_gateway.const import EVENT_RULE
+from custom_components.ab_ble_gateway.rules import RULE_SCHEMA, RuleEngine
+
+GATEWAY = ("entry1", "Living room")
+MAC = "AA:BB:CC:DD:EE:FF"
+
+
+async def test_enter_leave_with_hysteresis(hass):
+    """Test events fire only when a rule crosses its thresholds."""
+    events = async_capture_events(hass, EVENT_RULE)
+    engine = RuleEngine(
+        hass, [RULE_SCHEMA({"name": "near", "mac": MAC.lower(), "enter_rssi": -60})]
+    )
+    for rssi in (-70, -58, -55, -63, -66, -50):
+        engine.async_process(MAC, GATEWAY, rssi, {})
+    await hass.async_block_till_done()
+    assert [(event.data["type"], event.data["rssi"]) for event in events] == [
+        ("enter", -58),
+        ("leave", -66),
+        ("enter", -50),
+    ]
+
+
+async def test_absence_timeout(hass):
+    """Test the timer wheel reports a device that went silent."""
+    events = async_capture_events(hass, EVENT_RULE)
+    engine = RuleEngine(
+        hass,
+        [RULE_SCHEMA({"name": "apple", "company_id": 76, "absence_timeout": 10})],
+    )
+    with patch("custom_components.ab_ble_gateway.rules.time.monotonic") as now:
+        now.return_value = 1000.0
+        engine.async_process(MAC, GATEWAY, -50, {76: b"\x02"})
+        for second in range(1001, 1015):
+            now.return_value = second + 0.5
+            engine.async_tick()
+    await hass.async_block_till_done()
+    assert [event.data["type"] for event in events] == ["enter", "absent"]
+
+
+async def test_state_is_dropped_and_bounded(hass):
+    """Test devices are forgotten on leave/absence and capped otherwise."""
+    with patch("custom_components.ab_ble_gateway.rules.time.monotonic") as now:
+        now.return_value = 1000.0
+        engine = RuleEngine(
+            hass,
+            [RULE_SCHEMA({"name": "apple", "company_id": 76, "absence_timeout": 10})],
+        )
+        engine.async_process(MAC, GATEWAY, -50, {76: b"\x02"})
+        engine.async_process(MAC, GATEWAY, -90, {76: b"\x02"})
+        assert not engine._state
+
+        engine.async_process(MAC, GATEWAY, -50, {76: b"\x02"})
+        now.return_value = 1011.5
+        engine.async_tick()
+        assert not engine._state
+
+        with patch("custom_components.ab_ble_gateway.rules.MAX_INSIDE", 3):
+            for last in range(5):
+                address = f"AA:BB:CC:DD:EE:0{last}"
+                engine.async_process(address, GATEWAY, -50, {76: b"\x02"})
+    assert [address for _, address in engine._state] == [
+        "AA:BB:CC:DD:EE:02",
+        "AA:BB:CC:DD:EE:03",
+        "AA:BB:CC:DD:EE:04",
+    ]
@@ -0,0 +1,33 @@
+"""Test decoding gateway frames in the scanner."""
+import time
+
+# Random static address, Apple manufacturer data, RSSI -85
+RECORD = bytes.fromhex("01D712ED6A66C6AB0201060AFF4C000C0E00AABBCCDD")
+
+
+async def test_replay_keeps_seen_time(hass, scanner):
+    """Test replayed devices keep aging instead of looking freshly seen."""
+    seen = time.time() - 600
+    scanner.async_replay([(RECORD, seen)])
+    assert scanner._async_on_advertisement.called
+    ((record, _, first_seen),) = scanner.last_seen.values()
+    assert first_seen <= seen + 1
+
+    # The snapshot written after the replay is what the next start replays
+    scanner.last_seen.clear()
+    scanner.async_replay([(record, first_seen)])
+    ((_, _, second_seen),) = scanner.last_seen.values()
+    assert second_seen <= first_seen + 1
+    assert time.time() - second_seen >= 600
+    # Replayed frames aren't live traffic
+    assert scanner.traffic.frames == 0
+
+
+async def test_json_frame_ignores_nrpa(hass, scanner):
+    """Test JSON frames drop non-resolvable random addresses too."""
+    scanner.ignore_nrpa = True
+    scanner.async_on_payload(
+        b'{"devices": [[1, "3A0102030405", -60, "0201060AFF4C000C0E00AABBCCDD"]]}'
+    )
+    assert scanner.ignored_nrpa == 1
+    assert not scanner._async_on_advertisement.called
@@ -0,0 +1,30 @@
+"""Test RSSI smoothing."""
+import pytest
+
+from custom_components.ab_ble_gateway.const import (
+    SMOOTHING_EMA,
+    SMOOTHING_KALMAN,
+    SMOOTHING_MEDIAN,
+)
+from custom_components.ab_ble_gateway.smoothing import RssiSmoother
+
+
+@pytest.mark.parametrize("method", [SMOOTHING_EMA, SMOOTHING_MEDIAN, SMOOTHING_KALMAN])
+def test_smoothing_damps_outliers(method):
+    """Test a single multipath outlier barely moves the smoothed value."""
+    smoother = RssiSmoother(method, capacity=4)
+    for _ in range(10):
+        smoother.update("AA:BB:CC:DD:EE:FF", -60)
+    assert smoother.update("AA:BB:CC:DD:EE:FF", -90) > -70
+    assert smoother.update("11:22:33:44:55:66", -80) == -80
+
+
+def test_full_table_passes_readings_through():
+    """Test readings are returned as-is once every slot is taken."""
+    smoother = RssiSmoother(SMOOTHING_EMA, capacity=1)
+    smoother.update("AA", -60)
+    smoother.update("AA", -60)
+    assert smoother.update("BB", -90) == -90
+    smoother.release("AA")
+    smoother.update("BB", -90)
+    assert smoother.update("BB", -60) == pytest.approx(-81)
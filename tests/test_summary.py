@@ -0,0 +1,19 @@
+"""Test the incremental device summary."""
+from custom_components.ab_ble_gateway.summary import DeviceSummary
+
+
+def test_window_and_top_devices():
+    """Test devices expire from the window and the strongest are ranked."""
+    summary = DeviceSummary(window=60)
+    summary.add("AA", -80, new=True, now=0)
+    summary.add("BB", -50, new=True, now=10)
+    summary.add("CC", -70, new=False, now=20)
+    summary.add("AA", -60, new=False, now=30)
+
+    summary.expire(now=75)
+    assert summary.devices == 2
+    assert summary.new_devices == 0
+    assert summary.strongest(2) == [("AA", -60), ("CC", -70)]
+
+    summary.expire(now=95)
+    assert summary.devices == 0
@@ -0,0 +1,11 @@
+"""Test the per-device entity helpers."""
+from custom_components.ab_ble_gateway.tracking import parse_addresses
+
+
+def test_parse_addresses():
+    """Test MAC lists are normalized, deduplicated and invalid entries dropped."""
+    assert parse_addresses("aa:bb:cc:dd:ee:ff, AABBCCDDEEFF 11-22-33-44-55-66,bad") == [
+        "AA:BB:CC:DD:EE:FF",
+        "11:22:33:44:55:66",
+    ]
+    assert parse_addresses("") == []
@@ -0,0 +1,86 @@
+"""Test the gateway record helpers."""
+from custom_components.ab_ble_gateway.aliases import AliasTable
+from custom_components.ab_ble_gateway.util import (
+    address_kind,
+    is_non_resolvable_random,
+    rotating_fingerprint,
+)
+
+
+def test_is_non_resolvable_random():
+    """Test only random addresses with the top two bits cleared match."""
+    assert is_non_resolvable_random(1, bytes.fromhex("3A0102030405"))
+    # Resolvable private (01) and static random (11)
+    assert not is_non_resolvable_random(1, bytes.fromhex("7A0102030405"))
+    assert not is_non_resolvable_random(1, bytes.fromhex("CA0102030405"))
+    # Public address
+    assert not is_non_resolvable_random(0, bytes.fromhex("3A0102030405"))
+
+
+def test_address_kind():
+    """Test random sub-types are read from the top two address bits."""
+    assert address_kind(0, bytes.fromhex("7A0102030405")) == "public"
+    assert address_kind(1, bytes.fromhex("3A0102030405")) == "non_resolvable"
+    assert address_kind(1, bytes.fromhex("7A0102030405")) == "resolvable"
+    assert address_kind(1, bytes.fromhex("CA0102030405")) == "static"
+
+
+def test_rotating_addresses_collapse():
+    """Test rotating addresses with the same payload map to one device."""
+    first = bytes.fromhex("0201060AFF4C000C0E00AABBCCDD")
+    rotated = bytes.fromhex("0201060AFF4C000C0E0011223344")
+    fingerprint = rotating_fingerprint(1, bytes.fromhex("7A0102030405"), first)
+    assert fingerprint == rotating_fingerprint(
+        1, bytes.fromhex("4B0102030405"), rotated
+    )
+    assert rotating_fingerprint(0, bytes.fromhex("7A0102030405"), first) is None
+
+    aliases = AliasTable(2)
+    assert aliases.resolve("7A:01:02:03:04:05", fingerprint, -60, 0) == (
+        "7A:01:02:03:04:05"
+    )
+    # Rotated a few seconds later, heard at about the same RSSI
+    assert aliases.resolve("4B:01:02:03:04:05", fingerprint, -62, 5) == (
+        "7A:01:02:03:04:05"
+    )
+    assert aliases.collapsed == 1
+    # The table stays bounded; the device goes with its last alias
+    aliases.resolve("5C:01:02:03:04:05", b"other", -60, 6)
+    aliases.resolve("6D:01:02:03:04:05", b"third", -60, 7)
+    assert len(aliases) == 2
+    assert aliases.resolve("4B:01:02:03:04:05", fingerprint, -62, 8) == (
+        "4B:01:02:03:04:05"
+    )
+
+
+def test_same_kind_devices_are_not_collapsed():
+    """Test two iPhones sharing a fingerprint stay two devices."""
+    fingerprint = rotating_fingerprint(
+        1,
+        bytes.fromhex("7A0102030405"),
+        bytes.fromhex("0201060AFF4C000C0E00AABBCCDD"),
+    )
+    aliases = AliasTable()
+    assert aliases.resolve("7A:01:02:03:04:05", fingerprint, -50, 0) == (
+        "7A:01:02:03:04:05"
+    )
+    # Across the room
+    assert aliases.resolve("4B:0A:0B:0C:0D:0E", fingerprint, -85, 1) == (
+        "4B:0A:0B:0C:0D:0E"
+    )
+    # Next to the first one: merged at first, split off once both keep
+    # advertising
+    assert aliases.resolve("5C:11:12:13:14:15", fingerprint, -52, 2) == (
+        "7A:01:02:03:04:05"
+    )
+    assert aliases.resolve("7A:01:02:03:04:05", fingerprint, -50, 10) == (
+        "7A:01:02:03:04:05"
+    )
+    assert aliases.resolve("5C:11:12:13:14:15", fingerprint, -52, 11) == (
+        "5C:11:12:13:14:15"
+    )
+    assert aliases.split == 1
+    # Long after the first one was last heard, a new address is a new device
+    assert aliases.resolve("6D:21:22:23:24:25", fingerprint, -50, 100) == (
+        "6D:21:22:23:24:25"
+    )
@@ -0,0 +1,40 @@
+"""Test the HTTP ingestion endpoint."""
+from unittest.mock import MagicMock
+
+import msgpack
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.setup import async_setup_component
+
+from custom_components.ab_ble_gateway.const import CONF_HTTP_TOKEN, DOMAIN
+from custom_components.ab_ble_gateway.view import AbBleGatewayIngestView
+
+
+async def test_post_frame(hass, hass_client_no_auth):
+    """Test a recorded frame posted with the entry token reaches the scanner."""
+    assert await async_setup_component(hass, "http", {})
+    entry = MockConfigEntry(domain=DOMAIN, data={CONF_HTTP_TOKEN: "secret"})
+    entry.add_to_hass(hass)
+    scanner = MagicMock()
+    hass.data[DOMAIN] = {entry.entry_id: {"scanner": scanner}}
+    hass.http.register_view(AbBleGatewayIngestView(hass))
+    client = await hass_client_no_auth()
+
+    frame = msgpack.packb({"v": 1, "mid": 1, "time": 0, "devices": []})
+    url = f"/api/ab_ble_gateway/{entry.entry_id}"
+
+    resp = await client.post(url, data=frame, params={"token": "wrong"})
+    assert resp.status == 401
+    scanner.async_on_payload.assert_not_called()
+
+    resp = await client.post(url, data=frame, params={"token": "sécret"})
+    assert resp.status == 401
+
+    resp = await client.post(url, data=frame, params={"token": "secret"})
+    assert resp.status == 200
+    scanner.async_on_payload.assert_called_once_with(frame)
+
+    resp = await client.post(
+        "/api/ab_ble_gateway/unknown", data=frame, params={"token": "secret"}
+    )
+    assert resp.status == 404